@@ -0,0 +1,225 @@
+"""
+Product appearance spans.
+Merges the per-frame matches of each catalog item into [start, end] spans, and
+indexes them in a static interval tree so the products active at any playback
+time are found in O(log n + k), independent of the sampling interval.
+"""
+
+from typing import Callable, Dict, List, Tuple
+
+from config import APPEARANCE_SPAN_CONFIG
+from models import ProductResult, ProductSpan
+
+
+def merge_sightings(
+    timestamps: List[float], frames: List[List[Dict]], interval: float
+) -> List[Dict]:
+    """
+    Merge per-frame product matches into appearances of each catalog item.
+
+    Sightings of the same catalog item are merged while consecutive sightings
+    are at most APPEARANCE_SPAN_CONFIG.max_gap_intervals intervals apart. Each
+    appearance is padded by padding_intervals on both sides, so an item
+    sampled once covers the time around its sample.
+
+    Args:
+        timestamps: Sorted frame timestamps (seconds)
+        frames: Product result dictionaries per timestamp, aligned with timestamps
+        interval: Sampling interval in seconds
+
+    Returns:
+        Appearance dictionaries with the item's key (its catalog image path),
+        start, end, time of the first sighting (first_seen, unpadded), number
+        of sampled frames, peak confidence and its most confident product
+        dictionary, ordered by start time
+    """
+    max_gap = APPEARANCE_SPAN_CONFIG.max_gap_intervals * interval
+    padding = APPEARANCE_SPAN_CONFIG.padding_intervals * interval
+
+    open_spans: Dict[str, Dict] = {}
+    closed: List[Dict] = []
+
+    for timestamp, products in zip(timestamps, frames):
+        for product in products:
+            # The catalog image path is unique across catalogs; product IDs
+            # of different merchant catalogs can collide
+            key = product["image_url"]
+            confidence = product.get("confidence") or 0.0
+            span = open_spans.get(key)
+            if span is not None and timestamp - span["last"] > max_gap:
+                closed.append(span)
+                span = None
+            if span is None:
+                open_spans[key] = {
+                    "key": key,
+                    "first": timestamp,
+                    "last": timestamp,
+                    "frames": 1,
+                    "confidence": confidence,
+                    "product": product,
+                }
+                continue
+            if timestamp != span["last"]:
+                span["frames"] += 1
+            span["last"] = timestamp
+            if confidence > span["confidence"]:
+                span["confidence"] = confidence
+                span["product"] = product
+    closed.extend(open_spans.values())
+
+    for span in closed:
+        span["first_seen"] = span.pop("first")
+        span["start"] = max(0.0, span["first_seen"] - padding)
+        span["end"] = span.pop("last") + padding
+    closed.sort(key=lambda span: (span["start"], span["end"]))
+    return closed
+
+
+def build_spans(
+    timestamps: List[float],
+    frames: List[List[Dict]],
+    interval: float,
+    to_product: Callable[[Dict], ProductResult],
+) -> List[ProductSpan]:
+    """
+    Build the appearance spans of a video (see merge_sightings).
+
+    Args:
+        timestamps: Sorted frame timestamps (seconds)
+        frames: Product result dictionaries per timestamp, aligned with timestamps
+        interval: Sampling interval in seconds
+        to_product: Builds a ProductResult from a product dictionary
+
+    Returns:
+        Spans ordered by start time
+    """
+    return [
+        ProductSpan(
+            product=to_product(span["product"]),
+            start=span["start"],
+            end=span["end"],
+            confidence=round(span["confidence"], 4),
+            frames=span["frames"],
+        )
+        for span in merge_sightings(timestamps, frames, interval)
+    ]
+
+
+class SpanIndex:
+    """
+    Static centered interval tree over appearance spans.
+
+    Each node holds the spans containing its center point, sorted by start
+    and by end; spans entirely left or right of the center go to the child
+    nodes. A stabbing query visits O(log n) nodes and stops scanning each
+    node's list at the first span that does not contain the query time.
+    """
+
+    def __init__(self, spans: List[ProductSpan]):
+        """
+        Build the tree.
+
+        Args:
+            spans: Appearance spans
+        """
+        self.spans = spans
+        self._starts = [span.start for span in spans]
+        self._ends = [span.end for span in spans]
+        # Per node: (center, by_start, by_end, left child, right child)
+        self._nodes: List[Tuple[float, List[int], List[int], int, int]] = []
+        self._root = self._build(list(range(len(spans))))
+
+    def _build(self, items: List[int]) -> int:
+        """
+        Build the subtree of a set of spans.
+
+        Args:
+            items: Indices into spans
+
+        Returns:
+            Node index, or -1 for an empty subtree
+        """
+        if not items:
+            return -1
+
+        endpoints = sorted(
+            [self._starts[i] for i in items] + [self._ends[i] for i in items]
+        )
+        center = endpoints[len(endpoints) // 2]
+
+        left = [i for i in items if self._ends[i] < center]
+        right = [i for i in items if self._starts[i] > center]
+        here = [i for i in items if self._starts[i] <= center <= self._ends[i]]
+
+        node = len(self._nodes)
+        self._nodes.append(
+            (
+                center,
+                sorted(here, key=lambda i: self._starts[i]),
+                sorted(here, key=lambda i: -self._ends[i]),
+                -1,
+                -1,
+            )
+        )
+        left_child = self._build(left)
+        right_child = self._build(right)
+        center, by_start, by_end, _, _ = self._nodes[node]
+        self._nodes[node] = (center, by_start, by_end, left_child, right_child)
+        return node
+
+    def _query(self, time: float) -> List[int]:
+        """
+        Get the indices of the spans active at a time.
+
+        Args:
+            time: Playback time in seconds
+
+        Returns:
+            Sorted indices into spans
+        """
+        found: List[int] = []
+        node = self._root
+        while node != -1:
+            center, by_start, by_end, left_child, right_child = self._nodes[node]
+            if time < center:
+                for i in by_start:
+                    if self._starts[i] > time:
+                        break
+                    found.append(i)
+                node = left_child
+            elif time > center:
+                for i in by_end:
+                    if self._ends[i] < time:
+                        break
+                    found.append(i)
+                node = right_child
+            else:
+                found.extend(by_start)
+                break
+
+        found.sort()
+        return found
+
+    def at(self, time: float) -> List[ProductSpan]:
+        """
+        Get the spans active at a time.
+
+        Args:
+            time: Playback time in seconds
+
+        Returns:
+            Active spans, ordered by start time
+        """
+        return [self.spans[i] for i in self._query(time)]
+
+    def active_ids(self, time: float) -> Tuple[int, ...]:
+        """
+        Get the indices of the spans active at a time (e.g. as a cache key).
+
+        Args:
+            time: Playback time in seconds
+
+        Returns:
+            Sorted span indices (empty if no span is active)
+        """
+        return tuple(self._query(time))
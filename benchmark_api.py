@@ -0,0 +1,196 @@
+"""
+Benchmark response building of the hot API routes before and after the fast
+response path.
+
+"Before" is FastAPI's default path: jsonable_encoder + JSONResponse, with no
+compression (response_model validation is not included, so the real gap is
+larger). "After" is orjson serialization, cached payloads of completed videos
+and brotli/gzip negotiation (fast_responses.json_response).
+
+Usage:
+    python benchmark_api.py [--videos 20000] [--frames 120] [--products 8]
+        [--iterations 10000] [--registry-iterations 10]
+        [--accept-encoding "br, gzip"]
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from bundle_builder import create_bundles
+from config import logger
+from fast_responses import EncodedPayload, json_response
+from models import ProductResult, VideoInfo
+from results_cache import VideoResults
+
+
+def make_request(accept_encoding: str) -> Request:
+    """
+    Build a bare GET request with an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Accept-Encoding header value ("" for none)
+
+    Returns:
+        Starlette Request
+    """
+    headers = []
+    if accept_encoding:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def make_registry(count: int) -> List[VideoInfo]:
+    """
+    Build a synthetic video registry.
+
+    Args:
+        count: Number of videos
+
+    Returns:
+        List of VideoInfo objects
+    """
+    return [
+        VideoInfo(
+            id=f"{i:08d}-0000-4000-8000-000000000000",
+            filename=f"video_{i}.mp4",
+            status="completed" if i % 10 else "processing",
+            file_path=f"data/uploads/{i}/video_{i}.mp4",
+            results_dir=f"data/uploads/{i}/results",
+        )
+        for i in range(count)
+    ]
+
+
+def make_results(video_id: str, frames: int, products_per_frame: int) -> VideoResults:
+    """
+    Build synthetic parsed results of one video.
+
+    Args:
+        video_id: Unique identifier of the video
+        frames: Number of processed timestamps
+        products_per_frame: Products per timestamp
+
+    Returns:
+        VideoResults with products and bundles
+    """
+    labels = ["top", "bottom", "outer", "dress", "necklace", "ring", "earring"]
+    timestamps = np.arange(frames, dtype="float64") * 5.0
+    products = [
+        [
+            ProductResult(
+                object_type=labels[j % len(labels)],
+                category="jewelry" if j % len(labels) >= 4 else "clothing",
+                image_url=f"image_db/clothing/ ({j}).jpg",
+                title=f"Product {j}",
+                stock="In Stock",
+                direct_url=f"https://example.com/product/{j}",
+                product_id=j,
+                price=49.99,
+            )
+            for j in range(products_per_frame)
+        ]
+        for _ in range(frames)
+    ]
+    bundles = [
+        create_bundles(video_id, t, frame_products)
+        for t, frame_products in zip(timestamps.tolist(), products)
+    ]
+    return VideoResults(timestamps, products, bundles, 0, "benchmark")
+
+
+def requests_per_second(build: Callable[[], object], iterations: int) -> float:
+    """
+    Measure how many responses per second a builder produces.
+
+    Args:
+        build: Builds one response (including its body)
+        iterations: Number of timed calls
+
+    Returns:
+        Responses per second
+    """
+    build()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        build()
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    """Main function to benchmark API response building."""
+    parser = argparse.ArgumentParser(
+        description="Compare API response building before and after orjson, "
+        "payload caching and compression"
+    )
+    parser.add_argument("--videos", type=int, default=20000)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--products", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--registry-iterations", type=int, default=10)
+    parser.add_argument("--accept-encoding", default="br, gzip")
+    args = parser.parse_args()
+
+    request = make_request(args.accept_encoding)
+    registry = make_registry(args.videos)
+    video_results = make_results(registry[0].id, args.frames, args.products)
+    interval = 5.0
+
+    def results_after() -> object:
+        index = video_results.closest_index(42.0, interval)
+        payload = video_results.payload(
+            ("products", index), lambda: video_results.products[index]
+        )
+        return json_response(request, payload)
+
+    def bundles_after() -> object:
+        index = video_results.closest_index(42.0, interval)
+        payload = video_results.payload(
+            ("bundles", index), lambda: video_results.bundles[index]
+        )
+        return json_response(request, payload)
+
+    routes: Dict[str, Dict[str, Callable[[], object]]] = {
+        "/api/videos": {
+            "before": lambda: JSONResponse(jsonable_encoder(registry)),
+            "after": lambda: json_response(
+                request, EncodedPayload.from_content(registry)
+            ),
+        },
+        "/api/results": {
+            "before": lambda: JSONResponse(
+                jsonable_encoder(video_results.lookup(42.0, interval))
+            ),
+            "after": results_after,
+        },
+        "/api/bundles": {
+            "before": lambda: JSONResponse(
+                jsonable_encoder(video_results.lookup_bundles(42.0, interval))
+            ),
+            "after": bundles_after,
+        },
+    }
+
+    for route, builders in routes.items():
+        # The registry is serialized on every request, so it gets fewer calls
+        iterations = (
+            args.registry_iterations if route == "/api/videos" else args.iterations
+        )
+        before = requests_per_second(builders["before"], iterations)
+        after = requests_per_second(builders["after"], iterations)
+        before_bytes = len(builders["before"]().body)
+        after_bytes = len(builders["after"]().body)
+        logger.info(
+            f"{route:14s} before {before:10.1f} req/s ({before_bytes} B)  "
+            f"after {after:10.1f} req/s ({after_bytes} B)  "
+            f"({after / before:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark per-model CPU inference latency before and after runtime tuning.
+
+"Before" is the original path: eager float32 under torch.no_grad with default
+threading. "After" applies INFERENCE_RUNTIME_CONFIG (intra-op threads, bf16
+autocast where supported, channels-last, torch.inference_mode). Thread counts
+are process-wide and applied on first use, so only the first model's "before"
+runs with default threading; pass one model per run to compare threads too.
+
+Usage:
+    python benchmark_runtime.py [--image FRAME.jpg] [--iterations 20]
+        [--models clothing person clip]
+"""
+
+import argparse
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import torch
+from PIL import Image
+from transformers import (  # type: ignore
+    AutoImageProcessor,
+    AutoModelForObjectDetection,
+    CLIPModel,
+    CLIPProcessor,
+)
+
+from config import MODEL_CONFIG, PERSON_DETECTION_CONFIG, logger
+from image_similarity_search import ImageSimilaritySearch
+from inference_runtime import get_runtime
+
+
+def time_calls(call: Callable[[], None], iterations: int) -> float:
+    """
+    Time a callable after one warm-up call.
+
+    Args:
+        call: Function running one forward pass
+        iterations: Number of timed calls
+
+    Returns:
+        Median latency in milliseconds
+    """
+    call()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+
+def benchmark_model(name: str, image: Image.Image, iterations: int) -> Dict:
+    """
+    Benchmark one model before and after runtime tuning.
+
+    Args:
+        name: "clothing", "person" or "clip"
+        image: Input frame
+        iterations: Number of timed calls per variant
+
+    Returns:
+        Dictionary with before/after median latency (ms) and speedup
+    """
+    if name == "clip":
+        model_name = ImageSimilaritySearch.DEFAULT_MODEL
+        model = CLIPModel.from_pretrained(model_name).eval()
+        inputs = CLIPProcessor.from_pretrained(model_name)(
+            images=image, return_tensors="pt"
+        )
+        forward = model.get_image_features
+    else:
+        checkpoint = (
+            MODEL_CONFIG.checkpoint
+            if name == "clothing"
+            else PERSON_DETECTION_CONFIG.checkpoint
+        )
+        model = AutoModelForObjectDetection.from_pretrained(checkpoint).eval()
+        inputs = AutoImageProcessor.from_pretrained(checkpoint)(
+            images=[image], return_tensors="pt"
+        )
+        forward = model
+
+    def before():
+        with torch.no_grad():
+            forward(**inputs)
+
+    before_ms = time_calls(before, iterations)
+
+    runtime = get_runtime(name)
+    if name != "clip":
+        model = runtime.prepare(model)
+        forward = model
+    tuned_inputs = runtime.prepare_inputs(dict(inputs))
+
+    def after():
+        with runtime.run():
+            forward(**tuned_inputs)
+
+    after_ms = time_calls(after, iterations)
+    return {
+        "before_ms": round(before_ms, 1),
+        "after_ms": round(after_ms, 1),
+        "speedup": round(before_ms / after_ms, 2),
+        **{k: v for k, v in runtime.stats().items() if k in ("threads", "bf16")},
+    }
+
+
+def main():
+    """Main function to benchmark inference runtime tuning."""
+    parser = argparse.ArgumentParser(
+        description="Compare model latency before and after CPU runtime tuning"
+    )
+    parser.add_argument("--image", help="Frame to run the models on")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=["clothing", "person", "clip"],
+        default=["clothing", "person", "clip"],
+    )
+    args = parser.parse_args()
+
+    if args.image:
+        image = Image.open(args.image).convert("RGB")
+    else:
+        image = Image.fromarray(
+            np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype="uint8")
+        )
+
+    for name in args.models:
+        report = benchmark_model(name, image, args.iterations)
+        logger.info(
+            f"{name:10s} before {report['before_ms']:8.1f} ms  "
+            f"after {report['after_ms']:8.1f} ms  ({report['speedup']:.2f}x, "
+            f"threads {report['threads']}, bf16 {report['bf16']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
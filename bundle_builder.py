@@ -0,0 +1,324 @@
+"""
+Product bundle generation.
+Groups the products found at one timestamp into complementary bundles. Runs as
+a processing stage, and the bundles are stored next to the detection results.
+"""
+
+from typing import Dict, List, Optional
+
+from config import logger
+from models import ProductResult
+
+
+# Bump when the bundling rules change, so stored bundles are regenerated
+BUNDLE_RULES_VERSION = 1
+
+
+def create_bundles(
+    video_id: str, time: Optional[float], products: List[ProductResult]
+) -> List[dict]:
+    """
+    Create product bundles by grouping complementary products.
+
+    Args:
+        video_id: Unique identifier of the video
+        time: Timestamp the products were found at
+        products: Products at that timestamp
+
+    Returns:
+        List[dict]: Up to 3 product bundles
+    """
+    if not products:
+        return []
+
+    # Group products by type and category
+    product_groups = {}
+    clothing_items = []
+    jewelry_items = []
+
+    for product in products:
+        obj_type = product.object_type
+        if obj_type not in product_groups:
+            product_groups[obj_type] = []
+        product_groups[obj_type].append(product)
+
+        # Separate by category for specialized bundling
+        if product.category == "clothing":
+            clothing_items.append(product)
+        elif product.category == "jewelry":
+            jewelry_items.append(product)
+
+    bundles = []
+
+    # Strategy 1: Create outfit bundles (top + bottom combinations)
+    if "top" in product_groups and "bottom" in product_groups:
+        for i, top in enumerate(product_groups["top"][:2]):  # Max 2 tops
+            for j, bottom in enumerate(
+                product_groups["bottom"][:2]
+            ):  # Max 2 bottoms
+                bundle = {
+                    "id": f"bundle-outfit-{video_id}-{time}-{i}-{j}",
+                    "name": f"Complete Outfit {i + 1}",
+                    "description": f"Stylish {top.object_type} and {bottom.object_type} combination",
+                    "total_price": 99.98,
+                    "discount_price": 79.98,
+                    "category": "outfit",
+                    "image_url": top.image_url,
+                    "product_ids": [top.title, bottom.title],
+                    "products": [
+                        {
+                            "object_type": top.object_type,
+                            "image_url": top.image_url,
+                            "title": top.title,
+                            "stock": top.stock,
+                            "direct_url": top.direct_url,
+                        },
+                        {
+                            "object_type": bottom.object_type,
+                            "image_url": bottom.image_url,
+                            "title": bottom.title,
+                            "stock": bottom.stock,
+                            "direct_url": bottom.direct_url,
+                        },
+                    ],
+                    "similarity_score": 0.85,
+                }
+                bundles.append(bundle)
+
+    # Strategy 2: Create layered look bundles (top + outer)
+    if "top" in product_groups and "outer" in product_groups and len(bundles) < 3:
+        for i, top in enumerate(product_groups["top"][:2]):
+            for j, outer in enumerate(product_groups["outer"][:2]):
+                if len(bundles) >= 3:
+                    break
+                bundle = {
+                    "id": f"bundle-layered-{video_id}-{time}-{i}-{j}",
+                    "name": f"Layered Look {i + 1}",
+                    "description": f"Stylish {top.object_type} with {outer.object_type}",
+                    "total_price": 129.98,
+                    "discount_price": 99.98,
+                    "category": "layered",
+                    "image_url": outer.image_url,
+                    "product_ids": [top.title, outer.title],
+                    "products": [
+                        {
+                            "object_type": top.object_type,
+                            "image_url": top.image_url,
+                            "title": top.title,
+                            "stock": top.stock,
+                            "direct_url": top.direct_url,
+                        },
+                        {
+                            "object_type": outer.object_type,
+                            "image_url": outer.image_url,
+                            "title": outer.title,
+                            "stock": outer.stock,
+                            "direct_url": outer.direct_url,
+                        },
+                    ],
+                    "similarity_score": 0.8,
+                }
+                bundles.append(bundle)
+
+    # Strategy 3: Create accessory bundles (any main item + accessories)
+    if len(bundles) < 3:
+        main_types = ["top", "bottom", "dress", "outer"]
+        acc_types = ["bag", "hat", "shoes", "accessory"]
+
+        for main_type in main_types:
+            if main_type in product_groups and len(bundles) < 3:
+                main_item = product_groups[main_type][0]
+                accessories = []
+                for acc_type in acc_types:
+                    if acc_type in product_groups:
+                        accessories.extend(product_groups[acc_type][:1])
+
+                if accessories:
+                    bundle_products = [
+                        {
+                            "object_type": main_item.object_type,
+                            "image_url": main_item.image_url,
+                            "title": main_item.title,
+                            "stock": main_item.stock,
+                            "direct_url": main_item.direct_url,
+                        }
+                    ]
+                    for acc in accessories[:2]:  # Max 2 accessories
+                        bundle_products.append(
+                            {
+                                "object_type": acc.object_type,
+                                "image_url": acc.image_url,
+                                "title": acc.title,
+                                "stock": acc.stock,
+                                "direct_url": acc.direct_url,
+                            }
+                        )
+
+                    bundle = {
+                        "id": f"bundle-accessories-{video_id}-{time}-{main_type}",
+                        "name": "Complete Look",
+                        "description": f"{main_item.object_type.title()} with accessories",
+                        "total_price": 89.98 + (len(bundle_products) - 1) * 30,
+                        "discount_price": 69.98 + (len(bundle_products) - 1) * 20,
+                        "category": "accessories",
+                        "image_url": main_item.image_url,
+                        "product_ids": [p["title"] for p in bundle_products],
+                        "products": bundle_products,
+                        "similarity_score": 0.75,
+                    }
+                    bundles.append(bundle)
+                    break
+
+    # Strategy 4: Create jewelry sets (necklace + earrings, ring + bracelet, etc.)
+    if len(jewelry_items) >= 2 and len(bundles) < 3:
+        # Group jewelry by type
+        jewelry_groups = {}
+        for item in jewelry_items:
+            if item.object_type not in jewelry_groups:
+                jewelry_groups[item.object_type] = []
+            jewelry_groups[item.object_type].append(item)
+
+        # Create complementary jewelry sets
+        jewelry_types = list(jewelry_groups.keys())
+        for i in range(min(2, len(jewelry_types) - 1)):
+            if len(bundles) >= 3:
+                break
+            type1 = jewelry_types[i]
+            type2 = jewelry_types[i + 1]
+
+            item1 = jewelry_groups[type1][0]
+            item2 = jewelry_groups[type2][0]
+
+            bundle_products = [
+                {
+                    "object_type": item1.object_type,
+                    "image_url": item1.image_url,
+                    "title": item1.title,
+                    "stock": item1.stock,
+                    "direct_url": item1.direct_url,
+                    "category": "jewelry",
+                },
+                {
+                    "object_type": item2.object_type,
+                    "image_url": item2.image_url,
+                    "title": item2.title,
+                    "stock": item2.stock,
+                    "direct_url": item2.direct_url,
+                    "category": "jewelry",
+                },
+            ]
+
+            bundle = {
+                "id": f"bundle-jewelry-{video_id}-{time}-{i}",
+                "name": f"Jewelry Set {i + 1}",
+                "description": f"Elegant {item1.object_type} and {item2.object_type} set",
+                "total_price": 199.98,
+                "discount_price": 149.98,
+                "category": "jewelry",
+                "image_url": item1.image_url,
+                "product_ids": [item1.title, item2.title],
+                "products": bundle_products,
+                "similarity_score": 0.88,
+            }
+            bundles.append(bundle)
+
+    # Strategy 5: Create complete look bundles (clothing + jewelry)
+    if len(clothing_items) >= 1 and len(jewelry_items) >= 1 and len(bundles) < 3:
+        for i in range(min(2, len(clothing_items))):
+            if len(bundles) >= 3:
+                break
+            clothing_item = clothing_items[i]
+            jewelry_item = jewelry_items[min(i, len(jewelry_items) - 1)]
+
+            bundle_products = [
+                {
+                    "object_type": clothing_item.object_type,
+                    "image_url": clothing_item.image_url,
+                    "title": clothing_item.title,
+                    "stock": clothing_item.stock,
+                    "direct_url": clothing_item.direct_url,
+                    "category": "clothing",
+                },
+                {
+                    "object_type": jewelry_item.object_type,
+                    "image_url": jewelry_item.image_url,
+                    "title": jewelry_item.title,
+                    "stock": jewelry_item.stock,
+                    "direct_url": jewelry_item.direct_url,
+                    "category": "jewelry",
+                },
+            ]
+
+            bundle = {
+                "id": f"bundle-complete-{video_id}-{time}-{i}",
+                "name": "Complete Look",
+                "description": f"Stunning {clothing_item.object_type} with elegant {jewelry_item.object_type}",
+                "total_price": 179.98,
+                "discount_price": 139.98,
+                "category": "complete",
+                "image_url": clothing_item.image_url,
+                "product_ids": [clothing_item.title, jewelry_item.title],
+                "products": bundle_products,
+                "similarity_score": 0.82,
+            }
+            bundles.append(bundle)
+
+    # Strategy 6: Fallback - create bundles from any available products
+    if len(bundles) == 0 and len(products) >= 2:
+        # Group any 2-3 products together as a "Style Bundle"
+        bundle_size = min(3, len(products))
+        selected_products = products[:bundle_size]
+
+        bundle_products = [
+            {
+                "object_type": p.object_type,
+                "image_url": p.image_url,
+                "title": p.title,
+                "stock": p.stock,
+                "direct_url": p.direct_url,
+            }
+            for p in selected_products
+        ]
+
+        product_types = [p.object_type for p in selected_products]
+        product_types_str = " + ".join(product_types)
+
+        bundle = {
+            "id": f"bundle-style-{video_id}-{time}",
+            "name": "Style Bundle",
+            "description": f"Featured items: {product_types_str}",
+            "total_price": 69.98 * bundle_size,
+            "discount_price": 49.98 * bundle_size,
+            "category": "style",
+            "image_url": selected_products[0].image_url,
+            "product_ids": [p.title for p in selected_products],
+            "products": bundle_products,
+            "similarity_score": 0.7,
+        }
+        bundles.append(bundle)
+
+        logger.info(
+            f"Created fallback bundle with {bundle_size} products for video {video_id} at {time}s"
+        )
+
+    logger.info(f"Created {len(bundles)} bundles for video {video_id} at {time}s")
+    return bundles[:3]  # Return max 3 bundles
+
+
+def create_video_bundles(
+    video_id: str, frames: Dict[float, List[ProductResult]]
+) -> Dict[float, List[dict]]:
+    """
+    Create the bundles of every processed timestamp of a video.
+
+    Args:
+        video_id: Unique identifier of the video
+        frames: Dictionary of frame timestamps to product results
+
+    Returns:
+        Dictionary of frame timestamps to bundles
+    """
+    return {
+        timestamp: create_bundles(video_id, timestamp, products)
+        for timestamp, products in frames.items()
+    }
@@ -4,7 +4,8 @@ Contains constants and configuration settings.
 """
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 
 # Logger Configuration
@@ -35,6 +36,51 @@ class JewelryDetectionConfig:
     model_id: str = "jewellery_detect-iwird/1"
     confidence_threshold: float = 0.4
 
+    # Tiled mode: detect on overlapping native-resolution tiles of the person
+    # region so small items (rings, earrings) are not lost to input resizing
+    enable_tiling: bool = False
+    tile_size: int = 640  # Tile side in pixels
+    tile_overlap: float = 0.2  # Fraction of the tile shared with its neighbour
+    # Cost budget: tiles per frame, including the full-region passes, split
+    # across the frame's person regions. Tiles grow until each grid fits.
+    max_tiles_per_frame: int = 6
+    tile_batch_size: int = 4  # Tiles sent per inference request
+    include_full_view: bool = True  # Also detect on the whole region (large items)
+    tile_nms_iou: float = 0.5  # IoU for merging detections across tiles
+
+
+@dataclass
+class JewelryGateConfig:
+    """Configuration for deciding per frame whether to call the jewelry detector."""
+
+    enable_gating: bool = False
+
+    # Largest person box (as fraction of frame area) needed to resolve jewelry
+    min_person_area: float = 0.15
+
+    # Clothing labels that indicate a visible upper body
+    upper_body_labels: List[str] = field(
+        default_factory=lambda: ["top", "outer", "dress", "hat"]
+    )
+    # Fall back to face detection when no upper-body garment is detected
+    use_face_detection: bool = True
+
+    # Mean absolute frame difference above which a new shot starts
+    scene_change_threshold: float = 30.0
+    # Calls without jewelry after which the rest of the shot is skipped
+    max_shot_misses: int = 2
+
+    # Smoothing factor of the recent hit rate (exponential moving average)
+    hit_rate_smoothing: float = 0.3
+    # Below this recent hit rate, frames are only probed every probe_interval
+    min_hit_rate: float = 0.2
+    # Skipped frames after which the detector is called anyway (re-probe)
+    probe_interval: int = 4
+
+    # Maximum jewelry detector requests per video, counting every image sent
+    # (person regions and tiles) rather than frames (0 = no limit)
+    max_requests_per_video: int = 0
+
 
 @dataclass
 class VideoProcessingConfig:
@@ -42,6 +88,8 @@ class VideoProcessingConfig:
 
     interval_seconds: int = 5
     create_frame_folders: bool = True  # New configuration option
+    # Cache lifetime of the timeline of a completed video (revalidated by ETag)
+    timeline_max_age_seconds: int = 86400
 
 
 @dataclass
@@ -62,6 +110,27 @@ class FrameQualityConfig:
     fallback_search_range: float = 1.0
 
 
+@dataclass
+class CropTriageConfig:
+    """Configuration for filtering detections before similarity search."""
+
+    enable_crop_triage: bool = True
+
+    # Crops smaller than this (in pixels) are dropped
+    min_crop_area: int = 1024
+
+    # Overlapping boxes from the same detector above this IoU are merged
+    iou_threshold: float = 0.5
+    # Clothing and jewelry boxes covering the same region above this IoU are merged
+    cross_category_iou_threshold: float = 0.8
+
+    # Crops with Laplacian variance below this are considered blurry (0 disables)
+    min_sharpness: float = 30.0
+
+    # Maximum crops searched per frame, highest confidence first (0 = no cap)
+    max_crops_per_frame: int = 8
+
+
 @dataclass
 class PersonDetectionConfig:
     """Configuration for person detection parameters."""
@@ -75,6 +144,12 @@ class PersonDetectionConfig:
     # Minimum person size (as fraction of frame area)
     min_person_area: float = 0.05  # 5% of frame
 
+    # Detect garments on every person above min_person_area (group shots, duets)
+    # instead of only the most confident one. All person crops of a frame go
+    # through the detectors in one batched call.
+    detect_all_persons: bool = False
+    max_persons_per_frame: int = 4  # Most confident persons kept (0 = no limit)
+
     # Model checkpoint for person detection
     checkpoint: str = "facebook/detr-resnet-50"  # DETR model with person detection
 
@@ -91,6 +166,191 @@ class SimilaritySearchConfig:
     jewelry_db_path: str = "data/similarity_db/jewelry"
     jewelry_images_path: str = "data/image_db/jewelry"
 
+    # Unified catalog database (one index, laid out as <category>/[<label>/]<image>)
+    # Falls back to the per-category databases above when it has not been built
+    catalog_db_path: str = "data/similarity_db/catalog"
+    catalog_images_path: str = "data/image_db"
+    use_unified_catalog: bool = True
+
+    # Restrict catalog search to the detection's label when that label is indexed
+    filter_by_label: bool = True
+
+    # Index storage chosen at build time: "flat" (float32), "fp16", "int8" or "pq"
+    index_type: str = "flat"
+    pq_subquantizers: int = 64
+
+    # Re-rank top_k * rerank_factor quantized candidates with float32 embeddings
+    # (0 disables; has no effect on "flat" indexes)
+    rerank_factor: int = 4
+
+    # Collapse catalog images of the same product (same product ID, category,
+    # label and merchant) whose CLIP cosine similarity is at or above this
+    # threshold at build time, e.g. 0.97 (0 disables; off until measured)
+    dedupe_threshold: float = 0.0
+
+    # Embedding model per database (None = use the model recorded in the
+    # database manifest; new builds default to openai/clip-vit-base-patch16).
+    # A database can only be queried with the model it was built with.
+    catalog_model_name: Optional[str] = None
+    clothing_model_name: Optional[str] = None
+    jewelry_model_name: Optional[str] = None
+
+    # Poll interval (seconds) for newly published database versions, which are
+    # loaded in the background and swapped in without a restart (0 disables;
+    # POST /api/admin/similarity/reload triggers a reload on demand)
+    reload_poll_seconds: float = 30.0
+
+    # Two-stage retrieval: a PCA-reduced coarse index (built when > 0) returns
+    # coarse_candidates ids that are re-ranked with full embeddings (0 disables)
+    coarse_dimension: int = 64
+    coarse_candidates: int = 0
+
+
+@dataclass
+class ShardedSearchConfig:
+    """Configuration for sharded catalog similarity search."""
+
+    # Serve the unified catalog from shards instead of one in-process index
+    enable_sharding: bool = False
+
+    # Shard databases built from the unified catalog
+    shards_path: str = "data/similarity_db/catalog_shards"
+    num_shards: int = 4
+
+    # "host:port" per shard for remote workers; empty = spawn local workers
+    shard_addresses: List[str] = field(default_factory=list)
+    base_port: int = 6100
+
+    # Shared secret of shard connections; required with shard_addresses, as
+    # shards unpickle requests (empty = random per-process key for local workers)
+    authkey: str = ""
+
+    # Per-shard request timeout (seconds); slow shards are skipped
+    timeout_seconds: float = 5.0
+
+
+@dataclass
+class QueryCacheConfig:
+    """Configuration for the crop query embedding/result cache."""
+
+    # Cache CLIP embeddings and search results keyed by crop perceptual hash
+    enable_query_cache: bool = True
+
+    # Maximum cached entries (embeddings and result lists) before LRU eviction
+    max_entries: int = 4096
+
+    # Entry lifetime in seconds (0 = no expiry)
+    ttl_seconds: float = 0.0
+
+    # Perceptual hash grid size (hash has hash_size**2 bits)
+    hash_size: int = 8
+
+    # Persist the cache across processing jobs (None = in-memory only)
+    persist_path: Optional[str] = "data/similarity_db/query_cache.pkl"
+
+
+@dataclass
+class MerchantCatalogConfig:
+    """Configuration for per-merchant catalogs loaded on demand."""
+
+    enable_merchant_catalogs: bool = False
+    # One versioned catalog database per merchant: <merchants_path>/<merchant_id>/
+    merchants_path: str = "data/similarity_db/merchants"
+    # Resident indexes and metadata above this size evict the least recently
+    # used merchant catalogs (the shared model is not counted)
+    memory_budget_mb: float = 1024.0
+    max_resident: int = 0  # Maximum resident catalogs (0 = memory budget only)
+    # Embedding model for merchant catalogs (None = the one in each manifest)
+    model_name: Optional[str] = None
+
+
+@dataclass
+class InferenceRuntimeConfig:
+    """Configuration for CPU inference of the PyTorch models."""
+
+    # Intra-op threads of the worker process, shared by every model; 0 = PyTorch
+    # default. PyTorch's thread count is process-wide, so it is set once rather
+    # than per forward pass: with concurrent jobs, size it so that jobs times
+    # threads stays at or below the worker's cores.
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0  # Process-wide; 0 = PyTorch default
+
+    # Cores this worker is pinned to, e.g. "0-3" (empty = no pinning). The
+    # environment variable overrides it so each worker process gets its own set.
+    cpu_affinity: str = ""
+    cpu_affinity_env: str = "INFERENCE_CPU_AFFINITY"
+
+    # bf16 autocast, only applied on CPUs with native bf16 (AVX512-BF16/AMX).
+    # Faster, but detector boxes and embeddings lose some precision.
+    use_bf16: bool = False
+    channels_last: bool = True  # Channels-last layout for convolutional backbones
+
+    latency_window: int = 1000  # Recent calls kept per model for latency stats
+
+
+@dataclass
+class ResultsCacheConfig:
+    """Configuration for the in-memory cache of parsed detection results."""
+
+    enable_results_cache: bool = True
+    # Estimated size of cached results above which the least recently used
+    # videos are evicted
+    memory_budget_mb: float = 256.0
+
+
+@dataclass
+class StorageConfig:
+    """Configuration for the SQLite video registry and results store."""
+
+    enable_sqlite_store: bool = True
+    db_path: str = "data/videos.db"
+    # How long a write waits for another worker's lock before failing
+    busy_timeout_ms: int = 5000
+    # Import video folders and detection_results.json files that are not in
+    # the store yet (e.g. from before the store existed) at startup
+    migrate_json_results: bool = True
+    # Page sizes of the product appearances (reverse index) endpoint
+    appearances_page_size: int = 50
+    max_appearances_page_size: int = 500
+    # Page sizes of the video listing endpoint when paginated (a cursor
+    # without a limit uses the default; no limit and no cursor lists everything)
+    videos_page_size: int = 100
+    max_videos_page_size: int = 1000
+
+
+@dataclass
+class LiveResultsConfig:
+    """Configuration for streaming per-interval results while processing."""
+
+    enable_live_results: bool = True
+    # Comment line sent on idle streams so proxies don't close them
+    keepalive_seconds: float = 15.0
+
+
+@dataclass
+class ResponseConfig:
+    """Configuration for JSON serialization and compression of API responses."""
+
+    enable_compression: bool = True
+    # Smaller bodies are sent uncompressed (compression would not pay off)
+    compression_min_bytes: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 5
+
+
+@dataclass
+class AppearanceSpanConfig:
+    """Configuration for merging per-frame matches into appearance spans."""
+
+    # Serve /api/results from spans (products active at the exact time)
+    # instead of the nearest sampled frame
+    enable_spans: bool = True
+    # Sightings of an item at most this many intervals apart form one span
+    max_gap_intervals: float = 2.0
+    # Spans extend this many intervals before the first and after the last
+    # sighting
+    padding_intervals: float = 0.5
+
 
 @dataclass
 class Paths:
@@ -103,7 +363,18 @@ class Paths:
 # Global Config Instances
 MODEL_CONFIG = ModelConfig()
 JEWELRY_CONFIG = JewelryDetectionConfig()
+JEWELRY_GATE_CONFIG = JewelryGateConfig()
 VIDEO_CONFIG = VideoProcessingConfig()
 SIMILARITY_SEARCH_CONFIG = SimilaritySearchConfig()
 FRAME_QUALITY_CONFIG = FrameQualityConfig()
 PERSON_DETECTION_CONFIG = PersonDetectionConfig()
+CROP_TRIAGE_CONFIG = CropTriageConfig()
+QUERY_CACHE_CONFIG = QueryCacheConfig()
+SHARDED_SEARCH_CONFIG = ShardedSearchConfig()
+INFERENCE_RUNTIME_CONFIG = InferenceRuntimeConfig()
+RESULTS_CACHE_CONFIG = ResultsCacheConfig()
+STORAGE_CONFIG = StorageConfig()
+LIVE_RESULTS_CONFIG = LiveResultsConfig()
+RESPONSE_CONFIG = ResponseConfig()
+APPEARANCE_SPAN_CONFIG = AppearanceSpanConfig()
+MERCHANT_CATALOG_CONFIG = MerchantCatalogConfig()
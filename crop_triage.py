@@ -0,0 +1,185 @@
+"""
+Crop triage module for filtering detections before similarity search.
+Merges overlapping boxes across detectors and drops crops that are too small,
+too blurry or over the per-frame budget, so fewer crops reach CLIP.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+from config import CROP_TRIAGE_CONFIG, logger
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Calculate pairwise intersection-over-union between two sets of boxes.
+
+    Args:
+        boxes_a: Array of shape (N, 4) with (x1, y1, x2, y2) boxes
+        boxes_b: Array of shape (M, 4) with (x1, y1, x2, y2) boxes
+
+    Returns:
+        Array of shape (N, M) with IoU values
+    """
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
+
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+
+def non_max_suppression(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float,
+    groups: Optional[np.ndarray] = None,
+    cross_group_iou_threshold: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Greedy non-maximum suppression.
+
+    Boxes in the same group are suppressed above iou_threshold; boxes in
+    different groups only above cross_group_iou_threshold (never, if None).
+
+    Args:
+        boxes: Array of shape (N, 4) with (x1, y1, x2, y2) boxes
+        scores: Array of shape (N,) with confidence scores
+        iou_threshold: IoU above which a lower-scoring box in the same group is dropped
+        groups: Optional array of shape (N,) with group ids (e.g. detector category)
+        cross_group_iou_threshold: IoU above which a lower-scoring box in another
+            group is dropped
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=int)
+
+    order = np.argsort(-scores, kind="stable")
+    iou = box_iou(boxes, boxes)
+    if groups is None:
+        thresholds = np.full(iou.shape, iou_threshold)
+    else:
+        same_group = groups[:, None] == groups[None, :]
+        cross_threshold = (
+            np.inf if cross_group_iou_threshold is None else cross_group_iou_threshold
+        )
+        thresholds = np.where(same_group, iou_threshold, cross_threshold)
+    overlaps = iou > thresholds
+
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    keep = []
+    for idx in order:
+        if suppressed[idx]:
+            continue
+        keep.append(idx)
+        suppressed |= overlaps[idx]
+    return np.array(keep, dtype=int)
+
+
+class CropTriage:
+    """
+    Filters a frame's detections before they are cropped and embedded:
+    minimum crop area, cross-detector box merging, crop sharpness and a
+    per-frame crop cap. Keeps counts of dropped crops per reason.
+    """
+
+    REASONS = ("small", "overlap", "blurry", "frame_cap")
+
+    def __init__(self):
+        """Initialize the crop triage stage."""
+        self.config = CROP_TRIAGE_CONFIG
+        self.dropped: Counter = Counter()
+        self.kept = 0
+        logger.info(
+            f"CropTriage initialized - Min area: {self.config.min_crop_area}, "
+            f"IoU: {self.config.iou_threshold} "
+            f"(cross-category {self.config.cross_category_iou_threshold}), "
+            f"Min sharpness: {self.config.min_sharpness}, "
+            f"Max crops: {self.config.max_crops_per_frame}"
+        )
+
+    def filter_detections(
+        self, detections: List[Dict], frame: np.ndarray
+    ) -> List[Dict]:
+        """
+        Triage a frame's detections.
+
+        Args:
+            detections: Detection dictionaries with "box", "confidence" and "category"
+            frame: OpenCV frame (BGR format) the boxes refer to
+
+        Returns:
+            Kept detections, highest confidence first
+        """
+        if not self.config.enable_crop_triage or not detections:
+            return detections
+
+        dropped: Counter = Counter()
+        height, width = frame.shape[:2]
+
+        boxes = np.array([d["box"] for d in detections], dtype="float32")
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height)
+        scores = np.array([d["confidence"] for d in detections], dtype="float32")
+        categories = np.array([d.get("category", "unknown") for d in detections])
+
+        # Minimum crop area
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        candidates = np.flatnonzero(areas >= self.config.min_crop_area)
+        dropped["small"] = len(detections) - len(candidates)
+
+        # Box merging within and across detectors
+        keep = candidates[
+            non_max_suppression(
+                boxes[candidates],
+                scores[candidates],
+                self.config.iou_threshold,
+                groups=categories[candidates],
+                cross_group_iou_threshold=self.config.cross_category_iou_threshold,
+            )
+        ]
+        dropped["overlap"] = len(candidates) - len(keep)
+
+        # Sharpness check and per-frame cap, in confidence order, so crops past
+        # the cap are never cropped or measured
+        kept = []
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        for position, idx in enumerate(keep):
+            if len(kept) >= self.config.max_crops_per_frame > 0:
+                dropped["frame_cap"] = len(keep) - position
+                break
+            if self.config.min_sharpness > 0:
+                x1, y1, x2, y2 = boxes[idx].astype(int)
+                sharpness = cv2.Laplacian(gray[y1:y2, x1:x2], cv2.CV_64F).var()
+                if sharpness < self.config.min_sharpness:
+                    dropped["blurry"] += 1
+                    continue
+            kept.append(detections[idx])
+
+        self.dropped.update(dropped)
+        self.kept += len(kept)
+        logger.debug(
+            f"Crop triage kept {len(kept)}/{len(detections)} detections, "
+            f"dropped {dict(+dropped)}"
+        )
+        return kept
+
+    def stats(self) -> Dict:
+        """
+        Get triage counters accumulated since creation.
+
+        Returns:
+            Dictionary with kept crops and dropped crops per reason
+        """
+        return {
+            "kept": self.kept,
+            "dropped": {reason: self.dropped[reason] for reason in self.REASONS},
+        }
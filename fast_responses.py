@@ -0,0 +1,223 @@
+"""
+Fast JSON responses for the hot API routes.
+Payloads are serialized with orjson and compressed with brotli or gzip when
+the client accepts it and the body is large enough. Payloads of completed
+videos never change, so their serialized and compressed bytes are cached.
+"""
+
+import gzip
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import brotli
+import orjson
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from config import RESPONSE_CONFIG
+
+
+def dumps(content: Any, exclude_none: bool = False) -> bytes:
+    """
+    Serialize content to JSON with orjson.
+
+    Args:
+        content: JSON-compatible data, which may contain pydantic models
+        exclude_none: Leave out None fields of pydantic models
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+
+    def default(obj: Any) -> Any:
+        if isinstance(obj, BaseModel):
+            # pydantic v2 (model_dump) and v1 (dict)
+            dump = getattr(obj, "model_dump", None) or obj.dict
+            return dump(exclude_none=exclude_none)
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+    return orjson.dumps(
+        content,
+        default=default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the response encoding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+
+    Returns:
+        "br", "gzip", or None for an uncompressed response
+    """
+    accepted = set()
+    refused = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            (accepted if quality > 0 else refused).add(coding)
+
+    # Brotli compresses JSON better; gzip is the universal fallback
+    for coding in ("br", "gzip"):
+        if coding in accepted or ("*" in accepted and coding not in refused):
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a response body.
+
+    Args:
+        body: Uncompressed body
+        encoding: "br" or "gzip"
+
+    Returns:
+        Compressed body
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=RESPONSE_CONFIG.brotli_quality)
+    return gzip.compress(body, compresslevel=RESPONSE_CONFIG.gzip_level)
+
+
+class EncodedPayload:
+    """
+    Serialized JSON body with lazily compressed variants.
+
+    Safe to cache and share between requests once created.
+    """
+
+    def __init__(self, body: bytes):
+        """
+        Initialize the payload.
+
+        Args:
+            body: Serialized JSON body
+        """
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_content(
+        cls, content: Any, exclude_none: bool = False
+    ) -> "EncodedPayload":
+        """
+        Serialize content into a payload.
+
+        Args:
+            content: JSON-compatible data, which may contain pydantic models
+            exclude_none: Leave out None fields of pydantic models
+
+        Returns:
+            EncodedPayload of the serialized content
+        """
+        return cls(dumps(content, exclude_none))
+
+    def encoded(self, encoding: str) -> bytes:
+        """
+        Get the body compressed with an encoding, compressing it on first use.
+
+        Args:
+            encoding: "br" or "gzip"
+
+        Returns:
+            Compressed body
+        """
+        with self._lock:
+            body = self._encoded.get(encoding)
+        if body is None:
+            body = compress(self.body, encoding)
+            with self._lock:
+                self._encoded[encoding] = body
+        return body
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the body and its compressed variants."""
+        with self._lock:
+            return len(self.body) + sum(len(b) for b in self._encoded.values())
+
+
+EMPTY_LIST = EncodedPayload(b"[]")
+
+
+def json_response(
+    request: Request,
+    payload: EncodedPayload,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Build a JSON response, compressed if the client accepts it and the body is
+    at least RESPONSE_CONFIG.compression_min_bytes.
+
+    Args:
+        request: Incoming request (for Accept-Encoding)
+        payload: Serialized body
+        status_code: HTTP status code
+        headers: Extra response headers
+
+    Returns:
+        Response with the (possibly compressed) body
+    """
+    headers = dict(headers or {})
+    body = payload.body
+
+    if RESPONSE_CONFIG.enable_compression:
+        headers["Vary"] = "Accept-Encoding"
+        if len(body) >= RESPONSE_CONFIG.compression_min_bytes:
+            encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+            if encoding is not None:
+                body = payload.encoded(encoding)
+                headers["Content-Encoding"] = encoding
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def cache_validators(
+    request: Request, version: str, max_age: int
+) -> Tuple[Dict[str, str], bool]:
+    """
+    Build the caching headers of a response derived from a completed video's
+    results, and check the client's If-None-Match against them.
+
+    The ETag is weak: the identity, gzip and brotli bodies of one version are
+    semantically equal but not byte-equal, so they share a weak validator,
+    and Vary: Accept-Encoding (on the 200 and the 304) keeps shared caches
+    from serving one encoding to a client that asked for another.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        version: Version of the response content (used as weak ETag)
+        max_age: Cache lifetime in seconds
+
+    Returns:
+        Tuple of the ETag/Cache-Control/Vary headers and whether the client's
+        copy is current (respond with 304)
+    """
+    etag = f'W/"{version}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if RESPONSE_CONFIG.enable_compression:
+        headers["Vary"] = "Accept-Encoding"
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored
+    if_none_match = request.headers.get("if-none-match", "")
+    not_modified = if_none_match.strip() == "*" or etag[2:] in [
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    ]
+    return headers, not_modified
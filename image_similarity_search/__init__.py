@@ -2,6 +2,29 @@
 image_similarity_search package initialization.
 """
 
+from .catalog_metadata import CatalogMetadata
+from .query_cache import QueryCache, perceptual_hash
 from .similarity_search import ImageSimilaritySearch
+from .sharded_search import ShardedSimilaritySearch
+from .index_versions import (
+    HotSwapIndex,
+    RetiredIndexError,
+    new_version_path,
+    publish_version,
+    resolve_db_path,
+)
+from .merchant_catalogs import MerchantCatalogManager
 
-__all__ = ["ImageSimilaritySearch"]
+__all__ = [
+    "CatalogMetadata",
+    "HotSwapIndex",
+    "ImageSimilaritySearch",
+    "MerchantCatalogManager",
+    "QueryCache",
+    "RetiredIndexError",
+    "ShardedSimilaritySearch",
+    "new_version_path",
+    "perceptual_hash",
+    "publish_version",
+    "resolve_db_path",
+]
@@ -0,0 +1,102 @@
+"""
+Benchmark embedding models: per-image embedding latency against top-1 agreement.
+
+Each model embeds the catalog images and a set of query crops (by default the
+detection crops saved under data/uploads). Top-1 matches are compared with the
+first model, which serves as the reference (e.g. ViT-B/16 for offline builds
+against ViT-B/32 for real-time paths).
+
+Usage:
+    python -m image_similarity_search.benchmark_models
+        [--models openai/clip-vit-base-patch16 openai/clip-vit-base-patch32]
+        [--images data/image_db] [--queries "data/uploads/*/results/frames/crops/*.jpg"]
+"""
+
+import argparse
+import glob
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from config import SIMILARITY_SEARCH_CONFIG, logger
+from .similarity_search import ImageSimilaritySearch
+
+
+def embed_all(
+    search: ImageSimilaritySearch, image_paths: List[Path]
+) -> Tuple[np.ndarray, float]:
+    """
+    Embed images with the search instance's model.
+
+    Args:
+        search: Similarity search instance holding the model
+        image_paths: Images to embed
+
+    Returns:
+        Tuple of (embeddings array, mean milliseconds per image)
+    """
+    start = time.perf_counter()
+    embeddings = np.array([search._embed_image(path) for path in image_paths])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return embeddings.astype("float32"), elapsed_ms / len(image_paths)
+
+
+def main():
+    """Main function to benchmark embedding models."""
+    parser = argparse.ArgumentParser(
+        description="Compare embedding models on latency and top-1 agreement"
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=["openai/clip-vit-base-patch16", "openai/clip-vit-base-patch32"],
+        help="Model IDs; the first one is the reference",
+    )
+    parser.add_argument(
+        "--images", default=SIMILARITY_SEARCH_CONFIG.catalog_images_path
+    )
+    parser.add_argument(
+        "--queries", default="data/uploads/*/results/frames/crops/*.jpg"
+    )
+    args = parser.parse_args()
+
+    catalog_paths = sorted(
+        p
+        for p in Path(args.images).rglob("*")
+        if p.is_file() and p.suffix.lower() in ImageSimilaritySearch.IMAGE_EXTENSIONS
+    )
+    query_paths = [Path(p) for p in sorted(glob.glob(args.queries))]
+    if not catalog_paths or not query_paths:
+        logger.error("Need at least one catalog image and one query crop")
+        return
+
+    logger.info(
+        f"Benchmarking {len(args.models)} models on {len(catalog_paths)} catalog "
+        f"images and {len(query_paths)} query crops"
+    )
+
+    reference_top1 = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for model_name in args.models:
+            search = ImageSimilaritySearch(db_path=tmp_dir, model_name=model_name)
+            search._load_model()
+
+            catalog, _ = embed_all(search, catalog_paths)
+            queries, query_ms = embed_all(search, query_paths)
+            top1 = np.argmax(queries @ catalog.T, axis=1)
+
+            if reference_top1 is None:
+                reference_top1 = top1
+            agreement = float(np.mean(top1 == reference_top1))
+
+            logger.info(
+                f"{model_name:40s} {catalog.shape[1]:4d}-d  "
+                f"{query_ms:8.1f} ms/crop  top-1 agreement {agreement:.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark single-stage search against two-stage (coarse PCA + exact re-rank) search.
+
+Queries are sampled catalog embeddings with Gaussian noise added, standing in
+for detection crops of catalog products. Single-stage results are the reference
+for precision@1 and recall@k.
+
+Usage:
+    python -m image_similarity_search.benchmark_search [--db-path PATH]
+        [--queries 500] [--top-k 5] [--candidates 50 100 200] [--noise 0.05]
+"""
+
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from config import SIMILARITY_SEARCH_CONFIG, logger
+from .index_versions import resolve_db_path
+from .similarity_search import ImageSimilaritySearch
+
+
+def make_queries(
+    embeddings: np.ndarray, num_queries: int, noise: float, seed: int = 0
+) -> np.ndarray:
+    """
+    Sample catalog embeddings and perturb them into normalized query vectors.
+
+    Args:
+        embeddings: Catalog embeddings (num_images, dim)
+        num_queries: Number of queries to generate
+        noise: Standard deviation of the Gaussian perturbation
+        seed: Random seed
+
+    Returns:
+        np.ndarray: Float32 queries (num_queries, dim)
+    """
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(embeddings), num_queries, replace=True)
+    queries = np.asarray(embeddings[sample], dtype="float32")
+    queries = queries + rng.normal(0, noise, queries.shape).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def run_queries(
+    search: ImageSimilaritySearch, queries: np.ndarray, top_k: int
+) -> Tuple[List[List[int]], float]:
+    """
+    Run every query through the search and time it.
+
+    Args:
+        search: Loaded similarity search
+        queries: Query embeddings (num_queries, dim)
+        top_k: Number of results per query
+
+    Returns:
+        Tuple of (result ids per query, queries per second)
+    """
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        matches = search._search_embedding(
+            query.reshape(1, -1), top_k, None, None, None
+        )
+        results.append([idx for idx, _ in matches])
+    elapsed = time.perf_counter() - start
+    return results, len(queries) / elapsed
+
+
+def compare(reference: List[List[int]], results: List[List[int]]) -> Dict[str, float]:
+    """
+    Compare results against reference results.
+
+    Args:
+        reference: Reference result ids per query
+        results: Result ids per query
+
+    Returns:
+        dict: precision@1 agreement and recall@k against the reference
+    """
+    top1 = np.mean(
+        [
+            bool(ref) and bool(res) and ref[0] == res[0]
+            for ref, res in zip(reference, results)
+        ]
+    )
+    recall = np.mean(
+        [
+            len(set(ref) & set(res)) / len(ref) if ref else 1.0
+            for ref, res in zip(reference, results)
+        ]
+    )
+    return {"precision@1": float(top1), "recall@k": float(recall)}
+
+
+def main():
+    """Main function to benchmark two-stage search."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark single-stage vs two-stage similarity search"
+    )
+    parser.add_argument(
+        "--db-path",
+        default=SIMILARITY_SEARCH_CONFIG.catalog_db_path,
+        help="Database built with a coarse index (coarse_dimension > 0)",
+    )
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--noise", type=float, default=0.05)
+    args = parser.parse_args()
+
+    search = ImageSimilaritySearch(
+        db_path=resolve_db_path(args.db_path), coarse_candidates=max(args.candidates)
+    )
+    search._load_database()
+    if search.coarse_index is None or search.full_embeddings is None:
+        logger.error(
+            f"No coarse index or raw embeddings in {args.db_path}. "
+            "Rebuild the database with coarse_dimension > 0."
+        )
+        return
+
+    queries = make_queries(search.full_embeddings, args.queries, args.noise)
+    logger.info(
+        f"Benchmarking {args.queries} queries against {search.index.ntotal} vectors "
+        f"({search.index.d}-d full, {search.coarse_index.d}-d coarse)"
+    )
+
+    search.coarse_candidates = 0
+    reference, baseline_qps = run_queries(search, queries, args.top_k)
+    logger.info(f"single-stage: {baseline_qps:10.1f} qps")
+
+    for candidates in args.candidates:
+        search.coarse_candidates = candidates
+        results, qps = run_queries(search, queries, args.top_k)
+        metrics = compare(reference, results)
+        logger.info(
+            f"two-stage N={candidates:<5d}: {qps:10.1f} qps "
+            f"({qps / baseline_qps:.2f}x), "
+            f"precision@1 {metrics['precision@1']:.3f}, "
+            f"recall@{args.top_k} {metrics['recall@k']:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
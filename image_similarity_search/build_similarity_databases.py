@@ -1,24 +1,228 @@
 """
-Utility script to build separate image similarity databases for clothing and jewelry.
+Utility script to build image similarity databases for the product catalog.
 
-This script builds two independent FAISS-based similarity search databases:
+By default this builds one unified FAISS-based catalog database covering every
+category folder under the catalog images path (clothing, jewelry, shoes, ...),
+with per-vector category, label and merchant metadata used to filter searches.
+
+The legacy per-category databases can still be built separately:
 1. Clothing database - for fashion items (shirts, pants, shoes, etc.)
 2. Jewelry database - for jewelry items (necklaces, rings, earrings, etc.)
 
 Usage:
-    python build_similarity_databases.py [--clothing-only | --jewelry-only]
-
-    Without flags: Builds both databases
+    python build_similarity_databases.py [--legacy | --clothing-only | --jewelry-only]
+                                         [--shards N] [--index-type TYPE]
+                                         [--model MODEL_ID]
+    python build_similarity_databases.py --merchant ID --merchant-images DIR
+
+    Without flags: Builds the unified catalog database
+    --shards N: Also splits the unified catalog into N shard databases
+    --index-type TYPE: Index storage (flat, fp16, int8, pq); defaults to config
+    --model MODEL_ID: Embedding model for every database built; defaults to config
+    --legacy: Builds both per-category databases
     --clothing-only: Builds only the clothing database
     --jewelry-only: Builds only the jewelry database
+    --merchant ID: Builds only the catalog of one merchant, from --merchant-images
+
+Every build is written to a new version directory under the database path and
+published atomically once complete, so a running server picks it up with a hot
+reload instead of a restart.
 """
 
 import argparse
+import shutil
 import sys
+from contextlib import contextmanager
 from pathlib import Path
-
-from config import SIMILARITY_SEARCH_CONFIG, logger
+from typing import Callable, Iterator, Optional, Union
+
+from config import (
+    MERCHANT_CATALOG_CONFIG,
+    SIMILARITY_SEARCH_CONFIG,
+    SHARDED_SEARCH_CONFIG,
+    logger,
+)
+from .index_versions import new_version_path, publish_version, resolve_db_path
+from .merchant_catalogs import MerchantCatalogManager
 from .similarity_search import ImageSimilaritySearch
+from .sharded_search import ShardedSimilaritySearch
+
+
+def _create_builder(
+    db_path: Path, model_name: Optional[str] = None
+) -> ImageSimilaritySearch:
+    """
+    Create a similarity search instance configured for building a database.
+
+    Args:
+        db_path: Directory the database is written to
+        model_name: Embedding model (None = ImageSimilaritySearch.DEFAULT_MODEL)
+
+    Returns:
+        ImageSimilaritySearch: Instance using the configured model and index storage
+    """
+    return ImageSimilaritySearch(
+        db_path=db_path,
+        model_name=model_name,
+        index_type=SIMILARITY_SEARCH_CONFIG.index_type,
+        rerank_factor=SIMILARITY_SEARCH_CONFIG.rerank_factor,
+        pq_subquantizers=SIMILARITY_SEARCH_CONFIG.pq_subquantizers,
+        dedupe_threshold=SIMILARITY_SEARCH_CONFIG.dedupe_threshold,
+        coarse_dimension=SIMILARITY_SEARCH_CONFIG.coarse_dimension,
+    )
+
+
+@contextmanager
+def _build_version(
+    root: Union[str, Path],
+    database_exists: Callable[[Path], bool] = ImageSimilaritySearch.database_exists,
+) -> Iterator[Path]:
+    """
+    Yield a new version directory to build into, and publish it once the block
+    completes with a database in it. A failed or empty build is deleted
+    instead, so it never replaces the active version.
+
+    Args:
+        root: Database root directory
+        database_exists: Checks the built version directory on disk
+
+    Raises:
+        RuntimeError: If the block completed without building a database
+    """
+    version_path = new_version_path(root)
+    try:
+        yield version_path
+        if not database_exists(version_path):
+            raise RuntimeError(f"No database was built in {version_path}")
+    except BaseException:
+        shutil.rmtree(version_path, ignore_errors=True)
+        logger.warning(f"Deleted abandoned version directory {version_path}")
+        raise
+    publish_version(version_path)
+
+
+def build_catalog_database() -> bool:
+    """
+    Build the unified catalog similarity database.
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        logger.info("=" * 60)
+        logger.info("Building unified CATALOG similarity database")
+        logger.info("=" * 60)
+
+        catalog_images_dir = Path(SIMILARITY_SEARCH_CONFIG.catalog_images_path)
+        catalog_db_path = Path(SIMILARITY_SEARCH_CONFIG.catalog_db_path)
+
+        # Check if images directory exists
+        if not catalog_images_dir.exists():
+            logger.error(
+                f"Catalog images directory does not exist: {catalog_images_dir}"
+            )
+            logger.info(
+                f"Please create one folder per category under: {catalog_images_dir}"
+            )
+            return False
+
+        category_dirs = sorted(p for p in catalog_images_dir.iterdir() if p.is_dir())
+        if not category_dirs:
+            logger.warning(f"No category folders found in {catalog_images_dir}")
+            return False
+
+        logger.info(
+            f"Found categories: {', '.join(p.name for p in category_dirs)} "
+            f"in {catalog_images_dir}"
+        )
+
+        # Build into a new version directory, published once complete
+        with _build_version(catalog_db_path) as version_path:
+            similarity_search = _create_builder(
+                version_path, SIMILARITY_SEARCH_CONFIG.catalog_model_name
+            )
+            similarity_search.build_database(catalog_images_dir)
+
+        logger.info("✓ Catalog database built successfully!")
+        logger.info(f"Database saved to: {version_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error building catalog database: {e}", exc_info=True)
+        return False
+
+
+def build_catalog_shards(num_shards: int) -> bool:
+    """
+    Split the unified catalog database into shard databases.
+
+    Args:
+        num_shards: Number of shards to create
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        logger.info("=" * 60)
+        logger.info(f"Splitting CATALOG database into {num_shards} shards")
+        logger.info("=" * 60)
+
+        with _build_version(
+            SHARDED_SEARCH_CONFIG.shards_path,
+            ShardedSimilaritySearch.database_exists,
+        ) as version_path:
+            ShardedSimilaritySearch.build_shards(
+                resolve_db_path(SIMILARITY_SEARCH_CONFIG.catalog_db_path),
+                version_path,
+                num_shards,
+                index_type=SIMILARITY_SEARCH_CONFIG.index_type,
+                coarse_dimension=SIMILARITY_SEARCH_CONFIG.coarse_dimension,
+            )
+
+        logger.info("✓ Catalog shards built successfully!")
+        logger.info(f"Shards saved to: {version_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error building catalog shards: {e}", exc_info=True)
+        return False
+
+
+def build_merchant_database(merchant_id: str, images_dir: Path) -> bool:
+    """
+    Build the catalog similarity database of one merchant.
+
+    Args:
+        merchant_id: Merchant identifier (the database directory name)
+        images_dir: Merchant images, one folder per category
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        logger.info("=" * 60)
+        logger.info(f"Building catalog for MERCHANT {merchant_id}")
+        logger.info("=" * 60)
+
+        MerchantCatalogManager.validate_merchant_id(merchant_id)
+        if not images_dir.exists():
+            logger.error(f"Merchant images directory does not exist: {images_dir}")
+            return False
+
+        merchant_db_path = Path(MERCHANT_CATALOG_CONFIG.merchants_path) / merchant_id
+        with _build_version(merchant_db_path) as version_path:
+            similarity_search = _create_builder(
+                version_path, MERCHANT_CATALOG_CONFIG.model_name
+            )
+            similarity_search.build_database(images_dir, merchant=merchant_id)
+
+        logger.info(f"✓ Merchant {merchant_id} database built successfully!")
+        logger.info(f"Database saved to: {version_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error building merchant database: {e}", exc_info=True)
+        return False
 
 
 def build_clothing_database() -> bool:
@@ -57,15 +261,15 @@ def build_clothing_database() -> bool:
 
         logger.info(f"Found {len(image_files)} images in {clothing_images_dir}")
 
-        # Create database directory if it doesn't exist
-        clothing_db_path.mkdir(parents=True, exist_ok=True)
-
-        # Initialize and build database
-        similarity_search = ImageSimilaritySearch(db_path=clothing_db_path)
-        similarity_search.build_database(clothing_images_dir)
+        # Build into a new version directory, published once complete
+        with _build_version(clothing_db_path) as version_path:
+            similarity_search = _create_builder(
+                version_path, SIMILARITY_SEARCH_CONFIG.clothing_model_name
+            )
+            similarity_search.build_database(clothing_images_dir, category="clothing")
 
         logger.info("✓ Clothing database built successfully!")
-        logger.info(f"Database saved to: {clothing_db_path}")
+        logger.info(f"Database saved to: {version_path}")
         return True
 
     except Exception as e:
@@ -109,15 +313,15 @@ def build_jewelry_database() -> bool:
 
         logger.info(f"Found {len(image_files)} images in {jewelry_images_dir}")
 
-        # Create database directory if it doesn't exist
-        jewelry_db_path.mkdir(parents=True, exist_ok=True)
-
-        # Initialize and build database
-        similarity_search = ImageSimilaritySearch(db_path=jewelry_db_path)
-        similarity_search.build_database(jewelry_images_dir)
+        # Build into a new version directory, published once complete
+        with _build_version(jewelry_db_path) as version_path:
+            similarity_search = _create_builder(
+                version_path, SIMILARITY_SEARCH_CONFIG.jewelry_model_name
+            )
+            similarity_search.build_database(jewelry_images_dir, category="jewelry")
 
         logger.info("✓ Jewelry database built successfully!")
-        logger.info(f"Database saved to: {jewelry_db_path}")
+        logger.info(f"Database saved to: {version_path}")
         return True
 
     except Exception as e:
@@ -128,7 +332,12 @@ def build_jewelry_database() -> bool:
 def main():
     """Main function to build similarity databases."""
     parser = argparse.ArgumentParser(
-        description="Build image similarity databases for clothing and jewelry"
+        description="Build image similarity databases for the product catalog"
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="Build the separate clothing and jewelry databases",
     )
     parser.add_argument(
         "--clothing-only",
@@ -141,19 +350,76 @@ def main():
         help="Build only the jewelry database",
     )
 
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Split the unified catalog into N shard databases",
+    )
+
+    parser.add_argument(
+        "--index-type",
+        choices=ImageSimilaritySearch.INDEX_TYPES,
+        help="Index storage: float32 flat, fp16/int8 scalar quantizer or PQ",
+    )
+
+    parser.add_argument(
+        "--model",
+        help="Hugging Face CLIP model ID used to embed the catalog",
+    )
+
+    parser.add_argument(
+        "--merchant",
+        metavar="ID",
+        help="Build only the catalog of this merchant",
+    )
+    parser.add_argument(
+        "--merchant-images",
+        metavar="DIR",
+        help="Merchant images directory, one folder per category",
+    )
+
     args = parser.parse_args()
+    if args.merchant and not args.merchant_images:
+        parser.error("--merchant requires --merchant-images")
+    if args.index_type:
+        SIMILARITY_SEARCH_CONFIG.index_type = args.index_type
+    if args.model:
+        SIMILARITY_SEARCH_CONFIG.catalog_model_name = args.model
+        SIMILARITY_SEARCH_CONFIG.clothing_model_name = args.model
+        SIMILARITY_SEARCH_CONFIG.jewelry_model_name = args.model
+        MERCHANT_CATALOG_CONFIG.model_name = args.model
+
+    if args.merchant:
+        if not build_merchant_database(args.merchant, Path(args.merchant_images)):
+            sys.exit(1)
+        return
 
     # Determine which databases to build
-    build_clothing = not args.jewelry_only
-    build_jewelry = not args.clothing_only
+    legacy = args.legacy or args.clothing_only or args.jewelry_only
+    build_catalog = not legacy
+    build_clothing = legacy and not args.jewelry_only
+    build_jewelry = legacy and not args.clothing_only
 
     success = True
 
     logger.info("Starting database build process...")
-    logger.info(f"Clothing database: {SIMILARITY_SEARCH_CONFIG.clothing_db_path}")
-    logger.info(f"Jewelry database: {SIMILARITY_SEARCH_CONFIG.jewelry_db_path}")
+    if build_catalog:
+        logger.info(f"Catalog database: {SIMILARITY_SEARCH_CONFIG.catalog_db_path}")
+    else:
+        logger.info(f"Clothing database: {SIMILARITY_SEARCH_CONFIG.clothing_db_path}")
+        logger.info(f"Jewelry database: {SIMILARITY_SEARCH_CONFIG.jewelry_db_path}")
     logger.info("")
 
+    # Build unified catalog database
+    if build_catalog:
+        if not build_catalog_database():
+            success = False
+        elif args.shards > 0 and not build_catalog_shards(args.shards):
+            success = False
+        logger.info("")
+
     # Build clothing database
     if build_clothing:
         if not build_clothing_database():
@@ -0,0 +1,299 @@
+"""
+A compact, array-backed metadata table for catalog entries, aligned with FAISS ids.
+"""
+
+import csv
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+def _pack_strings(values: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Packs strings into one UTF-8 byte blob plus an offsets array.
+
+    Args:
+        values (Iterable[str]): The strings to pack.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The uint8 blob and the int64 offsets (n + 1 entries).
+    """
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="int64")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype="uint8")
+    return blob, offsets
+
+
+def _encode_categorical(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dictionary-encodes a string column.
+
+    Args:
+        values (List[str]): The column values.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The int32 codes and the vocabulary array.
+    """
+    vocab, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return codes.astype("int32"), vocab
+
+
+class CatalogMetadata:
+    """
+    Columnar product metadata for a similarity database.
+
+    Row ``i`` describes FAISS id ``i``. Categorical columns (category, label,
+    merchant) are dictionary-encoded; free-text columns (path, title, url) are
+    stored as one UTF-8 blob with offsets. Everything is saved to a single
+    uncompressed ``.npz`` file that loads without unpickling.
+    """
+
+    METADATA_FILE = "catalog_metadata.npz"
+    PRODUCTS_FILE = "products.csv"
+
+    CATEGORICAL_COLUMNS = ("category", "label", "merchant")
+    STRING_COLUMNS = ("path", "title", "url")
+
+    UNKNOWN_PRODUCT_ID = -1
+    UNKNOWN_STOCK = -1
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        Initializes the CatalogMetadata instance from its column arrays.
+
+        Args:
+            arrays (Dict[str, np.ndarray]): Column arrays as produced by ``from_records`` or ``load``.
+        """
+        self._arrays = arrays
+        self.product_ids: np.ndarray = arrays["product_id"]
+        self.prices: np.ndarray = arrays["price"]
+        self.stock: np.ndarray = arrays["stock"]
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "CatalogMetadata":
+        """
+        Builds the table from per-image record dictionaries.
+
+        Args:
+            records (List[Dict]): One dict per FAISS id with keys path, category, label,
+                merchant and optionally product_id, title, url, price, stock. Entries
+                without a catalog product_id keep it unknown rather than taking the
+                FAISS row, which changes between builds and repeats across databases.
+
+        Returns:
+            CatalogMetadata: The packed table.
+        """
+        arrays: Dict[str, np.ndarray] = {
+            "product_id": np.array(
+                [
+                    cls.UNKNOWN_PRODUCT_ID
+                    if r.get("product_id") is None
+                    else r["product_id"]
+                    for r in records
+                ],
+                dtype="int64",
+            ),
+            "price": np.array(
+                [r.get("price", np.nan) for r in records], dtype="float32"
+            ),
+            "stock": np.array(
+                [r.get("stock", cls.UNKNOWN_STOCK) for r in records], dtype="int32"
+            ),
+        }
+        for column in cls.CATEGORICAL_COLUMNS:
+            codes, vocab = _encode_categorical([r.get(column, "") for r in records])
+            arrays[f"{column}_codes"] = codes
+            arrays[f"{column}_vocab"] = vocab
+        for column in cls.STRING_COLUMNS:
+            blob, offsets = _pack_strings(r.get(column, "") for r in records)
+            arrays[f"{column}_blob"] = blob
+            arrays[f"{column}_offsets"] = offsets
+        return cls(arrays)
+
+    @classmethod
+    def from_legacy_paths(
+        cls, image_paths: List[Path], category: str = ""
+    ) -> "CatalogMetadata":
+        """
+        Builds the table for a database that only stored pickled image paths.
+
+        Args:
+            image_paths (List[Path]): Image paths aligned with FAISS ids.
+            category (str): Category assigned to every entry.
+
+        Returns:
+            CatalogMetadata: The packed table.
+        """
+        return cls.from_records(
+            [{"path": str(path), "category": category} for path in image_paths]
+        )
+
+    @classmethod
+    def load_product_info(cls, images_dir: Path) -> Dict[str, Dict]:
+        """
+        Reads optional product details from ``products.csv`` in the images directory.
+
+        The CSV has a ``path`` column (relative to the images directory) and any of
+        ``product_id``, ``title``, ``url``, ``price`` and ``stock``.
+
+        Args:
+            images_dir (Path): The images directory the database is built from.
+
+        Returns:
+            Dict[str, Dict]: Product fields keyed by relative image path.
+        """
+        products_path = images_dir / cls.PRODUCTS_FILE
+        if not products_path.exists():
+            return {}
+
+        converters = {"product_id": int, "price": float, "stock": int}
+        products = {}
+        with open(products_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                path = row.pop("path", None)
+                if not path:
+                    continue
+                products[Path(path).as_posix()] = {
+                    key: converters.get(key, str)(value)
+                    for key, value in row.items()
+                    if value not in (None, "")
+                }
+        logger.info(f"Loaded product details for {len(products)} images")
+        return products
+
+    def save(self, path: Union[str, Path]):
+        """
+        Saves the table as an uncompressed .npz file.
+
+        Args:
+            path (Union[str, Path]): Destination file.
+        """
+        with open(path, "wb") as f:
+            np.savez(f, **self._arrays)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CatalogMetadata":
+        """
+        Loads a table saved with ``save``.
+
+        Args:
+            path (Union[str, Path]): The .npz file.
+
+        Returns:
+            CatalogMetadata: The loaded table.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def subset(self, ids: np.ndarray) -> "CatalogMetadata":
+        """
+        Returns the rows of the given FAISS ids as a new table, in that order.
+
+        Categorical vocabularies are kept whole, so a value that exists in this
+        table but not in the subset matches no rows rather than being unknown.
+
+        Args:
+            ids (np.ndarray): int64 FAISS ids.
+
+        Returns:
+            CatalogMetadata: The row subset.
+        """
+        arrays: Dict[str, np.ndarray] = {
+            "product_id": self.product_ids[ids],
+            "price": self.prices[ids],
+            "stock": self.stock[ids],
+        }
+        for column in self.CATEGORICAL_COLUMNS:
+            arrays[f"{column}_codes"] = self.codes(column)[ids]
+            arrays[f"{column}_vocab"] = self._arrays[f"{column}_vocab"]
+        for column in self.STRING_COLUMNS:
+            offsets = self._arrays[f"{column}_offsets"]
+            starts = offsets[ids]
+            lengths = offsets[ids + 1] - starts
+            new_offsets = np.zeros(len(ids) + 1, dtype="int64")
+            np.cumsum(lengths, out=new_offsets[1:])
+            # Byte positions of every selected string, concatenated in order
+            positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(
+                new_offsets[-1]
+            )
+            arrays[f"{column}_blob"] = self._arrays[f"{column}_blob"][positions]
+            arrays[f"{column}_offsets"] = new_offsets
+        return CatalogMetadata(arrays)
+
+    def codes(self, column: str) -> np.ndarray:
+        """Returns the int32 code array of a categorical column."""
+        return self._arrays[f"{column}_codes"]
+
+    def vocab(self, column: str) -> List[str]:
+        """Returns the distinct values of a categorical column."""
+        return [str(value) for value in self._arrays[f"{column}_vocab"]]
+
+    def ids_where(self, column: str, value: str) -> Optional[np.ndarray]:
+        """
+        Returns the FAISS ids whose categorical column equals value.
+
+        Args:
+            column (str): One of category, label or merchant.
+            value (str): The value to match.
+
+        Returns:
+            Optional[np.ndarray]: Sorted int64 ids, or None if the value is not in the table.
+        """
+        vocab = self._arrays[f"{column}_vocab"]
+        position = np.searchsorted(vocab, value)
+        if position >= len(vocab) or vocab[position] != value:
+            return None
+        return np.flatnonzero(self.codes(column) == position).astype("int64")
+
+    def _string(self, column: str, idx: int) -> str:
+        offsets = self._arrays[f"{column}_offsets"]
+        blob = self._arrays[f"{column}_blob"]
+        return blob[offsets[idx] : offsets[idx + 1]].tobytes().decode("utf-8")
+
+    def _categorical(self, column: str, idx: int) -> str:
+        return str(self._arrays[f"{column}_vocab"][self.codes(column)[idx]])
+
+    def path(self, idx: int) -> str:
+        """Returns the image path of a FAISS id."""
+        return self._string("path", idx)
+
+    def record(self, idx: int) -> Dict:
+        """
+        Returns the full product record of a FAISS id.
+
+        Args:
+            idx (int): The FAISS id.
+
+        Returns:
+            Dict: product_id, category, label, merchant, path, title, url,
+                  price and stock (each of product_id, price and stock is None if
+                  unknown).
+        """
+        product_id = int(self.product_ids[idx])
+        price = float(self.prices[idx])
+        stock = int(self.stock[idx])
+        record = {
+            "product_id": (
+                None if product_id == self.UNKNOWN_PRODUCT_ID else product_id
+            ),
+            "price": None if np.isnan(price) else price,
+            "stock": None if stock == self.UNKNOWN_STOCK else stock,
+        }
+        for column in self.CATEGORICAL_COLUMNS:
+            record[column] = self._categorical(column, idx)
+        for column in self.STRING_COLUMNS:
+            record[column] = self._string(column, idx)
+        return record
+
+    def memory_bytes(self) -> int:
+        """Returns the total size of the column arrays in bytes."""
+        return sum(array.nbytes for array in self._arrays.values())
@@ -0,0 +1,307 @@
+"""
+Versioned similarity database directories with an atomic "current" pointer, and a
+hot-swappable handle that reloads a new version in the background.
+
+Layout::
+
+    <root>/CURRENT              -> name of the active version
+    <root>/versions/<version>/  -> one complete database per build
+
+Databases built before versioning (files directly in <root>) are used as-is
+until a first versioned build is published.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+from transformers import CLIPModel, CLIPProcessor  # type: ignore
+
+from .similarity_search import ImageSimilaritySearch
+
+
+logger = logging.getLogger(__name__)
+
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def current_version(root: Union[str, Path]) -> Optional[str]:
+    """
+    Returns the active version name, or None for an unversioned database.
+
+    Args:
+        root (Union[str, Path]): Database root directory.
+    """
+    pointer = Path(root) / CURRENT_FILE
+    if not pointer.exists():
+        return None
+    return pointer.read_text().strip() or None
+
+
+def resolve_db_path(root: Union[str, Path]) -> Path:
+    """
+    Returns the directory holding the active database files.
+
+    Args:
+        root (Union[str, Path]): Database root directory.
+    """
+    version = current_version(root)
+    if version is None:
+        return Path(root)
+    return Path(root) / VERSIONS_DIR / version
+
+
+def new_version_path(root: Union[str, Path]) -> Path:
+    """
+    Creates and returns an empty directory for a new database version.
+
+    Args:
+        root (Union[str, Path]): Database root directory.
+    """
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = Path(root) / VERSIONS_DIR / version
+    path.mkdir(parents=True, exist_ok=False)
+    return path
+
+
+def publish_version(version_path: Union[str, Path]):
+    """
+    Atomically points the database root at a fully built version.
+
+    Args:
+        version_path (Union[str, Path]): A directory created by ``new_version_path``.
+    """
+    version_path = Path(version_path)
+    root = version_path.parent.parent
+    tmp_pointer = root / f"{CURRENT_FILE}.tmp"
+    tmp_pointer.write_text(version_path.name)
+    os.replace(tmp_pointer, root / CURRENT_FILE)
+    logger.info(f"Published database version {version_path.name} in {root}")
+
+
+class RetiredIndexError(RuntimeError):
+    """Raised when acquiring a HotSwapIndex that has been retired."""
+
+
+class _Lease:
+    """An index instance plus the number of searches currently using it."""
+
+    def __init__(self, search: ImageSimilaritySearch, version: Optional[str]):
+        self.search = search
+        self.version = version
+        self.in_flight = 0
+        self.retired = False
+
+
+class HotSwapIndex:
+    """
+    Holds the active ImageSimilaritySearch of a versioned database and swaps in
+    new versions without blocking searches.
+
+    A new version is fully loaded (index, metadata and model) before the swap.
+    Searches that started on the previous version finish on it; it is released
+    once the last of them completes.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        factory: Callable[[Path], ImageSimilaritySearch],
+        poll_seconds: float = 0.0,
+        model_source: Optional[
+            Callable[[str], Optional[Tuple[CLIPModel, CLIPProcessor]]]
+        ] = None,
+        database_exists: Callable[
+            [Path], bool
+        ] = ImageSimilaritySearch.database_exists,
+    ):
+        """
+        Initializes the HotSwapIndex instance.
+
+        Args:
+            root (Union[str, Path]): Database root directory.
+            factory (Callable[[Path], ImageSimilaritySearch]): Creates a search
+                instance for a database directory.
+            poll_seconds (float): Interval for watching the CURRENT pointer (0 disables).
+            model_source (Optional[Callable[[str], Optional[Tuple[CLIPModel, CLIPProcessor]]]]):
+                Returns an already loaded model and processor by model name, used on
+                first load so several indexes share one model.
+            database_exists (Callable[[Path], bool]): Checks a database directory on
+                disk without side effects (the ``database_exists`` classmethod of
+                the class the factory creates).
+        """
+        self.root = Path(root)
+        self.factory = factory
+        self.poll_seconds = poll_seconds
+        self.model_source = model_source
+        self.database_exists = database_exists
+
+        self._lease: Optional[_Lease] = None
+        self._retired = False
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.last_reload_error: Optional[str] = None
+
+    def is_built(self) -> bool:
+        """
+        Check whether the active version exists on disk. Only files are checked:
+        the factory is not called, since creating an instance can have side
+        effects (directories, shard port allocation).
+        """
+        return self.database_exists(resolve_db_path(self.root))
+
+    @contextmanager
+    def acquire(self) -> Iterator[ImageSimilaritySearch]:
+        """
+        Yields the active search instance, keeping it alive until the block exits.
+        Loads the active version on first use.
+
+        Raises:
+            RetiredIndexError: If the index has been retired (see ``retire``).
+        """
+        while True:
+            with self._lock:
+                if self._retired:
+                    raise RetiredIndexError(f"Index {self.root} has been retired")
+                lease = self._lease
+                if lease is not None:
+                    lease.in_flight += 1
+                    break
+            self.reload()
+        try:
+            yield lease.search
+        finally:
+            with self._lock:
+                lease.in_flight -= 1
+                release = lease.retired and lease.in_flight == 0
+            if release:
+                self._release(lease)
+
+    def reload(self, background: bool = False) -> bool:
+        """
+        Loads the active version and swaps it in if it differs from the loaded one.
+
+        Args:
+            background (bool): Run the load in a daemon thread and return immediately.
+
+        Returns:
+            bool: True if a swap happened (always False for background reloads).
+        """
+        if background:
+            threading.Thread(target=self.reload, daemon=True).start()
+            return False
+
+        with self._reload_lock:
+            if self._retired:
+                return False
+            version = current_version(self.root)
+            if self._lease is not None and self._lease.version == version:
+                return False
+
+            start = time.perf_counter()
+            try:
+                search = self.factory(resolve_db_path(self.root))
+                search._load_database()
+                previous = self._lease.search if self._lease else None
+                if previous is not None:
+                    search.share_model(previous)
+                elif self.model_source is not None:
+                    shared = self.model_source(search.model_name)
+                    if shared is not None:
+                        search.use_model(*shared)
+                search._load_model()
+            except Exception as e:
+                self.last_reload_error = str(e)
+                logger.error(f"Failed to load {self.root} version {version}: {e}")
+                if self._lease is None:
+                    raise
+                return False
+
+            with self._lock:
+                retired = self._retired
+                old_lease = self._lease
+                release = False
+                if not retired:
+                    self._lease = _Lease(search, version)
+                    if old_lease is not None:
+                        old_lease.retired = True
+                        release = old_lease.in_flight == 0
+            if retired:
+                # Retired while loading: the new version is never used
+                self._release(_Lease(search, version))
+                return False
+            if release:
+                self._release(old_lease)
+
+            self.reloads += 1
+            self.last_reload_error = None
+            logger.info(
+                f"Loaded {self.root} version {version or '(unversioned)'} "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            return True
+
+    def retire(self):
+        """
+        Drops the loaded version for good, releasing it once the searches using
+        it finish. Later ``acquire`` calls raise RetiredIndexError instead of
+        loading the database again outside of whoever retired it.
+        """
+        with self._lock:
+            self._retired = True
+            lease = self._lease
+            if lease is None:
+                return
+            self._lease = None
+            lease.retired = True
+            release = lease.in_flight == 0
+        if release:
+            self._release(lease)
+
+    def _release(self, lease: _Lease):
+        """Releases a retired version once no search uses it."""
+        close = getattr(lease.search, "close", None)
+        if close is not None:
+            close()
+        logger.info(f"Released {self.root} version {lease.version or '(unversioned)'}")
+
+    def start_watcher(self):
+        """Starts a daemon thread that reloads when the CURRENT pointer changes."""
+        if self.poll_seconds <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.poll_seconds)
+                if self._lease is None:
+                    continue
+                if current_version(self.root) != self._lease.version:
+                    self.reload()
+
+        self._watcher = threading.Thread(target=watch, daemon=True)
+        self._watcher.start()
+
+    @property
+    def search(self) -> Optional[ImageSimilaritySearch]:
+        """The active search instance, if loaded (for inspection, not searching)."""
+        return self._lease.search if self._lease else None
+
+    def status(self) -> Dict:
+        """Returns the loaded and published versions and reload counters."""
+        return {
+            "root": str(self.root),
+            "loaded_version": self._lease.version if self._lease else None,
+            "published_version": current_version(self.root),
+            "in_flight": self._lease.in_flight if self._lease else 0,
+            "reloads": self.reloads,
+            "last_reload_error": self.last_reload_error,
+        }
@@ -0,0 +1,245 @@
+"""
+Per-merchant catalog databases, loaded on first use and kept in a
+memory-budgeted LRU.
+
+Layout::
+
+    <root>/<merchant_id>/           -> a versioned database root (see index_versions)
+
+Only the indexes and metadata tables are per merchant; every resident catalog
+embedding with the same model shares one loaded model.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+from transformers import CLIPModel, CLIPProcessor  # type: ignore
+
+from .index_versions import HotSwapIndex, RetiredIndexError, resolve_db_path
+from .similarity_search import ImageSimilaritySearch
+
+
+logger = logging.getLogger(__name__)
+
+
+class _ResidentCatalog:
+    """A loaded merchant catalog and its estimated resident size."""
+
+    def __init__(self, index: HotSwapIndex, memory_bytes: int):
+        self.index = index
+        self.memory_bytes = memory_bytes
+
+
+class MerchantCatalogManager:
+    """
+    Loads merchant catalogs on demand and evicts the least recently used ones
+    when the resident indexes and metadata exceed a memory budget.
+
+    A catalog in use by a search is never released mid-search: eviction retires
+    its index, which is released once the searches on it finish.
+    """
+
+    MERCHANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        factory: Callable[[Path], ImageSimilaritySearch],
+        memory_budget_bytes: int,
+        max_resident: int = 0,
+        database_exists: Callable[
+            [Path], bool
+        ] = ImageSimilaritySearch.database_exists,
+    ):
+        """
+        Initializes the MerchantCatalogManager instance.
+
+        Args:
+            root (Union[str, Path]): Directory holding one database root per merchant.
+            factory (Callable[[Path], ImageSimilaritySearch]): Creates a search
+                instance for a database directory.
+            memory_budget_bytes (int): Resident size above which catalogs are evicted.
+            max_resident (int): Maximum number of resident catalogs (0 = no limit).
+            database_exists (Callable[[Path], bool]): Checks a database directory on
+                disk without side effects.
+        """
+        self.root = Path(root)
+        self.factory = factory
+        self.memory_budget_bytes = memory_budget_bytes
+        self.max_resident = max_resident
+        self.database_exists = database_exists
+
+        self._resident: "OrderedDict[str, _ResidentCatalog]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        # Loaded (model, processor) per model name, shared by resident catalogs
+        self._models: Dict[str, Tuple[CLIPModel, CLIPProcessor]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds: deque = deque(maxlen=1000)
+
+    @classmethod
+    def validate_merchant_id(cls, merchant_id: str):
+        """
+        Raises ValueError unless merchant_id is safe to use as a directory name.
+
+        Args:
+            merchant_id (str): The merchant ID.
+        """
+        if not cls.MERCHANT_ID_PATTERN.match(merchant_id):
+            raise ValueError(f"Invalid merchant ID: {merchant_id!r}")
+
+    def catalog_root(self, merchant_id: str) -> Path:
+        """Returns the database root of a merchant's catalog."""
+        self.validate_merchant_id(merchant_id)
+        return self.root / merchant_id
+
+    def has_catalog(self, merchant_id: str) -> bool:
+        """
+        Check whether a merchant's catalog has been built. Only files are checked,
+        so unknown merchants leave nothing behind on disk.
+        """
+        return self.database_exists(resolve_db_path(self.catalog_root(merchant_id)))
+
+    def merchants(self) -> List[str]:
+        """Returns the IDs of all merchants with a catalog directory."""
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    @contextmanager
+    def acquire(self, merchant_id: str) -> Iterator[ImageSimilaritySearch]:
+        """
+        Yields the search instance of a merchant's catalog, loading it on a miss.
+
+        Args:
+            merchant_id (str): The merchant ID.
+
+        Raises:
+            FileNotFoundError: If the merchant has no catalog.
+        """
+        while True:
+            index = self._get(merchant_id)
+            with ExitStack() as stack:
+                try:
+                    search = stack.enter_context(index.acquire())
+                except RetiredIndexError:
+                    # Evicted between lookup and acquire: load it again through
+                    # the LRU so its memory is accounted for
+                    continue
+                yield search
+                return
+
+    def _get(self, merchant_id: str) -> HotSwapIndex:
+        """Returns the resident catalog of a merchant, loading it if needed."""
+        with self._lock:
+            resident = self._resident.get(merchant_id)
+            if resident is not None:
+                self._resident.move_to_end(merchant_id)
+                self.hits += 1
+                return resident.index
+            load_lock = self._load_locks.setdefault(merchant_id, threading.Lock())
+
+        # Load outside the LRU lock so other merchants' searches are not blocked;
+        # concurrent misses for the same merchant wait for a single load.
+        with load_lock:
+            with self._lock:
+                resident = self._resident.get(merchant_id)
+                if resident is not None:
+                    self._resident.move_to_end(merchant_id)
+                    self.hits += 1
+                    return resident.index
+                self.misses += 1
+
+            if not self.has_catalog(merchant_id):
+                raise FileNotFoundError(f"No catalog for merchant '{merchant_id}'")
+
+            start = time.perf_counter()
+            index = HotSwapIndex(
+                self.catalog_root(merchant_id),
+                self.factory,
+                model_source=self._models.get,
+                database_exists=self.database_exists,
+            )
+            index.reload()
+            elapsed = time.perf_counter() - start
+
+            search = index.search
+            self._models.setdefault(search.model_name, (search.model, search.processor))
+
+            with self._lock:
+                self._resident[merchant_id] = _ResidentCatalog(
+                    index, search.memory_bytes()
+                )
+                self.load_seconds.append(elapsed)
+                self._evict()
+
+            logger.info(
+                f"Loaded catalog for merchant {merchant_id} in {elapsed:.2f}s "
+                f"({len(self._resident)} resident, "
+                f"{self.resident_bytes() / 1e6:.1f} MB)"
+            )
+            return index
+
+    def _evict(self):
+        """Evicts least recently used catalogs until within budget (lock held)."""
+        while len(self._resident) > 1 and (
+            self.resident_bytes() > self.memory_budget_bytes
+            or (self.max_resident > 0 and len(self._resident) > self.max_resident)
+        ):
+            merchant_id, resident = self._resident.popitem(last=False)
+            resident.index.retire()
+            self.evictions += 1
+            logger.info(f"Evicted catalog for merchant {merchant_id}")
+
+    def resident_bytes(self) -> int:
+        """Returns the estimated size of all resident catalogs in bytes."""
+        return sum(resident.memory_bytes for resident in self._resident.values())
+
+    def reload(self, background: bool = False):
+        """
+        Reloads resident catalogs whose published version changed.
+
+        Args:
+            background (bool): Run each reload in a daemon thread.
+        """
+        with self._lock:
+            indexes = [resident.index for resident in self._resident.values()]
+        for index in indexes:
+            index.reload(background=background)
+
+    def stats(self) -> Dict:
+        """
+        Returns residency, hit/miss and load latency statistics.
+
+        Returns:
+            Dict: resident merchants, resident_bytes, memory_budget_bytes, hits,
+                  misses, hit_rate, evictions and load latency in milliseconds.
+        """
+        with self._lock:
+            resident = list(self._resident)
+            resident_bytes = self.resident_bytes()
+            load_seconds = sorted(self.load_seconds)
+        lookups = self.hits + self.misses
+        return {
+            "resident": resident,
+            "resident_bytes": resident_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "loads": len(load_seconds),
+            "load_ms_mean": (
+                1000 * sum(load_seconds) / len(load_seconds) if load_seconds else 0.0
+            ),
+            "load_ms_max": 1000 * load_seconds[-1] if load_seconds else 0.0,
+        }
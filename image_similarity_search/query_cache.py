@@ -0,0 +1,163 @@
+"""
+A bounded LRU/TTL cache for query embeddings and search results, keyed by a
+perceptual hash of the query image.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+
+logger = logging.getLogger(__name__)
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Computes a difference hash (dHash) of an image.
+
+    Near-identical crops (re-encoded, slightly shifted or rescaled) map to the
+    same hash, so repeated views of the same garment share cache entries.
+
+    Args:
+        image (Image.Image): The image to hash.
+        hash_size (int): Hash grid size; the hash has hash_size**2 bits.
+
+    Returns:
+        int: The perceptual hash as an integer.
+    """
+    gray = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(gray, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).tobytes().hex(), 16)
+
+
+class QueryCache:
+    """
+    A thread-safe, bounded LRU cache with optional time-to-live and hit/miss counters.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl_seconds: float = 0.0,
+        persist_path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Initializes the QueryCache instance.
+
+        Args:
+            max_entries (int): Maximum number of entries kept before evicting the least recently used.
+            ttl_seconds (float): Entry lifetime in seconds (0 disables expiry).
+            persist_path (Optional[Union[str, Path]]): File used to persist the cache across jobs.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.persist_path is not None:
+            self.load()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Looks up a cached value, refreshing its LRU position.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl_seconds and time.time() - stored_at > self.ttl_seconds:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Stores a value, evicting the least recently used entries when full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to cache.
+        """
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns cache counters.
+
+        Returns:
+            dict: Entry count, hits, misses, evictions and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def save(self):
+        """Persists the cache entries to persist_path, if configured."""
+        if self.persist_path is None:
+            return
+        with self._lock:
+            entries = list(self._entries.items())
+        try:
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.persist_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entries, f)
+            tmp_path.replace(self.persist_path)
+            logger.info(f"Saved {len(entries)} cache entries to {self.persist_path}")
+        except Exception as e:
+            logger.warning(f"Failed to persist query cache: {e}")
+
+    def load(self):
+        """Loads persisted cache entries from persist_path, if present."""
+        if self.persist_path is None or not self.persist_path.exists():
+            return
+        try:
+            with open(self.persist_path, "rb") as f:
+                entries = pickle.load(f)
+            with self._lock:
+                for key, entry in entries[-self.max_entries :]:
+                    self._entries[key] = entry
+            logger.info(
+                f"Loaded {len(self._entries)} cache entries from {self.persist_path}"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load persisted query cache: {e}")
@@ -0,0 +1,502 @@
+"""
+Sharded similarity search: the catalog index is split across shard workers that
+are queried in parallel, and their per-shard top-k results are merged by score.
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple, Union
+
+import faiss  # type: ignore
+import numpy as np
+
+from .catalog_metadata import CatalogMetadata
+from .query_cache import QueryCache
+from .similarity_search import ImageSimilaritySearch
+
+
+logger = logging.getLogger(__name__)
+
+
+GLOBAL_IDS_FILE = "global_ids.npy"
+
+
+def serve_shard(
+    shard_path: str,
+    address: Tuple[str, int],
+    authkey: bytes,
+    rerank_factor: int = 0,
+    coarse_candidates: int = 0,
+):
+    """
+    Serves one shard over a local socket until a "shutdown" request arrives.
+
+    Runs in a worker process. The same protocol works across hosts, so a remote
+    shard is simply a ``serve_shard`` process started on another machine.
+
+    Args:
+        shard_path (str): Shard database directory.
+        address (Tuple[str, int]): (host, port) to listen on.
+        authkey (bytes): Shared secret for the connection handshake.
+        rerank_factor (int): Float32 re-ranking factor for quantized shard indexes.
+        coarse_candidates (int): Two-stage candidate count (0 disables).
+    """
+    shard = ImageSimilaritySearch(
+        db_path=shard_path,
+        rerank_factor=rerank_factor,
+        coarse_candidates=coarse_candidates,
+    )
+    shard._load_database()
+    global_ids = np.load(Path(shard_path) / GLOBAL_IDS_FILE)
+    logger.info(f"Shard {shard_path} serving {len(global_ids)} vectors on {address}")
+
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            conn = listener.accept()
+            with conn:
+                while True:
+                    try:
+                        request = conn.recv()
+                    except EOFError:
+                        break
+
+                    command = request[0]
+                    if command == "shutdown":
+                        conn.send(("ok", None))
+                        return
+                    try:
+                        if command == "search":
+                            _, embedding, top_k, category, label, merchant = request
+                            # The coordinator only sends labels that exist in the
+                            # catalog, so a label this shard lacks means no
+                            # matches here, not an unfiltered search
+                            if (
+                                label is not None
+                                and shard.metadata.ids_where("label", label) is None
+                            ):
+                                matches = []
+                            else:
+                                matches = shard._search_embedding(
+                                    embedding, top_k, category, label, merchant
+                                )
+                            response = [
+                                (int(global_ids[idx]), score) for idx, score in matches
+                            ]
+                        elif command == "health":
+                            response = {
+                                "vectors": int(shard.index.ntotal),
+                                "index_version": shard.index_version,
+                            }
+                        else:
+                            raise ValueError(f"Unknown shard command: {command}")
+                        conn.send(("ok", response))
+                    except Exception as e:
+                        logger.error(f"Shard {shard_path} failed '{command}': {e}")
+                        conn.send(("error", str(e)))
+
+
+class ShardClient:
+    """
+    A connection to one shard worker, with latency and health counters.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        authkey: bytes,
+        timeout_seconds: float = 5.0,
+        process: Optional[multiprocessing.Process] = None,
+    ):
+        """
+        Initializes the ShardClient instance.
+
+        Args:
+            address (Tuple[str, int]): (host, port) of the shard worker.
+            authkey (bytes): Shared secret for the connection handshake.
+            timeout_seconds (float): Per-request timeout.
+            process (Optional[multiprocessing.Process]): Local worker process, if spawned by us.
+        """
+        self.address = address
+        self.authkey = authkey
+        self.timeout_seconds = timeout_seconds
+        self.process = process
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.last_latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self.healthy = False
+        self.last_error: Optional[str] = None
+
+    def connect(self, startup_timeout: float = 120.0):
+        """
+        Connects to the shard, retrying while the worker is still loading its index.
+
+        Args:
+            startup_timeout (float): Seconds to keep retrying before giving up.
+        """
+        deadline = time.time() + startup_timeout
+        while True:
+            try:
+                self._conn = Client(self.address, authkey=self.authkey)
+                self.healthy = True
+                return
+            except (ConnectionRefusedError, OSError) as e:
+                if self.process is not None and not self.process.is_alive():
+                    raise RuntimeError(f"Shard worker {self.address} exited") from e
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.5)
+
+    def request(self, *message):
+        """
+        Sends a request and waits for the response, updating the shard metrics.
+
+        Returns:
+            The response payload.
+
+        Raises:
+            RuntimeError: If the shard is unreachable, times out or reports an error.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                if self._conn is None:
+                    self.connect(startup_timeout=self.timeout_seconds)
+                self._conn.send(message)
+                if not self._conn.poll(self.timeout_seconds):
+                    # A late reply would desynchronise the stream; reconnect next time
+                    self._conn.close()
+                    self._conn = None
+                    raise TimeoutError(f"Shard {self.address} timed out")
+                status, payload = self._conn.recv()
+                if status != "ok":
+                    raise RuntimeError(payload)
+            except Exception as e:
+                self.errors += 1
+                self.healthy = False
+                self.last_error = str(e)
+                if not isinstance(e, RuntimeError):
+                    self._conn = None
+                raise RuntimeError(f"Shard {self.address} request failed: {e}") from e
+
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.requests += 1
+            self.healthy = True
+            self.last_latency_ms = latency_ms
+            # Exponential moving average keeps the metric cheap and recent
+            self.avg_latency_ms = (
+                latency_ms
+                if self.requests == 1
+                else 0.9 * self.avg_latency_ms + 0.1 * latency_ms
+            )
+            return payload
+
+    def stats(self) -> Dict:
+        """Returns the health and latency metrics of this shard."""
+        return {
+            "address": f"{self.address[0]}:{self.address[1]}",
+            "healthy": self.healthy,
+            "requests": self.requests,
+            "errors": self.errors,
+            "last_latency_ms": round(self.last_latency_ms, 3),
+            "avg_latency_ms": round(self.avg_latency_ms, 3),
+            "last_error": self.last_error,
+        }
+
+    def close(self):
+        """Stops a locally spawned worker and closes the connection."""
+        if self.process is not None:
+            try:
+                self.request("shutdown")
+            except RuntimeError:
+                pass
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class ShardedSimilaritySearch(ImageSimilaritySearch):
+    """
+    An ImageSimilaritySearch whose index is split across shard workers.
+
+    Queries are embedded (and cached) locally, scattered to every shard in
+    parallel, and the per-shard top-k lists are merged by score. The compact
+    catalog metadata stays in this process, so results map to full records
+    exactly as in the single-index case.
+    """
+
+    SHARD_DIR_FORMAT = "shard_{:03d}"
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        model_name: Optional[str] = None,
+        query_cache: Optional[QueryCache] = None,
+        hash_size: int = 8,
+        shard_addresses: Optional[List[str]] = None,
+        base_port: int = 6100,
+        authkey: Optional[bytes] = None,
+        timeout_seconds: float = 5.0,
+        rerank_factor: int = 0,
+        coarse_candidates: int = 0,
+        inference_context: Optional[Callable[[], ContextManager]] = None,
+    ):
+        """
+        Initializes the ShardedSimilaritySearch instance.
+
+        Args:
+            db_path (Union[str, Path]): Directory produced by ``build_shards``.
+            model_name (Optional[str]): Embedding model; defaults to the one in the manifest.
+            query_cache (Optional[QueryCache]): Cache for image query embeddings and results.
+            hash_size (int): Perceptual hash grid size used for cache keys.
+            shard_addresses (Optional[List[str]]): "host:port" of already running shard
+                workers, one per shard. When empty, local worker processes are spawned.
+            base_port (int): First port used for locally spawned workers.
+            authkey (Optional[bytes]): Shared secret for shard connections. Required
+                with shard_addresses, since shards unpickle what they receive; locally
+                spawned workers get a random key when it is empty.
+            timeout_seconds (float): Per-shard request timeout.
+            rerank_factor (int): Float32 re-ranking factor used by locally spawned shards.
+            coarse_candidates (int): Two-stage candidate count used by locally spawned shards.
+            inference_context (Optional[Callable[[], ContextManager]]): Context entered
+                around each local model forward pass.
+        """
+        super().__init__(
+            db_path,
+            model_name=model_name,
+            query_cache=query_cache,
+            hash_size=hash_size,
+            rerank_factor=rerank_factor,
+            coarse_candidates=coarse_candidates,
+            inference_context=inference_context,
+        )
+        self.shard_addresses = shard_addresses or []
+        if self.shard_addresses and not authkey:
+            raise ValueError("An explicit authkey is required for remote shards")
+        self.base_port = base_port
+        self.authkey = authkey or os.urandom(32)
+        self.timeout_seconds = timeout_seconds
+
+        self.shards: List[ShardClient] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def build_shards(
+        cls,
+        catalog_db_path: Union[str, Path],
+        shards_path: Union[str, Path],
+        num_shards: int,
+        index_type: str = "flat",
+        coarse_dimension: int = 0,
+    ):
+        """
+        Splits a built catalog database into shard databases.
+
+        Vectors are assigned round-robin so every shard holds a similar share of
+        each category. Each shard stores its own index, metadata subset and the
+        global ids of its vectors; the full metadata table is copied alongside.
+
+        Args:
+            catalog_db_path (Union[str, Path]): A database built by ``build_database``.
+            shards_path (Union[str, Path]): Output directory for the shards.
+            num_shards (int): Number of shards.
+            index_type (str): Index storage for the shard indexes (see INDEX_TYPES).
+            coarse_dimension (int): PCA dimension of per-shard coarse indexes (0 skips them).
+        """
+        catalog = ImageSimilaritySearch(db_path=catalog_db_path)
+        catalog._load_database()
+        total = catalog.index.ntotal
+        if catalog.full_embeddings is not None:
+            vectors = np.asarray(catalog.full_embeddings, dtype="float32")
+        else:
+            vectors = catalog.index.reconstruct_n(0, total)
+
+        shards_dir = Path(shards_path)
+        shards_dir.mkdir(parents=True, exist_ok=True)
+        for filename in (cls.METADATA_FILE, cls.MANIFEST_FILE):
+            if (catalog.db_path / filename).exists():
+                shutil.copyfile(catalog.db_path / filename, shards_dir / filename)
+
+        for shard_idx in range(num_shards):
+            global_ids = np.arange(shard_idx, total, num_shards, dtype="int64")
+            shard_dir = shards_dir / cls.SHARD_DIR_FORMAT.format(shard_idx)
+            shard_dir.mkdir(exist_ok=True)
+
+            shard_vectors = vectors[global_ids]
+            shard = ImageSimilaritySearch(
+                db_path=shard_dir,
+                index_type=index_type,
+                coarse_dimension=coarse_dimension,
+            )
+            index = shard._create_index(shard_vectors)
+            faiss.write_index(index, str(shard_dir / cls.INDEX_FILE))
+            np.save(shard_dir / cls.EMBEDDINGS_FILE, shard_vectors)
+            if coarse_dimension > 0:
+                shard._save_coarse_index(shard_vectors)
+            catalog.metadata.subset(global_ids).save(shard_dir / cls.METADATA_FILE)
+            np.save(shard_dir / GLOBAL_IDS_FILE, global_ids)
+
+            logger.info(f"Shard {shard_idx}: {len(global_ids)} vectors -> {shard_dir}")
+
+        logger.info(f"Split {total} vectors into {num_shards} shards at {shards_dir}")
+
+    @classmethod
+    def _shard_paths(cls, db_path: Path) -> List[Path]:
+        """Returns the shard database directories under db_path, in shard order."""
+        return sorted(db_path.glob(cls.SHARD_DIR_FORMAT.replace("{:03d}", "*")))
+
+    def shard_paths(self) -> List[Path]:
+        """Returns the shard database directories, in shard order."""
+        return self._shard_paths(self.db_path)
+
+    @classmethod
+    def database_exists(cls, db_path: Union[str, Path]) -> bool:
+        """
+        Check whether a directory holds built shard databases, without
+        creating anything.
+
+        Args:
+            db_path (Union[str, Path]): Directory produced by ``build_shards``.
+        """
+        db_path = Path(db_path)
+        return (db_path / cls.METADATA_FILE).exists() and bool(
+            cls._shard_paths(db_path)
+        )
+
+    def _load_database(self):
+        """Loads the full metadata table and connects to (or spawns) the shards."""
+        metadata_path = self.db_path / self.METADATA_FILE
+        shard_paths = self.shard_paths()
+        if not metadata_path.exists() or not shard_paths:
+            logger.error(f"Sharded database not found in {self.db_path}")
+            raise FileNotFoundError("Shard files missing. Run 'build_shards'.")
+
+        self._set_metadata(CatalogMetadata.load(metadata_path))
+        self.index_version = f"{metadata_path.stat().st_mtime_ns}-{len(shard_paths)}"
+        self._load_manifest()
+
+        # Loading again (e.g. after a failed connect) starts from a clean shard set
+        self.close()
+
+        if self.shard_addresses:
+            if len(self.shard_addresses) != len(shard_paths):
+                raise ValueError(
+                    f"{len(self.shard_addresses)} shard addresses configured "
+                    f"for {len(shard_paths)} shards"
+                )
+            for address in self.shard_addresses:
+                host, port = address.rsplit(":", 1)
+                self.shards.append(
+                    ShardClient((host, int(port)), self.authkey, self.timeout_seconds)
+                )
+        else:
+            context = multiprocessing.get_context("spawn")
+            for shard_idx, shard_path in enumerate(shard_paths):
+                address = ("127.0.0.1", self.base_port + shard_idx)
+                process = context.Process(
+                    target=serve_shard,
+                    args=(
+                        str(shard_path),
+                        address,
+                        self.authkey,
+                        self.rerank_factor,
+                        self.coarse_candidates,
+                    ),
+                    daemon=True,
+                )
+                process.start()
+                self.shards.append(
+                    ShardClient(address, self.authkey, self.timeout_seconds, process)
+                )
+
+        for shard in self.shards:
+            shard.connect()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards))
+        logger.info(f"Connected to {len(self.shards)} similarity shards")
+
+    def _search_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        category: Optional[str],
+        label: Optional[str],
+        merchant: Optional[str],
+    ) -> List[Tuple[int, float]]:
+        """
+        Scatters the query to every shard and merges their top-k lists by score.
+        Shards that fail are logged and skipped, so results degrade instead of erroring.
+
+        Returns:
+            List[Tuple[int, float]]: (global FAISS id, score) pairs, best first.
+        """
+        # Labels missing from the catalog are dropped here, as in the single index,
+        # so shards that lack the label do not return empty partitions
+        if label is not None and self.metadata.ids_where("label", label) is None:
+            label = None
+
+        futures = [
+            self._executor.submit(
+                shard.request,
+                "search",
+                query_embedding,
+                top_k,
+                category,
+                label,
+                merchant,
+            )
+            for shard in self.shards
+        ]
+
+        merged: List[Tuple[int, float]] = []
+        for shard, future in zip(self.shards, futures):
+            try:
+                merged.extend(future.result())
+            except RuntimeError as e:
+                logger.warning(f"Skipping shard {shard.address}: {e}")
+
+        merged.sort(key=lambda match: match[1], reverse=True)
+        return merged[:top_k]
+
+    def shard_stats(self) -> List[Dict]:
+        """Returns health and latency metrics for every shard."""
+        return [shard.stats() for shard in self.shards]
+
+    def check_health(self) -> List[Dict]:
+        """
+        Pings every shard and returns its metrics plus the shard's vector count.
+
+        Returns:
+            List[Dict]: One entry per shard.
+        """
+        report = []
+        for shard in self.shards:
+            entry = shard.stats()
+            try:
+                entry.update(shard.request("health"))
+            except RuntimeError as e:
+                entry["last_error"] = str(e)
+            entry["healthy"] = shard.healthy
+            report.append(entry)
+        return report
+
+    def close(self):
+        """Shuts down locally spawned shard workers."""
+        for shard in self.shards:
+            shard.close()
+        self.shards = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -2,11 +2,14 @@
 A module for building and searching an image similarity database using CLIP embeddings and FAISS.
 """
 
+import hashlib
+import json
 import logging
 import os
 import pickle
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Union, Optional
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple, Union
 
 import faiss  # type: ignore
 import numpy as np
@@ -14,6 +17,9 @@ from PIL import Image
 import torch
 from transformers import CLIPModel, CLIPProcessor  # type: ignore
 
+from .catalog_metadata import CatalogMetadata
+from .query_cache import QueryCache, perceptual_hash
+
 
 # --- Setup Logging ---
 logger = logging.getLogger(__name__)
@@ -37,30 +43,115 @@ class ImageSimilaritySearch:
     A class to build and search an image similarity database using CLIP embeddings.
     """
 
-    EMBEDDINGS_FILE = "image_embeddings.pkl"
+    EMBEDDINGS_FILE = "image_embeddings.npy"
     INDEX_FILE = "faiss_index.idx"
-    PATHS_FILE = "image_paths.pkl"
+    BUILD_REPORT_FILE = "build_report.json"
+    DUPLICATES_FILE = "duplicates_report.json"
+    COARSE_INDEX_FILE = "coarse_index.idx"
+    PCA_FILE = "pca_matrix.bin"
+    MANIFEST_FILE = "manifest.json"
+    MANIFEST_VERSION = 1
+
+    DEFAULT_MODEL = "openai/clip-vit-base-patch16"
+
+    # Image processor settings that change the embedding of a given image
+    PREPROCESSING_KEYS = (
+        "do_resize",
+        "size",
+        "resample",
+        "do_center_crop",
+        "crop_size",
+        "do_rescale",
+        "rescale_factor",
+        "do_normalize",
+        "image_mean",
+        "image_std",
+        "do_convert_rgb",
+    )
+    PATHS_FILE = "image_paths.pkl"  # Legacy databases only; migrated on load
+    METADATA_FILE = CatalogMetadata.METADATA_FILE
+
+    IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]
+    DEFAULT_MERCHANT = "default"
+
+    # Index storage options: float32 flat, float16/int8 scalar quantizer, product quantizer
+    INDEX_TYPES = ("flat", "fp16", "int8", "pq")
 
     def __init__(
         self,
         db_path: Union[str, Path],
-        model_name: str = "openai/clip-vit-base-patch16",
+        model_name: Optional[str] = None,
+        query_cache: Optional[QueryCache] = None,
+        hash_size: int = 8,
+        index_type: str = "flat",
+        rerank_factor: int = 0,
+        pq_subquantizers: int = 64,
+        dedupe_threshold: float = 0.0,
+        coarse_dimension: int = 0,
+        coarse_candidates: int = 0,
+        inference_context: Optional[Callable[[], ContextManager]] = None,
     ):
         """
         Initializes the ImageSimilaritySearch instance.
 
         Args:
             db_path (Union[str, Path]): Path to the directory where the database files will be stored.
-            model_name (str): Name of the Hugging Face model to use for embeddings (default CLIP).
+            model_name (Optional[str]): Name of the Hugging Face model to use for embeddings.
+                When None, the model recorded in the database manifest is used
+                (DEFAULT_MODEL for new or legacy databases).
+            query_cache (Optional[QueryCache]): Cache for image query embeddings and results.
+            hash_size (int): Perceptual hash grid size used for cache keys.
+            index_type (str): Index storage used by ``build_database`` (one of INDEX_TYPES).
+            rerank_factor (int): For quantized indexes, re-rank top_k * rerank_factor
+                candidates with the stored float32 embeddings (0 disables).
+            pq_subquantizers (int): Number of sub-quantizers for the "pq" index type.
+            dedupe_threshold (float): Cosine similarity at or above which catalog images of
+                the same product, category, label and merchant are collapsed at build
+                time (0 disables).
+            coarse_dimension (int): PCA dimension of the coarse index written by
+                ``build_database`` for two-stage search (0 skips it).
+            coarse_candidates (int): When a coarse index exists, retrieve this many
+                candidates from it and re-rank them with full embeddings (0 disables).
+            inference_context (Optional[Callable[[], ContextManager]]): Context entered
+                around each model forward pass (threads, autocast, timing). Defaults
+                to ``torch.inference_mode``.
         """
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+
         self.db_path = Path(db_path)
         self.db_path.mkdir(exist_ok=True)  # Create DB directory if it doesn't exist
 
-        self.model_name = model_name
+        self.model_name = model_name or self.DEFAULT_MODEL
+        self._model_pinned = model_name is not None
+        self.manifest: Optional[Dict] = None
         self.model: Optional[CLIPModel] = None
         self.processor: Optional[CLIPProcessor] = None
         self.index: Optional[faiss.Index] = None
-        self.image_paths: List[Path] = []
+        self.metadata: Optional[CatalogMetadata] = None
+        self.index_version: str = ""
+
+        # Quantized storage, with memory-mapped float32 embeddings for re-ranking
+        self.index_type = index_type
+        self.rerank_factor = rerank_factor
+        self.pq_subquantizers = pq_subquantizers
+        self.full_embeddings: Optional[np.ndarray] = None
+        self.dedupe_threshold = dedupe_threshold
+
+        # Two-stage retrieval: PCA-reduced coarse index, then full-precision re-rank
+        self.coarse_dimension = coarse_dimension
+        self.coarse_candidates = coarse_candidates
+        self.pca: Optional[faiss.PCAMatrix] = None
+        self.coarse_index: Optional[faiss.Index] = None
+
+        # Query cache shared across searches (and optionally across instances)
+        self.query_cache = query_cache
+        self.hash_size = hash_size
+
+        self.inference_context = inference_context or torch.inference_mode
+
+        # Cached ID selectors keyed by the (category, label, merchant) filter
+        self._selectors: Dict[Tuple, Tuple[Optional[faiss.IDSelector], int]] = {}
 
         logger.info(
             f"Initialized ImageSimilaritySearch with database path: {self.db_path}"
@@ -77,6 +168,130 @@ class ImageSimilaritySearch:
             except Exception as e:
                 logger.error(f"Failed to load model '{self.model_name}': {e}")
                 raise e
+            if self.manifest is not None:
+                self._check_model_compatibility()
+
+    def share_model(self, other: "ImageSimilaritySearch"):
+        """
+        Reuses another instance's loaded model and processor when the models match,
+        so a reloaded database version does not load CLIP again.
+
+        Args:
+            other (ImageSimilaritySearch): Instance whose model to reuse.
+        """
+        if other.model is None or other.model_name != self.model_name:
+            return
+        self.use_model(other.model, other.processor)
+
+    def use_model(self, model: CLIPModel, processor: CLIPProcessor):
+        """
+        Uses an already loaded model and processor of this instance's model name.
+
+        Args:
+            model (CLIPModel): Loaded model.
+            processor (CLIPProcessor): Its processor.
+        """
+        self.model = model
+        self.processor = processor
+        if self.manifest is not None:
+            self._check_model_compatibility()
+
+    def _preprocessing_hash(self) -> str:
+        """
+        Hashes the image processor settings that affect embeddings.
+
+        Returns:
+            str: A short hex digest.
+        """
+        self._load_model()
+        config = self.processor.image_processor.to_dict()
+        relevant = {key: config.get(key) for key in self.PREPROCESSING_KEYS}
+        digest = hashlib.sha256(
+            json.dumps(relevant, sort_keys=True, default=str).encode()
+        )
+        return digest.hexdigest()[:16]
+
+    def _write_manifest(self, dimension: int, num_vectors: int):
+        """
+        Records which model and preprocessing produced the stored vectors.
+
+        Args:
+            dimension (int): Embedding dimension.
+            num_vectors (int): Number of indexed vectors.
+        """
+        self.manifest = {
+            "format_version": self.MANIFEST_VERSION,
+            "model_id": self.model_name,
+            "embedding_dim": dimension,
+            "preprocessing_hash": self._preprocessing_hash(),
+            "build_time": datetime.now(timezone.utc).isoformat(),
+            "index_type": self.index_type,
+            "vectors": num_vectors,
+            "coarse_dimension": self.coarse_dimension,
+        }
+        with open(self.db_path / self.MANIFEST_FILE, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        logger.info(f"Index manifest saved to {self.db_path / self.MANIFEST_FILE}")
+
+    def _load_manifest(self):
+        """
+        Loads the index manifest and selects or validates the embedding model.
+
+        Raises:
+            ValueError: If the database was built with a different model or dimension.
+        """
+        manifest_path = self.db_path / self.MANIFEST_FILE
+        if not manifest_path.exists():
+            logger.warning(
+                f"No manifest in {self.db_path}; assuming it was built with "
+                f"{self.model_name}. Rebuild the database to record its model."
+            )
+            self.manifest = None
+            return
+
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+        if not self._model_pinned:
+            self.model_name = manifest["model_id"]
+        elif manifest["model_id"] != self.model_name:
+            raise ValueError(
+                f"Database {self.db_path} was built with '{manifest['model_id']}' "
+                f"but '{self.model_name}' was requested; rebuild the database or "
+                f"use the matching model."
+            )
+        if self.index is not None and self.index.d != manifest["embedding_dim"]:
+            raise ValueError(
+                f"Index dimension {self.index.d} does not match manifest "
+                f"dimension {manifest['embedding_dim']} in {self.db_path}"
+            )
+
+        self.manifest = manifest
+        if self.model is not None:
+            self._check_model_compatibility()
+        logger.info(
+            f"Database built with {manifest['model_id']} "
+            f"({manifest['embedding_dim']}-d) at {manifest['build_time']}"
+        )
+
+    def _check_model_compatibility(self):
+        """
+        Verifies the loaded model and processor produce vectors in the indexed space.
+
+        Raises:
+            ValueError: If the embedding dimension or preprocessing differs.
+        """
+        dimension = self.model.config.projection_dim
+        if dimension != self.manifest["embedding_dim"]:
+            raise ValueError(
+                f"Model {self.model_name} produces {dimension}-d embeddings but "
+                f"{self.db_path} holds {self.manifest['embedding_dim']}-d vectors"
+            )
+        if self._preprocessing_hash() != self.manifest["preprocessing_hash"]:
+            raise ValueError(
+                f"Image preprocessing of {self.model_name} differs from the one "
+                f"used to build {self.db_path}; rebuild the database"
+            )
 
     def _embed_image(self, image_path: Path) -> np.ndarray:
         """
@@ -88,24 +303,37 @@ class ImageSimilaritySearch:
         Returns:
             np.ndarray: The normalized embedding vector for the image.
         """
-        self._load_model()
         try:
             image = Image.open(image_path).convert("RGB")  # Ensure RGB format
-            inputs = self.processor(images=image, return_tensors="pt")
-
-            # Use model.get_image_features if available, otherwise use the full model
-            # CLIP models typically have this method.
-            with torch.no_grad():
-                image_features = self.model.get_image_features(**inputs)
-            # Normalize the embedding
-            image_features = image_features / image_features.norm(
-                p=2, dim=-1, keepdim=True
-            )
-            return image_features.cpu().numpy().flatten()
+            return self._embed_pil_image(image)
         except Exception as e:
             logger.error(f"Failed to embed image {image_path}: {e}")
             raise e
 
+    def _embed_pil_image(self, image: Image.Image) -> np.ndarray:
+        """
+        Generates an embedding for an already loaded RGB image.
+
+        Args:
+            image (Image.Image): The image to embed.
+
+        Returns:
+            np.ndarray: The normalized embedding vector for the image.
+        """
+        self._load_model()
+        inputs = self.processor(images=image, return_tensors="pt")
+
+        # Use model.get_image_features if available, otherwise use the full model
+        # CLIP models typically have this method.
+        with self.inference_context():
+            image_features = self.model.get_image_features(**inputs)
+        image_features = image_features.float()
+        # Normalize the embedding
+        image_features = image_features / image_features.norm(
+            p=2, dim=-1, keepdim=True
+        )
+        return image_features.cpu().numpy().flatten()
+
     def _embed_text(self, text: str) -> np.ndarray:
         """
         Generates an embedding for a text query.
@@ -123,8 +351,9 @@ class ImageSimilaritySearch:
             )
 
             # Use model.get_text_features if available
-            with torch.no_grad():
+            with self.inference_context():
                 text_features = self.model.get_text_features(**inputs)
+            text_features = text_features.float()
             # Normalize the embedding
             text_features = text_features / text_features.norm(
                 p=2, dim=-1, keepdim=True
@@ -134,13 +363,29 @@ class ImageSimilaritySearch:
             logger.error(f"Failed to embed text '{text}': {e}")
             raise e
 
-    def build_database(self, images_directory: Union[str, Path]):
+    def build_database(
+        self,
+        images_directory: Union[str, Path],
+        category: Optional[str] = None,
+        merchant: Optional[str] = None,
+    ):
         """
         Loads images from a directory, computes their embeddings, and saves them
         along with a FAISS index for efficient similarity search.
 
+        Catalog metadata is derived from the directory layout. When ``category`` is
+        given, images are expected under ``<images_directory>/[<label>/]<image>``.
+        Otherwise the directory is treated as a unified catalog laid out as
+        ``<images_directory>/<category>/[<label>/]<image>``.
+
         Args:
             images_directory (Union[str, Path]): Path to the directory containing images.
+            category (Optional[str]): Category assigned to every image (single-category build).
+            merchant (Optional[str]): Merchant assigned to every image.
+
+        Raises:
+            ValueError: If the directory is invalid, holds no images, or none of
+                its images could be embedded (nothing is written).
         """
         images_dir = Path(images_directory)
         if not images_dir.exists() or not images_dir.is_dir():
@@ -149,15 +394,14 @@ class ImageSimilaritySearch:
             )
             raise ValueError(f"Invalid images directory: {images_dir}")
 
-        image_paths = [
+        image_paths = sorted(
             p
             for p in images_dir.rglob("*")
-            if p.is_file()
-            and p.suffix.lower() in [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]
-        ]
+            if p.is_file() and p.suffix.lower() in self.IMAGE_EXTENSIONS
+        )
         if not image_paths:
             logger.warning(f"No images found in directory: {images_dir}")
-            return
+            raise ValueError(f"No images found in directory: {images_dir}")
 
         logger.info(
             f"Found {len(image_paths)} images in {images_dir}. Computing embeddings..."
@@ -178,83 +422,626 @@ class ImageSimilaritySearch:
 
         if not embeddings:
             logger.error("No images could be embedded. Database build failed.")
-            return
+            raise ValueError(f"No images could be embedded from {images_dir}")
 
         # Convert embeddings list to a numpy array (num_images, embedding_dim)
         embeddings_array = np.array(embeddings).astype("float32")
         logger.info(f"Computed embeddings for {len(embeddings_array)} images.")
 
+        # Build the metadata records, merging optional product details
+        product_info = CatalogMetadata.load_product_info(images_dir)
+        records = []
+        for img_path in valid_image_paths:
+            img_category, img_label = self._metadata_from_path(
+                img_path, images_dir, category
+            )
+            record = {
+                "path": str(img_path),
+                "category": img_category,
+                "label": img_label,
+                "merchant": merchant or self.DEFAULT_MERCHANT,
+            }
+            record.update(
+                product_info.get(img_path.relative_to(images_dir).as_posix(), {})
+            )
+            records.append(record)
+
+        # Collapse re-encoded copies of the same product photo to one vector
+        duplicate_groups: Dict[int, List[int]] = {}
+        if self.dedupe_threshold > 0:
+            keep, duplicate_groups = self._collapse_near_duplicates(
+                embeddings_array, records
+            )
+            self._write_duplicates_report(embeddings_array, records, duplicate_groups)
+            embeddings_array = embeddings_array[keep]
+            records = [records[i] for i in keep]
+
         # Build FAISS index
-        dimension = embeddings_array.shape[1]
-        # Using IndexFlatIP (Inner Product) for normalized vectors (cosine similarity)
-        # For L2 distance, use IndexFlatL2(dimension)
-        self.index = faiss.IndexFlatIP(dimension)
-        self.index.add(embeddings_array)
-        logger.info("FAISS index built successfully.")
+        self.index = self._create_index(embeddings_array)
+        logger.info(f"FAISS {self.index_type} index built successfully.")
+
+        metadata = CatalogMetadata.from_records(records)
 
-        # Save index and paths
+        # Save index, metadata and raw embeddings
         index_path = self.db_path / self.INDEX_FILE
-        paths_path = self.db_path / self.PATHS_FILE
-        # embeddings_path = self.db_path / self.EMBEDDINGS_FILE
+        metadata_path = self.db_path / self.METADATA_FILE
+        embeddings_path = self.db_path / self.EMBEDDINGS_FILE
 
         faiss.write_index(self.index, str(index_path))
+        self.index_version = self._read_index_version(index_path)
         logger.info(f"FAISS index saved to {index_path}")
 
-        with open(paths_path, "wb") as f:
-            pickle.dump(valid_image_paths, f)
-        logger.info(f"Image paths saved to {paths_path}")
+        metadata.save(metadata_path)
+        logger.info(
+            f"Catalog metadata saved to {metadata_path} "
+            f"({metadata.memory_bytes() / 1024:.1f} KB)"
+        )
+
+        # Raw float32 embeddings are memory-mapped at search time to re-rank
+        # candidates from quantized indexes; they are not held in RAM.
+        np.save(embeddings_path, embeddings_array)
+        logger.info(f"Raw embeddings saved to {embeddings_path}")
 
-        # Saving raw embeddings is optional, can be useful for debugging or other tasks
-        # but not strictly necessary for search if the index is sufficient.
-        # with open(embeddings_path, 'wb') as f:
-        #     pickle.dump(embeddings_array, f)
-        # logger.info(f"Raw embeddings saved to {embeddings_path}")
+        if self.coarse_dimension > 0:
+            self._save_coarse_index(embeddings_array)
 
-        self.image_paths = valid_image_paths  # Update internal state
+        self._write_manifest(embeddings_array.shape[1], len(embeddings_array))
+
+        # Update internal state
+        self.full_embeddings = np.load(embeddings_path, mmap_mode="r")
+        self._set_metadata(metadata)
+
+        report = self._build_report(embeddings_array)
+        report["collapsed_duplicates"] = sum(
+            len(dups) for dups in duplicate_groups.values()
+        )
+        with open(self.db_path / self.BUILD_REPORT_FILE, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Build report: {report}")
         logger.info("Database build completed successfully.")
 
+    def _collapse_near_duplicates(
+        self, embeddings_array: np.ndarray, records: List[Dict]
+    ) -> Tuple[np.ndarray, Dict[int, List[int]]]:
+        """
+        Groups near-duplicate images by blockwise self-similarity.
+
+        Images are visited in order; each image not yet assigned becomes the
+        canonical member of a group that absorbs every later unassigned image of
+        the same product ID, category, label and merchant whose cosine similarity
+        is at or above the threshold. Distinct products with near-identical
+        photos (e.g. colour variants) are never collapsed, and images without a
+        product ID are always kept.
+
+        Args:
+            embeddings_array (np.ndarray): Normalized float32 embeddings (num_images, dim).
+            records (List[Dict]): Metadata records aligned with the embeddings.
+
+        Returns:
+            Tuple of (kept_indices, groups) where groups maps each canonical index
+            with duplicates to the list of collapsed indices.
+        """
+        num_images = len(embeddings_array)
+        _, group_keys = np.unique(
+            [
+                f"{r['category']}\0{r['label']}\0{r['merchant']}\0{r['product_id']}"
+                if r.get("product_id") is not None
+                # Without a product ID, images of distinct products cannot be
+                # told apart, so each image is its own group
+                else f"\0{r['path']}"
+                for r in records
+            ],
+            return_inverse=True,
+        )
+        canonical = np.full(num_images, -1, dtype="int64")
+
+        # Bound the similarity block to ~64M floats regardless of catalog size
+        block_size = max(1, min(num_images, (1 << 26) // num_images))
+        for start in range(0, num_images, block_size):
+            end = min(start + block_size, num_images)
+            similarities = embeddings_array[start:end] @ embeddings_array.T
+            for row, idx in enumerate(range(start, end)):
+                if canonical[idx] != -1:
+                    continue
+                canonical[idx] = idx
+                matches = np.flatnonzero(
+                    (similarities[row, idx + 1 :] >= self.dedupe_threshold)
+                    & (canonical[idx + 1 :] == -1)
+                    & (group_keys[idx + 1 :] == group_keys[idx])
+                )
+                canonical[matches + idx + 1] = idx
+
+        keep = np.flatnonzero(canonical == np.arange(num_images))
+        groups: Dict[int, List[int]] = {}
+        for idx in np.flatnonzero(canonical != np.arange(num_images)):
+            groups.setdefault(int(canonical[idx]), []).append(int(idx))
+
+        logger.info(
+            f"Collapsed {num_images - len(keep)} near-duplicates into "
+            f"{len(groups)} groups (threshold {self.dedupe_threshold})"
+        )
+        return keep, groups
+
+    def _write_duplicates_report(
+        self,
+        embeddings_array: np.ndarray,
+        records: List[Dict],
+        groups: Dict[int, List[int]],
+    ):
+        """
+        Writes the collapsed near-duplicate groups to the database directory.
+
+        Args:
+            embeddings_array (np.ndarray): Embeddings before collapsing.
+            records (List[Dict]): Metadata records before collapsing.
+            groups (Dict[int, List[int]]): Canonical index to collapsed indices.
+        """
+        report = {
+            "threshold": self.dedupe_threshold,
+            "groups": [
+                {
+                    "canonical": records[canonical]["path"],
+                    "duplicates": [
+                        {
+                            "path": records[idx]["path"],
+                            "similarity": round(
+                                float(
+                                    embeddings_array[idx] @ embeddings_array[canonical]
+                                ),
+                                4,
+                            ),
+                        }
+                        for idx in duplicates
+                    ],
+                }
+                for canonical, duplicates in sorted(groups.items())
+            ],
+        }
+        report_path = self.db_path / self.DUPLICATES_FILE
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Near-duplicate report saved to {report_path}")
+
+    def _save_coarse_index(self, embeddings_array: np.ndarray):
+        """
+        Trains a PCA projection and writes the reduced-dimension coarse index.
+
+        Args:
+            embeddings_array (np.ndarray): Normalized float32 embeddings (num_images, dim).
+        """
+        num_vectors, dimension = embeddings_array.shape
+        # PCA cannot output more components than the training set spans
+        coarse_dimension = min(self.coarse_dimension, dimension, num_vectors - 1)
+        if coarse_dimension < 1:
+            logger.warning(
+                f"Skipping the coarse index: {num_vectors} vectors are too few "
+                "to train a PCA projection"
+            )
+            for filename in (self.PCA_FILE, self.COARSE_INDEX_FILE):
+                (self.db_path / filename).unlink(missing_ok=True)
+            return
+
+        self.pca = faiss.PCAMatrix(dimension, coarse_dimension)
+        self.pca.train(embeddings_array)
+
+        self.coarse_index = faiss.IndexFlatIP(coarse_dimension)
+        self.coarse_index.add(self._reduce(embeddings_array))
+
+        faiss.write_VectorTransform(self.pca, str(self.db_path / self.PCA_FILE))
+        faiss.write_index(self.coarse_index, str(self.db_path / self.COARSE_INDEX_FILE))
+        logger.info(
+            f"Coarse {coarse_dimension}-d index saved to "
+            f"{self.db_path / self.COARSE_INDEX_FILE}"
+        )
+
+    def _reduce(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Projects embeddings with the PCA matrix and re-normalizes them.
+
+        Args:
+            embeddings (np.ndarray): Float32 embeddings (n, dim).
+
+        Returns:
+            np.ndarray: Normalized float32 embeddings (n, coarse_dimension).
+        """
+        reduced = self.pca.apply_py(np.ascontiguousarray(embeddings))
+        faiss.normalize_L2(reduced)
+        return reduced
+
+    def _create_index(self, embeddings_array: np.ndarray) -> faiss.Index:
+        """
+        Creates, trains and fills a FAISS index of the configured storage type.
+
+        Args:
+            embeddings_array (np.ndarray): Normalized float32 embeddings (num_images, dim).
+
+        Returns:
+            faiss.Index: The populated index.
+        """
+        dimension = embeddings_array.shape[1]
+        # Inner product on normalized vectors is cosine similarity
+        if self.index_type == "flat":
+            index = faiss.IndexFlatIP(dimension)
+        elif self.index_type in ("fp16", "int8"):
+            qtype = (
+                faiss.ScalarQuantizer.QT_fp16
+                if self.index_type == "fp16"
+                else faiss.ScalarQuantizer.QT_8bit
+            )
+            index = faiss.IndexScalarQuantizer(
+                dimension, qtype, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            # k-means needs at least 2**nbits training points per sub-quantizer
+            nbits = int(min(8, max(1, np.log2(len(embeddings_array)))))
+            index = faiss.IndexPQ(
+                dimension, self.pq_subquantizers, nbits, faiss.METRIC_INNER_PRODUCT
+            )
+
+        if not index.is_trained:
+            index.train(embeddings_array)
+        index.add(embeddings_array)
+        return index
+
+    def _build_report(
+        self, embeddings_array: np.ndarray, k: int = 10, max_queries: int = 1000
+    ) -> Dict:
+        """
+        Reports index memory footprint and recall@k against exact float32 search,
+        using a sample of catalog vectors as queries.
+
+        Args:
+            embeddings_array (np.ndarray): The float32 embeddings the index was built from.
+            k (int): Recall cut-off.
+            max_queries (int): Maximum number of sampled queries.
+
+        Returns:
+            Dict: Footprint and recall figures.
+        """
+        num_vectors, dimension = embeddings_array.shape
+        index_bytes = int(faiss.serialize_index(self.index).nbytes)
+        float32_bytes = int(embeddings_array.nbytes)
+        report = {
+            "index_type": self.index_type,
+            "vectors": num_vectors,
+            "dimension": dimension,
+            "index_bytes": index_bytes,
+            "float32_bytes": float32_bytes,
+            "bytes_per_vector": round(index_bytes / num_vectors, 1),
+            "compression": round(float32_bytes / index_bytes, 2),
+        }
+        if self._is_exact_index():
+            return report
+
+        k = min(k, num_vectors)
+        rng = np.random.default_rng(0)
+        sample = rng.choice(num_vectors, min(max_queries, num_vectors), replace=False)
+        queries = embeddings_array[sample]
+
+        exact = faiss.IndexFlatIP(dimension)
+        exact.add(embeddings_array)
+        _, exact_ids = exact.search(queries, k)
+
+        def recall(approx_ids: List[List[int]]) -> float:
+            hits = sum(
+                len(set(truth) & set(found))
+                for truth, found in zip(exact_ids.tolist(), approx_ids)
+            )
+            return round(hits / (len(queries) * k), 4)
+
+        _, approx_ids = self.index.search(queries, k)
+        report[f"recall@{k}"] = recall(approx_ids.tolist())
+        if self.rerank_factor > 0:
+            reranked = [
+                [
+                    idx
+                    for idx, _ in self._search_embedding(
+                        query.reshape(1, -1), k, None, None, None
+                    )
+                ]
+                for query in queries
+            ]
+            report[f"recall@{k}_reranked"] = recall(reranked)
+        return report
+
+    def _is_exact_index(self) -> bool:
+        """Check whether the index stores uncompressed float32 vectors."""
+        return isinstance(self.index, faiss.IndexFlat)
+
+    @staticmethod
+    def _metadata_from_path(
+        image_path: Path, images_dir: Path, category: Optional[str]
+    ) -> Tuple[str, str]:
+        """
+        Derive the (category, label) pair for an image from its directory layout.
+
+        Args:
+            image_path (Path): Path to the image file.
+            images_dir (Path): Root directory the build was started from.
+            category (Optional[str]): Fixed category for single-category builds.
+
+        Returns:
+            Tuple[str, str]: Category and detector label ("" when unknown).
+        """
+        folders = image_path.relative_to(images_dir).parts[:-1]
+        if category is not None:
+            return category, folders[0] if folders else ""
+        return (
+            folders[0] if folders else "",
+            folders[1] if len(folders) > 1 else "",
+        )
+
+    def _set_metadata(self, metadata: CatalogMetadata):
+        """Installs a metadata table and drops selectors built for the previous one."""
+        self.metadata = metadata
+        self._selectors = {}
+        logger.info(f"Catalog partitions: {metadata.vocab('category')}")
+
+    def _get_selector(
+        self,
+        category: Optional[str] = None,
+        label: Optional[str] = None,
+        merchant: Optional[str] = None,
+    ) -> Tuple[Optional[faiss.IDSelector], int]:
+        """
+        Build (or reuse) a FAISS ID selector restricting search to a catalog partition.
+
+        A label with no vectors in the catalog is ignored, so detections whose label
+        is not partitioned still search the whole category.
+
+        Args:
+            category (Optional[str]): Category to restrict to.
+            label (Optional[str]): Detector label to restrict to.
+            merchant (Optional[str]): Merchant to restrict to.
+
+        Returns:
+            Tuple of (selector, partition_size). The selector is None when no filter
+            applies; partition_size is 0 when the filter matches nothing.
+        """
+        if label is not None and self.metadata.ids_where("label", label) is None:
+            label = None
+
+        key = (category, label, merchant)
+        filters = [
+            ("category", category),
+            ("label", label),
+            ("merchant", merchant),
+        ]
+        filters = [(field, value) for field, value in filters if value is not None]
+        if not filters:
+            return None, self.index.ntotal
+
+        if key not in self._selectors:
+            ids = None
+            for field, value in filters:
+                part = self.metadata.ids_where(field, value)
+                if part is None:
+                    ids = np.empty(0, dtype="int64")
+                    break
+                ids = part if ids is None else np.intersect1d(ids, part)
+
+            # IDSelectorBatch only keeps a reference to the id buffer, so the
+            # array is kept alive alongside the selector.
+            selector = faiss.IDSelectorBatch(ids)
+            selector.ids_ref = ids
+            self._selectors[key] = (selector, len(ids))
+        return self._selectors[key]
+
     def _load_database(self):
-        """Loads the FAISS index and image paths from the database directory."""
+        """Loads the FAISS index and catalog metadata from the database directory."""
         index_path = self.db_path / self.INDEX_FILE
+        metadata_path = self.db_path / self.METADATA_FILE
         paths_path = self.db_path / self.PATHS_FILE
 
-        if not index_path.exists() or not paths_path.exists():
+        if not index_path.exists() or not (
+            metadata_path.exists() or paths_path.exists()
+        ):
             logger.error("Database files not found. Run 'build_database' first.")
-            logger.error(f"Missing: {index_path} or {paths_path}")
+            logger.error(f"Missing: {index_path} or {metadata_path}")
             raise FileNotFoundError("Database files missing. Run 'build_database'.")
 
         logger.info(f"Loading database from {self.db_path}")
         try:
             self.index = faiss.read_index(str(index_path))
+            self.index_version = self._read_index_version(index_path)
             logger.info(f"FAISS index loaded from {index_path}")
 
-            with open(paths_path, "rb") as f:
-                self.image_paths = pickle.load(f)
-            logger.info(f"Image paths loaded from {paths_path}")
+            self._load_manifest()
+
+            embeddings_path = self.db_path / self.EMBEDDINGS_FILE
+            if embeddings_path.exists():
+                self.full_embeddings = np.load(embeddings_path, mmap_mode="r")
+
+            coarse_path = self.db_path / self.COARSE_INDEX_FILE
+            if self.coarse_candidates > 0 and coarse_path.exists():
+                self.pca = faiss.downcast_VectorTransform(
+                    faiss.read_VectorTransform(str(self.db_path / self.PCA_FILE))
+                )
+                self.coarse_index = faiss.read_index(str(coarse_path))
+                logger.info(f"Coarse index loaded from {coarse_path}")
+
+            if metadata_path.exists():
+                metadata = CatalogMetadata.load(metadata_path)
+                logger.info(f"Catalog metadata loaded from {metadata_path}")
+            else:
+                # Migrate a legacy pickled path list to the columnar format once
+                with open(paths_path, "rb") as f:
+                    image_paths = pickle.load(f)
+                metadata = CatalogMetadata.from_legacy_paths(
+                    image_paths, category=self.db_path.name
+                )
+                metadata.save(metadata_path)
+                logger.info(
+                    f"Migrated image paths from {paths_path} to {metadata_path}"
+                )
+            self._set_metadata(metadata)
         except Exception as e:
             logger.error(f"Failed to load database: {e}")
             raise e
 
-    def search(self, query: Union[str, Path], top_k: int = 5) -> List[str]:
+    def _read_index_version(self, index_path: Path) -> str:
+        """
+        Identifies the on-disk index build, so cached results never outlive a rebuild.
+
+        Args:
+            index_path (Path): Path to the FAISS index file.
+
+        Returns:
+            str: A version string derived from the index file and vector count.
+        """
+        return f"{index_path.stat().st_mtime_ns}-{self.index.ntotal}"
+
+    @classmethod
+    def database_exists(cls, db_path: Union[str, Path]) -> bool:
+        """
+        Check whether a database directory holds a built database, without
+        creating anything.
+
+        Args:
+            db_path (Union[str, Path]): Database directory.
+        """
+        db_path = Path(db_path)
+        return (db_path / cls.INDEX_FILE).exists() and (
+            (db_path / cls.METADATA_FILE).exists()
+            or (db_path / cls.PATHS_FILE).exists()
+        )
+
+    def is_built(self) -> bool:
+        """Check whether the database files exist on disk."""
+        return self.database_exists(self.db_path)
+
+    def memory_bytes(self) -> int:
+        """
+        Estimates the resident size of the loaded database: the FAISS index, the
+        coarse index and the metadata table. The model and the memory-mapped
+        re-ranking embeddings are not counted.
+
+        Returns:
+            int: Size in bytes (0 if nothing is loaded).
+        """
+        total = 0
+        for index in (self.index, self.coarse_index):
+            if index is None:
+                continue
+            try:
+                code_size = index.sa_code_size()
+            except RuntimeError:
+                code_size = index.d * 4
+            total += code_size * index.ntotal
+        if self.metadata is not None:
+            total += self.metadata.memory_bytes()
+        return total
+
+    def search(
+        self,
+        query: Union[str, Path],
+        top_k: int = 5,
+        category: Optional[str] = None,
+        label: Optional[str] = None,
+        merchant: Optional[str] = None,
+    ) -> List[str]:
         """
         Searches the database for images similar to the query (text or image path).
 
+        Optional category, label and merchant filters restrict the search to the
+        matching catalog partition via a FAISS ID selector.
+
         Args:
             query (Union[str, Path]): The search query, either a text string or a path to an image.
             top_k (int): The number of most similar images to return.
+            category (Optional[str]): Only return images from this category.
+            label (Optional[str]): Only return images with this detector label.
+            merchant (Optional[str]): Only return images from this merchant.
 
         Returns:
             List[str]: A list of paths (as strings) to the most similar images,
                        ordered from highest to lowest similarity score.
         """
-        if self.index is None or not self.image_paths:
+        matches = self._query(query, top_k, category, label, merchant)
+        return [self.metadata.path(idx) for idx, _ in matches]
+
+    def search_products(
+        self,
+        query: Union[str, Path],
+        top_k: int = 5,
+        category: Optional[str] = None,
+        label: Optional[str] = None,
+        merchant: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Searches the database like ``search`` but returns full catalog records.
+
+        Args:
+            query (Union[str, Path]): The search query, either a text string or a path to an image.
+            top_k (int): The number of most similar products to return.
+            category (Optional[str]): Only return products from this category.
+            label (Optional[str]): Only return products with this detector label.
+            merchant (Optional[str]): Only return products from this merchant.
+
+        Returns:
+            List[Dict]: Catalog records (see ``CatalogMetadata.record``) with an added
+                        "score", ordered from highest to lowest similarity.
+        """
+        matches = self._query(query, top_k, category, label, merchant)
+        return [
+            {**self.metadata.record(idx), "score": score} for idx, score in matches
+        ]
+
+    def _query(
+        self,
+        query: Union[str, Path],
+        top_k: int,
+        category: Optional[str],
+        label: Optional[str],
+        merchant: Optional[str],
+    ) -> List[Tuple[int, float]]:
+        """
+        Embeds a query and searches the index, going through the query cache for images.
+
+        Returns:
+            List[Tuple[int, float]]: (FAISS id, score) pairs, best first.
+        """
+        if self.metadata is None:
             self._load_database()
 
         query_embedding: np.ndarray
+        results_key = None
         if os.path.isfile(query):  # Check if query is a path to an image file
             query_path = Path(query)
             logger.info(f"Searching for images similar to image: {query_path}")
-            query_embedding = self._embed_image(query_path)
+            image = Image.open(query_path).convert("RGB")
+
+            if self.query_cache is None:
+                query_embedding = self._embed_pil_image(image)
+            else:
+                # Near-identical crops share a perceptual hash, so repeated views
+                # skip both CLIP and the index search. Result ids are only
+                # meaningful for one database, so its path is part of the key,
+                # as are the search settings that can change at runtime.
+                phash = perceptual_hash(image, self.hash_size)
+                results_key = (
+                    "matches",
+                    phash,
+                    self.model_name,
+                    str(self.db_path.resolve()),
+                    self.index_version,
+                    self.coarse_candidates,
+                    self.rerank_factor,
+                    top_k,
+                    category,
+                    label,
+                    merchant,
+                )
+                cached_results = self.query_cache.get(results_key)
+                if cached_results is not None:
+                    logger.info(f"Query cache hit for {query_path}")
+                    return list(cached_results)
+
+                embedding_key = ("embedding", phash, self.model_name)
+                query_embedding = self.query_cache.get(embedding_key)
+                if query_embedding is None:
+                    query_embedding = self._embed_pil_image(image)
+                    self.query_cache.put(embedding_key, query_embedding)
         else:  # Assume query is text
             text_query = str(query)
             logger.info(f"Searching for images similar to text: '{text_query}'")
@@ -266,16 +1053,112 @@ class ImageSimilaritySearch:
             1, -1
         )  # Shape (1, embedding_dim)
 
-        # Perform the search using FAISS
-        # For IndexFlatIP, scores are cosine similarities (higher is better)
-        scores, indices = self.index.search(query_embedding, top_k)
+        results = self._search_embedding(
+            query_embedding, top_k, category, label, merchant
+        )
 
-        # Retrieve the corresponding image paths
-        results = []
-        for i in range(len(indices[0])):
-            idx = indices[0][i]
-            if 0 <= idx < len(self.image_paths):
-                results.append(str(self.image_paths[idx]))
+        if results_key is not None:
+            self.query_cache.put(results_key, tuple(results))
 
         logger.info(f"Search completed. Found {len(results)} results.")
         return results
+
+    def _index_search(
+        self,
+        query_embedding: np.ndarray,
+        k: int,
+        selector: Optional[faiss.IDSelector],
+        index: Optional[faiss.Index] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Runs the FAISS search, restricted to the selector's ids when one is given.
+
+        Args:
+            query_embedding (np.ndarray): Query of shape (1, index dimension).
+            k (int): Number of results.
+            selector (Optional[faiss.IDSelector]): Partition restriction.
+            index (Optional[faiss.Index]): Index to search (defaults to the main index).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: FAISS (scores, indices) arrays of shape (1, k).
+        """
+        index = self.index if index is None else index
+        if selector is None:
+            return index.search(query_embedding, k)
+        if not isinstance(index, faiss.IndexPQ):
+            return index.search(
+                query_embedding, k, params=faiss.SearchParameters(sel=selector)
+            )
+
+        # IndexPQ does not accept ID selectors: over-fetch and filter, widening
+        # to the whole index if the partition is too sparse among the candidates
+        allowed = selector.ids_ref
+        fetch = min(index.ntotal, k * (index.ntotal // len(allowed) + 1))
+        while True:
+            scores, indices = index.search(query_embedding, fetch)
+            keep = np.isin(indices[0], allowed)
+            if keep.sum() >= k or fetch == index.ntotal:
+                return (
+                    scores[0][keep][:k].reshape(1, -1),
+                    indices[0][keep][:k].reshape(1, -1),
+                )
+            fetch = index.ntotal
+
+    def _search_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        category: Optional[str],
+        label: Optional[str],
+        merchant: Optional[str],
+    ) -> List[Tuple[int, float]]:
+        """
+        Searches the index with a normalized (1, dim) float32 query embedding.
+
+        Returns:
+            List[Tuple[int, float]]: (FAISS id, score) pairs, best first.
+        """
+        selector, partition_size = self._get_selector(category, label, merchant)
+        if partition_size == 0:
+            logger.info(
+                f"No catalog entries for category={category}, label={label}, "
+                f"merchant={merchant}"
+            )
+            return []
+
+        if (
+            self.coarse_candidates > 0
+            and self.coarse_index is not None
+            and self.full_embeddings is not None
+        ):
+            # Two-stage: cheap low-dimensional candidate retrieval, exact re-rank
+            rerank = True
+            k = min(max(self.coarse_candidates, top_k), partition_size)
+            scores, indices = self._index_search(
+                self._reduce(query_embedding), k, selector, index=self.coarse_index
+            )
+        else:
+            # Quantized indexes over-fetch candidates for exact float32 re-ranking
+            rerank = (
+                self.rerank_factor > 0
+                and self.full_embeddings is not None
+                and not self._is_exact_index()
+            )
+            k = min(top_k * self.rerank_factor if rerank else top_k, partition_size)
+
+            # Perform the search using FAISS
+            # For inner-product indexes, scores are cosine similarities (higher is better)
+            scores, indices = self._index_search(query_embedding, k, selector)
+
+        if rerank:
+            candidates = indices[0][indices[0] >= 0]
+            exact_scores = self.full_embeddings[candidates] @ query_embedding[0]
+            order = np.argsort(-exact_scores)[:top_k]
+            return [(int(candidates[i]), float(exact_scores[i])) for i in order]
+
+        # Drop FAISS padding ids (-1) when fewer than top_k vectors match
+        return [
+            (int(idx), float(score))
+            for idx, score in zip(indices[0], scores[0])
+            if 0 <= idx < len(self.metadata)
+        ]
@@ -0,0 +1,231 @@
+"""
+CPU inference runtime tuning for the PyTorch models.
+Applies per-process settings (intra-op and inter-op threads, core pinning) once,
+and per-model settings (bf16 autocast, channels-last, inference mode) around
+each forward pass, while recording per-model latency.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import torch
+from config import INFERENCE_RUNTIME_CONFIG, logger
+
+
+_process_configured = False
+_process_lock = threading.Lock()
+
+
+def parse_cpu_list(value: str) -> List[int]:
+    """
+    Parse a CPU list such as "0-3,8,10-11".
+
+    Args:
+        value: Comma-separated core ids and inclusive ranges
+
+    Returns:
+        Sorted list of core ids
+    """
+    cores = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.update(range(int(start), int(end) + 1))
+        else:
+            cores.add(int(part))
+    return sorted(cores)
+
+
+def cpu_supports_bf16() -> bool:
+    """
+    Check whether the CPU has native bf16 instructions (AVX512-BF16 or AMX).
+
+    Returns:
+        True if bf16 autocast is expected to be faster than float32
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def configure_process() -> None:
+    """
+    Apply process-wide runtime settings: core pinning and intra-op and inter-op
+    threads. Safe to call repeatedly; only the first call has an effect.
+
+    Thread counts are global to the process, so they are never changed around
+    individual forward passes, which may run concurrently from several jobs.
+    """
+    global _process_configured
+    with _process_lock:
+        if _process_configured:
+            return
+        _process_configured = True
+
+        config = INFERENCE_RUNTIME_CONFIG
+        affinity = os.environ.get(config.cpu_affinity_env) or config.cpu_affinity
+        if affinity and hasattr(os, "sched_setaffinity"):
+            cores = parse_cpu_list(affinity)
+            try:
+                os.sched_setaffinity(0, cores)
+                logger.info(f"Pinned inference worker to cores {cores}")
+            except OSError as e:
+                logger.warning(f"Could not pin worker to cores {cores}: {e}")
+
+        if config.intra_op_threads > 0:
+            torch.set_num_threads(config.intra_op_threads)
+
+        if config.inter_op_threads > 0:
+            try:
+                torch.set_interop_threads(config.inter_op_threads)
+            except RuntimeError as e:
+                # Only allowed before any inter-op parallel work has started
+                logger.warning(f"Could not set inter-op threads: {e}")
+
+        logger.info(
+            f"Inference runtime - intra-op threads: {torch.get_num_threads()}, "
+            f"inter-op threads: {torch.get_num_interop_threads()}"
+        )
+
+
+class ModelRuntime:
+    """
+    Runtime settings and latency statistics for one model.
+    """
+
+    def __init__(self, name: str, device: Optional[torch.device] = None):
+        """
+        Initialize the model runtime.
+
+        Args:
+            name: Model name used in reports
+            device: Device the model runs on (tuning only applies on CPU)
+        """
+        configure_process()
+        self.name = name
+        self.device = device or torch.device("cpu")
+
+        config = INFERENCE_RUNTIME_CONFIG
+        on_cpu = self.device.type == "cpu"
+        self.channels_last = config.channels_last and on_cpu
+        self.use_bf16 = config.use_bf16 and on_cpu and cpu_supports_bf16()
+        if config.use_bf16 and on_cpu and not self.use_bf16:
+            logger.info(f"{name}: CPU lacks native bf16, using float32")
+
+        self._latencies_ms: deque = deque(maxlen=config.latency_window)
+        self._lock = threading.Lock()
+
+    def prepare(self, model: torch.nn.Module) -> torch.nn.Module:
+        """
+        Put a loaded model in inference layout.
+
+        Args:
+            model: Loaded PyTorch model
+
+        Returns:
+            The model in eval mode (channels-last if enabled)
+        """
+        model.eval()
+        if self.channels_last:
+            model = model.to(memory_format=torch.channels_last)
+        return model
+
+    def prepare_inputs(self, inputs: Dict) -> Dict:
+        """
+        Convert 4-D image inputs to channels-last if enabled.
+
+        Args:
+            inputs: Processor outputs (e.g. with "pixel_values")
+
+        Returns:
+            The inputs, converted in place
+        """
+        if self.channels_last:
+            pixel_values = inputs.get("pixel_values")
+            if pixel_values is not None and pixel_values.dim() == 4:
+                inputs["pixel_values"] = pixel_values.contiguous(
+                    memory_format=torch.channels_last
+                )
+        return inputs
+
+    @contextmanager
+    def run(self) -> Iterator[None]:
+        """
+        Context for one forward pass: inference mode, optional bf16 autocast,
+        and latency recording.
+        """
+        start = time.perf_counter()
+        try:
+            with torch.inference_mode():
+                if self.use_bf16:
+                    with torch.autocast("cpu", dtype=torch.bfloat16):
+                        yield
+                else:
+                    yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._latencies_ms.append(elapsed_ms)
+
+    def stats(self) -> Dict:
+        """
+        Get latency statistics over the recent window.
+
+        Returns:
+            Dictionary with settings, call count and mean/p50/p95 latency (ms)
+        """
+        with self._lock:
+            latencies = np.array(self._latencies_ms, dtype=float)
+        report = {
+            "threads": torch.get_num_threads(),
+            "bf16": self.use_bf16,
+            "channels_last": self.channels_last,
+            "calls": int(latencies.size),
+        }
+        if latencies.size:
+            report.update(
+                mean_ms=round(float(latencies.mean()), 2),
+                p50_ms=round(float(np.percentile(latencies, 50)), 2),
+                p95_ms=round(float(np.percentile(latencies, 95)), 2),
+            )
+        return report
+
+
+_runtimes: Dict[str, ModelRuntime] = {}
+
+
+def get_runtime(name: str, device: Optional[torch.device] = None) -> ModelRuntime:
+    """
+    Get (or create) the runtime of a model.
+
+    Args:
+        name: One of "clothing", "person", "clip"
+        device: Device the model runs on
+
+    Returns:
+        Shared ModelRuntime for that model
+    """
+    if name not in _runtimes:
+        _runtimes[name] = ModelRuntime(name, device)
+    return _runtimes[name]
+
+
+def runtime_stats() -> Dict:
+    """
+    Get latency statistics of every model that has run.
+
+    Returns:
+        Dictionary keyed by model name
+    """
+    return {name: runtime.stats() for name, runtime in _runtimes.items()}
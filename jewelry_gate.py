@@ -0,0 +1,214 @@
+"""
+Jewelry detection gating module.
+Decides per frame whether the (remote) jewelry detector is worth calling, based
+on person size, upper-body visibility, shot continuity, the recent jewelry hit
+rate and a per-video request budget.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from config import JEWELRY_GATE_CONFIG, logger
+from frame_quality_assessor import FrameQualityAssessor
+
+
+class JewelryGate:
+    """
+    Per-video gating policy for the jewelry detector.
+
+    Create one instance per video. Call should_call() before each jewelry
+    detection and record() with its outcome. A call is one frame's detection,
+    which can send several requests (one per person region or tile); the
+    budget counts requests. Skipped calls are counted per reason, and each
+    skip adds the current hit-rate estimate to the expected number of missed
+    jewelry frames, from which the recall impact is estimated.
+    """
+
+    REASONS = (
+        "budget",
+        "small_person",
+        "no_upper_body",
+        "shot_no_jewelry",
+        "low_hit_rate",
+    )
+
+    def __init__(self, quality_assessor: FrameQualityAssessor):
+        """
+        Initialize the gate for one video.
+
+        Args:
+            quality_assessor: Assessor used for scene change detection
+        """
+        self.config = JEWELRY_GATE_CONFIG
+        self.quality_assessor = quality_assessor
+        self._face_cascade: Optional[cv2.CascadeClassifier] = None
+
+        self.calls = 0
+        self.requests = 0
+        self.hits = 0
+        self.skipped: Counter = Counter()
+        self.estimated_missed_hits = 0.0
+
+        # Optimistic prior so the first frames of a video are always checked
+        self.hit_rate = 1.0
+        self.shot_misses = 0
+        self.frames_since_call = 0
+        self._previous_frame: Optional[np.ndarray] = None
+
+    def should_call(
+        self,
+        frame: np.ndarray,
+        person_boxes: List[Tuple[int, int, int, int]],
+        clothing_detections: List[Dict],
+        requests: int = 1,
+    ) -> bool:
+        """
+        Decide whether to run the jewelry detector on a frame.
+
+        Args:
+            frame: OpenCV frame (BGR format)
+            person_boxes: Person boxes used for detection (empty = full frame)
+            clothing_detections: Clothing detections of the frame
+            requests: Detector requests the call would send
+
+        Returns:
+            True if the jewelry detector should be called
+        """
+        if not self.config.enable_gating:
+            return True
+
+        new_shot = self._previous_frame is None or (
+            self.quality_assessor.detect_scene_change(
+                self._previous_frame, frame, self.config.scene_change_threshold
+            )
+        )
+        self._previous_frame = frame
+        if new_shot:
+            self.shot_misses = 0
+
+        reason = self._skip_reason(
+            frame, person_boxes, clothing_detections, new_shot, requests
+        )
+        if reason is None:
+            self.frames_since_call = 0
+            return True
+
+        self.frames_since_call += 1
+        self.skipped[reason] += 1
+        self.estimated_missed_hits += self.hit_rate
+        logger.debug(f"Skipping jewelry detection ({reason})")
+        return False
+
+    def _skip_reason(
+        self,
+        frame: np.ndarray,
+        person_boxes: List[Tuple[int, int, int, int]],
+        clothing_detections: List[Dict],
+        new_shot: bool,
+        requests: int,
+    ) -> Optional[str]:
+        """
+        Get the reason to skip the jewelry call for a frame.
+
+        Returns:
+            Skip reason, or None if the detector should be called
+        """
+        budget = self.config.max_requests_per_video
+        if budget > 0 and self.requests + requests > budget:
+            return "budget"
+
+        height, width = frame.shape[:2]
+        if person_boxes:
+            largest = max((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in person_boxes)
+            if largest / (width * height) < self.config.min_person_area:
+                return "small_person"
+
+        if not self._upper_body_visible(frame, person_boxes, clothing_detections):
+            return "no_upper_body"
+
+        probe_due = self.frames_since_call >= self.config.probe_interval
+        if new_shot or probe_due:
+            return None
+        if self.shot_misses >= self.config.max_shot_misses:
+            return "shot_no_jewelry"
+        if self.hit_rate < self.config.min_hit_rate:
+            return "low_hit_rate"
+        return None
+
+    def _upper_body_visible(
+        self,
+        frame: np.ndarray,
+        person_boxes: List[Tuple[int, int, int, int]],
+        clothing_detections: List[Dict],
+    ) -> bool:
+        """
+        Check for a visible upper body: an upper-body garment, or a face in the
+        top part of a person region.
+
+        Returns:
+            True if an upper body (or face) is visible
+        """
+        upper_body_labels = set(self.config.upper_body_labels)
+        if any(d["label"] in upper_body_labels for d in clothing_detections):
+            return True
+        if not self.config.use_face_detection:
+            return False
+
+        if self._face_cascade is None:
+            self._face_cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+            )
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        for x1, y1, x2, y2 in person_boxes or [(0, 0, width, height)]:
+            # Faces are searched in the top third of the person region
+            y1, x1 = max(0, y1), max(0, x1)
+            top = gray[y1 : y1 + max(1, (y2 - y1) // 3), x1:x2]
+            if top.size == 0:
+                continue
+            faces = self._face_cascade.detectMultiScale(
+                top, scaleFactor=1.2, minNeighbors=4
+            )
+            if len(faces) > 0:
+                return True
+        return False
+
+    def record(self, jewelry_found: bool, requests: int = 1) -> None:
+        """
+        Record the outcome of a jewelry detector call.
+
+        Args:
+            jewelry_found: Whether the call returned any jewelry above threshold
+            requests: Detector requests the call sent
+        """
+        self.calls += 1
+        self.requests += requests
+        self.hits += int(jewelry_found)
+        self.shot_misses = 0 if jewelry_found else self.shot_misses + 1
+        alpha = self.config.hit_rate_smoothing
+        self.hit_rate = (1 - alpha) * self.hit_rate + alpha * float(jewelry_found)
+
+    def stats(self) -> Dict:
+        """
+        Get the gate's counters and the estimated recall impact.
+
+        Returns:
+            Dictionary with calls, requests, hits, skipped calls per reason,
+            the expected number of missed jewelry frames and the estimated
+            recall relative to calling the detector on every frame
+        """
+        expected_hits = self.hits + self.estimated_missed_hits
+        return {
+            "calls": self.calls,
+            "requests": self.requests,
+            "hits": self.hits,
+            "skipped": {reason: self.skipped[reason] for reason in self.REASONS},
+            "skipped_total": sum(self.skipped.values()),
+            "estimated_missed_hits": round(self.estimated_missed_hits, 2),
+            "estimated_recall": (
+                round(self.hits / expected_hits, 3) if expected_hits > 0 else 1.0
+            ),
+        }
@@ -0,0 +1,227 @@
+"""
+Live per-interval results of videos being processed.
+The processing job publishes each processed timestamp (products and bundles)
+and its progress; subscribers receive them as they happen, and partial results
+can be looked up before the job completes.
+"""
+
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from config import logger
+from models import ProductResult
+from results_cache import VideoResults
+
+
+class LiveVideo:
+    """
+    Partial results and subscribers of one video being processed.
+    """
+
+    def __init__(self):
+        """Initialize an empty live video."""
+        self.timestamps: List[float] = []
+        self.products: List[List[ProductResult]] = []
+        self.bundles: List[List[dict]] = []
+        self.progress = 0.0
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+
+
+class LiveResultsBroker:
+    """
+    In-process publish/subscribe of per-interval results.
+
+    Publishing is called from the processing thread; each subscriber gets an
+    asyncio queue fed on its own event loop. Events are dictionaries with an
+    "event" name ("frame", "progress" or "status") and a "data" payload.
+    """
+
+    def __init__(self):
+        """Initialize the broker."""
+        self._videos: Dict[str, LiveVideo] = {}
+        self._lock = threading.Lock()
+
+    def _publish(self, live: LiveVideo, event: Dict) -> None:
+        """Deliver an event to every subscriber of a video (lock held)."""
+        for loop, queue in live.subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def start(self, video_id: str) -> None:
+        """
+        Start collecting live results of a video, dropping any previous run.
+
+        Args:
+            video_id: Unique identifier of the video
+        """
+        with self._lock:
+            previous = self._videos.get(video_id)
+            live = LiveVideo()
+            if previous is not None:
+                live.subscribers = previous.subscribers
+            self._videos[video_id] = live
+
+    def publish_frame(
+        self,
+        video_id: str,
+        timestamp: float,
+        products: List[ProductResult],
+        bundles: List[dict],
+    ) -> None:
+        """
+        Publish the products and bundles of a processed timestamp.
+
+        Args:
+            video_id: Unique identifier of the video
+            timestamp: Frame timestamp in seconds
+            products: Products found at that timestamp
+            bundles: Bundles of those products
+        """
+        with self._lock:
+            live = self._videos.get(video_id)
+            if live is None:
+                return
+            live.timestamps.append(timestamp)
+            live.products.append(products)
+            live.bundles.append(bundles)
+            self._publish(
+                live,
+                {
+                    "event": "frame",
+                    "data": {
+                        "time": timestamp,
+                        "products": products,
+                        "bundles": bundles,
+                        "progress": live.progress,
+                    },
+                },
+            )
+
+    def publish_progress(self, video_id: str, progress: float) -> None:
+        """
+        Publish the fraction of the video processed so far.
+
+        Args:
+            video_id: Unique identifier of the video
+            progress: Processed fraction (0-1)
+        """
+        with self._lock:
+            live = self._videos.get(video_id)
+            if live is None:
+                return
+            live.progress = round(min(max(progress, 0.0), 1.0), 3)
+            self._publish(
+                live, {"event": "progress", "data": {"progress": live.progress}}
+            )
+
+    def finish(
+        self, video_id: str, status: str, error_message: Optional[str] = None
+    ) -> None:
+        """
+        Publish the final status of a video and drop its live results.
+
+        Args:
+            video_id: Unique identifier of the video
+            status: "completed" or "failed"
+            error_message: Error of a failed run
+        """
+        with self._lock:
+            live = self._videos.pop(video_id, None)
+            if live is None:
+                return
+            self._publish(
+                live,
+                {
+                    "event": "status",
+                    "data": {"status": status, "error_message": error_message},
+                },
+            )
+        logger.debug(
+            f"Live results of video {video_id} finished with {len(live.subscribers)} "
+            "subscribers"
+        )
+
+    def is_live(self, video_id: str) -> bool:
+        """
+        Check whether a video is being processed by this worker.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            True if live results are being collected for the video
+        """
+        with self._lock:
+            return video_id in self._videos
+
+    def subscribe(self, video_id: str) -> Optional[asyncio.Queue]:
+        """
+        Subscribe to a video's live results. The timestamps processed so far
+        are queued first, followed by the current progress.
+
+        Must be called from the event loop that consumes the queue.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            Queue of events, or None if the video is not being processed here
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            live = self._videos.get(video_id)
+            if live is None:
+                return None
+            for timestamp, products, bundles in zip(
+                live.timestamps, live.products, live.bundles
+            ):
+                queue.put_nowait(
+                    {
+                        "event": "frame",
+                        "data": {
+                            "time": timestamp,
+                            "products": products,
+                            "bundles": bundles,
+                            "progress": live.progress,
+                        },
+                    }
+                )
+            queue.put_nowait({"event": "progress", "data": {"progress": live.progress}})
+            live.subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, video_id: str, queue: asyncio.Queue) -> None:
+        """
+        Stop delivering a video's events to a queue.
+
+        Args:
+            video_id: Unique identifier of the video
+            queue: Queue returned by subscribe()
+        """
+        with self._lock:
+            live = self._videos.get(video_id)
+            if live is not None:
+                live.subscribers = [s for s in live.subscribers if s[1] is not queue]
+
+    def partial_results(self, video_id: str) -> Optional[VideoResults]:
+        """
+        Get the results processed so far.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            VideoResults of the processed timestamps, or None if the video is
+            not being processed here
+        """
+        with self._lock:
+            live = self._videos.get(video_id)
+            if live is None:
+                return None
+            timestamps = np.array(live.timestamps, dtype="float64")
+            products = list(live.products)
+            bundles = list(live.bundles)
+        # Timestamps are published in increasing order, so they are sorted
+        return VideoResults(timestamps, products, bundles, 0, "")
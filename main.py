@@ -2,16 +2,48 @@
 FastAPI endpoints for video processing and product discovery.
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import (
+    FastAPI,
+    UploadFile,
+    File,
+    Form,
+    HTTPException,
+    BackgroundTasks,
+    Request,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from typing import List, Optional
+from typing import List, Optional, Union
+import asyncio
+import time
 import uuid
 import os
 
 from video_processor import VideoProcessorManager
-from models import VideoInfo, ProductResult, VideoUploadResponse
-from config import logger
+from fast_responses import (
+    EMPTY_LIST,
+    EncodedPayload,
+    cache_validators,
+    dumps,
+    json_response,
+)
+from models import (
+    VideoInfo,
+    VideoSummary,
+    ProductResult,
+    ProductSpan,
+    ManifestItem,
+    VideoUploadResponse,
+)
+from product_manifest import manifest_version
+from config import (
+    LIVE_RESULTS_CONFIG,
+    MERCHANT_CATALOG_CONFIG,
+    STORAGE_CONFIG,
+    VIDEO_CONFIG,
+    logger,
+)
 
 app = FastAPI(title="Video Product Discovery API")
 
@@ -22,6 +54,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],
 )
 
 # Mount static files directory for serving videos
@@ -37,13 +70,16 @@ processor_manager = VideoProcessorManager()
 
 @app.post("/api/upload", response_model=VideoUploadResponse)
 async def upload_video(
-    file: UploadFile = File(...), background_tasks: BackgroundTasks = BackgroundTasks()
+    file: UploadFile = File(...),
+    merchant_id: Optional[str] = Form(None),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
 ):
     """
     Handle video upload and trigger processing.
 
     Args:
         file: Video file to upload
+        merchant_id: Merchant whose catalog products are matched against (optional)
         background_tasks: FastAPI background tasks for async processing
 
     Returns:
@@ -54,6 +90,17 @@ async def upload_video(
         if not file.content_type.startswith("video/"):
             raise HTTPException(status_code=400, detail="File must be a video")
 
+        # Validate the merchant catalog before accepting the upload
+        if merchant_id:
+            if not MERCHANT_CATALOG_CONFIG.enable_merchant_catalogs:
+                raise HTTPException(
+                    status_code=400, detail="Merchant catalogs are disabled"
+                )
+            if not processor_manager.has_merchant_catalog(merchant_id):
+                raise HTTPException(
+                    status_code=404, detail=f"No catalog for merchant: {merchant_id}"
+                )
+
         # Generate unique video ID
         video_id = str(uuid.uuid4())
 
@@ -74,6 +121,8 @@ async def upload_video(
             status="processing",
             file_path=file_path,
             results_dir=os.path.join(video_dir, "results"),
+            merchant_id=merchant_id or None,
+            created_at=time.time(),
         )
         processor_manager.add_video(video_info)
 
@@ -86,27 +135,85 @@ async def upload_video(
             status="processing",
         )
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
-@app.get("/api/videos", response_model=List[VideoInfo])
-async def get_videos():
+@app.get("/api/videos", response_model=List[Union[VideoInfo, VideoSummary]])
+def get_videos(
+    request: Request,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    order: str = "desc",
+    view: str = "full",
+):
     """
-    Fetch list of processed videos.
+    Fetch videos sorted by creation time: all of them, or one page when a
+    limit or cursor is given.
+
+    The cursor of the next page is returned in the X-Next-Cursor header (and
+    a Link header), and is absent on the last page.
+
+    Args:
+        request: Incoming request (for Accept-Encoding)
+        limit: Page size (default: all videos, or STORAGE_CONFIG.videos_page_size
+            when only a cursor is given)
+        cursor: X-Next-Cursor of the previous page
+        status: Only videos with this status ("processing", "completed", "failed")
+        order: "desc" (newest first) or "asc"
+        view: "full" (VideoInfo) or "summary" (VideoSummary)
 
     Returns:
-        List[VideoInfo]: List of video information
+        List[VideoInfo]: List of video information (or summaries)
     """
+    page_size = limit
+    if page_size is None and cursor is not None:
+        page_size = STORAGE_CONFIG.videos_page_size
+    if page_size is not None and not (
+        0 < page_size <= STORAGE_CONFIG.max_videos_page_size
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {STORAGE_CONFIG.max_videos_page_size}",
+        )
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if view not in ("full", "summary"):
+        raise HTTPException(
+            status_code=400, detail="view must be 'full' or 'summary'"
+        )
+
     try:
-        videos = processor_manager.get_all_videos()
-        return videos
+        videos, next_cursor = processor_manager.list_videos(
+            page_size,
+            cursor=cursor,
+            status=status,
+            newest_first=order == "desc",
+            summary=view == "summary",
+        )
+
+        headers = {}
+        if next_cursor is not None:
+            next_url = request.url.include_query_params(cursor=next_cursor)
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        return json_response(
+            request, EncodedPayload.from_content(videos), headers=headers
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch videos: {str(e)}")
 
 
 @app.get("/api/videos/{video_id}", response_model=VideoInfo)
-async def get_video_info(video_id: str):
+def get_video_info(video_id: str):
     """
     Fetch information for a single video.
 
@@ -133,12 +240,15 @@ async def get_video_info(video_id: str):
 
 
 @app.get("/api/results/{video_id}", response_model=List[ProductResult])
-async def get_results(video_id: str, time: Optional[float] = None):
+def get_results(
+    video_id: str, request: Request, time: Optional[float] = None
+):
     """
     Retrieve detected products for a specific video at a given time.
 
     Args:
         video_id: Unique identifier of the video
+        request: Incoming request (for Accept-Encoding)
         time: Timestamp to get results for (optional)
 
     Returns:
@@ -149,8 +259,9 @@ async def get_results(video_id: str, time: Optional[float] = None):
         if time is None:
             time = 0.0
 
-        results = processor_manager.get_results(video_id, time)
-        return results
+        # Serialized once per timestamp and cached with the video's results
+        payload = processor_manager.get_results_payload(video_id, time)
+        return json_response(request, payload)
 
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -161,304 +272,339 @@ async def get_results(video_id: str, time: Optional[float] = None):
 
 
 @app.get("/api/bundles/{video_id}")
-async def get_bundles(video_id: str, time: Optional[float] = None):
+def get_bundles(
+    video_id: str, request: Request, time: Optional[float] = None
+):
     """
     Get product bundles for a video at a specific timestamp.
-    Creates bundles by grouping complementary products.
+    With appearance spans enabled, bundles are built from the products
+    /api/results lists at that time; otherwise they are the bundles
+    precomputed for the closest processed frame.
 
     Args:
         video_id: Unique identifier of the video
+        request: Incoming request (for Accept-Encoding)
         time: Timestamp to get bundles for (optional)
 
     Returns:
         List[dict]: List of product bundles
     """
     try:
-        # Get products for this timestamp
-        products = processor_manager.get_results(video_id, time or 0.0)
-
-        if not products:
-            return []
-
-        # Group products by type and category
-        product_groups = {}
-        clothing_items = []
-        jewelry_items = []
-
-        for product in products:
-            obj_type = product.object_type
-            if obj_type not in product_groups:
-                product_groups[obj_type] = []
-            product_groups[obj_type].append(product)
-
-            # Separate by category for specialized bundling
-            if product.category == "clothing":
-                clothing_items.append(product)
-            elif product.category == "jewelry":
-                jewelry_items.append(product)
-
-        bundles = []
-
-        # Strategy 1: Create outfit bundles (top + bottom combinations)
-        if "top" in product_groups and "bottom" in product_groups:
-            for i, top in enumerate(product_groups["top"][:2]):  # Max 2 tops
-                for j, bottom in enumerate(
-                    product_groups["bottom"][:2]
-                ):  # Max 2 bottoms
-                    bundle = {
-                        "id": f"bundle-outfit-{video_id}-{time}-{i}-{j}",
-                        "name": f"Complete Outfit {i + 1}",
-                        "description": f"Stylish {top.object_type} and {bottom.object_type} combination",
-                        "total_price": 99.98,
-                        "discount_price": 79.98,
-                        "category": "outfit",
-                        "image_url": top.image_url,
-                        "product_ids": [top.title, bottom.title],
-                        "products": [
-                            {
-                                "object_type": top.object_type,
-                                "image_url": top.image_url,
-                                "title": top.title,
-                                "stock": top.stock,
-                                "direct_url": top.direct_url,
-                            },
-                            {
-                                "object_type": bottom.object_type,
-                                "image_url": bottom.image_url,
-                                "title": bottom.title,
-                                "stock": bottom.stock,
-                                "direct_url": bottom.direct_url,
-                            },
-                        ],
-                        "similarity_score": 0.85,
-                    }
-                    bundles.append(bundle)
-
-        # Strategy 2: Create layered look bundles (top + outer)
-        if "top" in product_groups and "outer" in product_groups and len(bundles) < 3:
-            for i, top in enumerate(product_groups["top"][:2]):
-                for j, outer in enumerate(product_groups["outer"][:2]):
-                    if len(bundles) >= 3:
-                        break
-                    bundle = {
-                        "id": f"bundle-layered-{video_id}-{time}-{i}-{j}",
-                        "name": f"Layered Look {i + 1}",
-                        "description": f"Stylish {top.object_type} with {outer.object_type}",
-                        "total_price": 129.98,
-                        "discount_price": 99.98,
-                        "category": "layered",
-                        "image_url": outer.image_url,
-                        "product_ids": [top.title, outer.title],
-                        "products": [
-                            {
-                                "object_type": top.object_type,
-                                "image_url": top.image_url,
-                                "title": top.title,
-                                "stock": top.stock,
-                                "direct_url": top.direct_url,
-                            },
-                            {
-                                "object_type": outer.object_type,
-                                "image_url": outer.image_url,
-                                "title": outer.title,
-                                "stock": outer.stock,
-                                "direct_url": outer.direct_url,
-                            },
-                        ],
-                        "similarity_score": 0.8,
-                    }
-                    bundles.append(bundle)
-
-        # Strategy 3: Create accessory bundles (any main item + accessories)
-        if len(bundles) < 3:
-            main_types = ["top", "bottom", "dress", "outer"]
-            acc_types = ["bag", "hat", "shoes", "accessory"]
-
-            for main_type in main_types:
-                if main_type in product_groups and len(bundles) < 3:
-                    main_item = product_groups[main_type][0]
-                    accessories = []
-                    for acc_type in acc_types:
-                        if acc_type in product_groups:
-                            accessories.extend(product_groups[acc_type][:1])
-
-                    if accessories:
-                        bundle_products = [
-                            {
-                                "object_type": main_item.object_type,
-                                "image_url": main_item.image_url,
-                                "title": main_item.title,
-                                "stock": main_item.stock,
-                                "direct_url": main_item.direct_url,
-                            }
-                        ]
-                        for acc in accessories[:2]:  # Max 2 accessories
-                            bundle_products.append(
-                                {
-                                    "object_type": acc.object_type,
-                                    "image_url": acc.image_url,
-                                    "title": acc.title,
-                                    "stock": acc.stock,
-                                    "direct_url": acc.direct_url,
-                                }
-                            )
-
-                        bundle = {
-                            "id": f"bundle-accessories-{video_id}-{time}-{main_type}",
-                            "name": "Complete Look",
-                            "description": f"{main_item.object_type.title()} with accessories",
-                            "total_price": 89.98 + (len(bundle_products) - 1) * 30,
-                            "discount_price": 69.98 + (len(bundle_products) - 1) * 20,
-                            "category": "accessories",
-                            "image_url": main_item.image_url,
-                            "product_ids": [p["title"] for p in bundle_products],
-                            "products": bundle_products,
-                            "similarity_score": 0.75,
-                        }
-                        bundles.append(bundle)
-                        break
-
-        # Strategy 4: Create jewelry sets (necklace + earrings, ring + bracelet, etc.)
-        if len(jewelry_items) >= 2 and len(bundles) < 3:
-            # Group jewelry by type
-            jewelry_groups = {}
-            for item in jewelry_items:
-                if item.object_type not in jewelry_groups:
-                    jewelry_groups[item.object_type] = []
-                jewelry_groups[item.object_type].append(item)
-
-            # Create complementary jewelry sets
-            jewelry_types = list(jewelry_groups.keys())
-            for i in range(min(2, len(jewelry_types) - 1)):
-                if len(bundles) >= 3:
-                    break
-                type1 = jewelry_types[i]
-                type2 = jewelry_types[i + 1]
-
-                item1 = jewelry_groups[type1][0]
-                item2 = jewelry_groups[type2][0]
-
-                bundle_products = [
-                    {
-                        "object_type": item1.object_type,
-                        "image_url": item1.image_url,
-                        "title": item1.title,
-                        "stock": item1.stock,
-                        "direct_url": item1.direct_url,
-                        "category": "jewelry",
-                    },
-                    {
-                        "object_type": item2.object_type,
-                        "image_url": item2.image_url,
-                        "title": item2.title,
-                        "stock": item2.stock,
-                        "direct_url": item2.direct_url,
-                        "category": "jewelry",
-                    },
-                ]
-
-                bundle = {
-                    "id": f"bundle-jewelry-{video_id}-{time}-{i}",
-                    "name": f"Jewelry Set {i + 1}",
-                    "description": f"Elegant {item1.object_type} and {item2.object_type} set",
-                    "total_price": 199.98,
-                    "discount_price": 149.98,
-                    "category": "jewelry",
-                    "image_url": item1.image_url,
-                    "product_ids": [item1.title, item2.title],
-                    "products": bundle_products,
-                    "similarity_score": 0.88,
-                }
-                bundles.append(bundle)
-
-        # Strategy 5: Create complete look bundles (clothing + jewelry)
-        if len(clothing_items) >= 1 and len(jewelry_items) >= 1 and len(bundles) < 3:
-            for i in range(min(2, len(clothing_items))):
-                if len(bundles) >= 3:
-                    break
-                clothing_item = clothing_items[i]
-                jewelry_item = jewelry_items[min(i, len(jewelry_items) - 1)]
-
-                bundle_products = [
-                    {
-                        "object_type": clothing_item.object_type,
-                        "image_url": clothing_item.image_url,
-                        "title": clothing_item.title,
-                        "stock": clothing_item.stock,
-                        "direct_url": clothing_item.direct_url,
-                        "category": "clothing",
-                    },
-                    {
-                        "object_type": jewelry_item.object_type,
-                        "image_url": jewelry_item.image_url,
-                        "title": jewelry_item.title,
-                        "stock": jewelry_item.stock,
-                        "direct_url": jewelry_item.direct_url,
-                        "category": "jewelry",
-                    },
-                ]
-
-                bundle = {
-                    "id": f"bundle-complete-{video_id}-{time}-{i}",
-                    "name": "Complete Look",
-                    "description": f"Stunning {clothing_item.object_type} with elegant {jewelry_item.object_type}",
-                    "total_price": 179.98,
-                    "discount_price": 139.98,
-                    "category": "complete",
-                    "image_url": clothing_item.image_url,
-                    "product_ids": [clothing_item.title, jewelry_item.title],
-                    "products": bundle_products,
-                    "similarity_score": 0.82,
-                }
-                bundles.append(bundle)
+        payload = processor_manager.get_bundles_payload(video_id, time or 0.0)
+        return json_response(request, payload)
+
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating bundles: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to create bundles: {str(e)}"
+        )
+
+
+@app.get("/api/videos/{video_id}/timeline")
+def get_timeline(video_id: str, request: Request):
+    """
+    Get every processed timestamp of a video with its products and bundles,
+    so clients can fetch once per video and seek locally.
 
-        # Strategy 6: Fallback - create bundles from any available products
-        if len(bundles) == 0 and len(products) >= 2:
-            # Group any 2-3 products together as a "Style Bundle"
-            bundle_size = min(3, len(products))
-            selected_products = products[:bundle_size]
+    The response carries a weak ETag derived from the results version;
+    a matching If-None-Match returns 304. Completed videos are cacheable
+    for VIDEO_CONFIG.timeline_max_age_seconds.
 
-            bundle_products = [
+    Args:
+        video_id: Unique identifier of the video
+        request: Incoming request (for If-None-Match)
+
+    Returns:
+        dict: Video status, interval and frames with products and bundles
+    """
+    try:
+        video_info = processor_manager.get_video(video_id)
+        video_results = processor_manager.get_timeline(video_id)
+
+        if video_results is None:
+            # Not completed yet: nothing to cache
+            payload = EncodedPayload.from_content(
                 {
-                    "object_type": p.object_type,
-                    "image_url": p.image_url,
-                    "title": p.title,
-                    "stock": p.stock,
-                    "direct_url": p.direct_url,
+                    "video_id": video_id,
+                    "status": video_info.status,
+                    "interval_seconds": VIDEO_CONFIG.interval_seconds,
+                    "frames": [],
                 }
-                for p in selected_products
-            ]
+            )
+            return json_response(
+                request, payload, headers={"Cache-Control": "no-cache"}
+            )
 
-            product_types = [p.object_type for p in selected_products]
-            product_types_str = " + ".join(product_types)
-
-            bundle = {
-                "id": f"bundle-style-{video_id}-{time}",
-                "name": "Style Bundle",
-                "description": f"Featured items: {product_types_str}",
-                "total_price": 69.98 * bundle_size,
-                "discount_price": 49.98 * bundle_size,
-                "category": "style",
-                "image_url": selected_products[0].image_url,
-                "product_ids": [p.title for p in selected_products],
-                "products": bundle_products,
-                "similarity_score": 0.7,
+        headers, not_modified = cache_validators(
+            request, video_results.version, VIDEO_CONFIG.timeline_max_age_seconds
+        )
+        if not_modified:
+            return Response(status_code=304, headers=headers)
+
+        def build_timeline() -> dict:
+            frames = [
+                {"time": timestamp, "products": products, "bundles": bundles}
+                for timestamp, products, bundles in zip(
+                    video_results.timestamps.tolist(),
+                    video_results.products,
+                    video_results.bundles,
+                )
+            ]
+            return {
+                "video_id": video_id,
+                "status": video_info.status,
+                "interval_seconds": VIDEO_CONFIG.interval_seconds,
+                "frames": frames,
             }
-            bundles.append(bundle)
 
-            logger.info(
-                f"Created fallback bundle with {bundle_size} products for video {video_id} at {time}s"
+        # Serialized once and cached with the video's results
+        payload = video_results.payload(
+            "timeline", build_timeline, exclude_none=True
+        )
+        return json_response(request, payload, headers=headers)
+
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error building timeline: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to fetch timeline: {str(e)}"
+        )
+
+
+@app.get("/api/videos/{video_id}/products", response_model=List[ManifestItem])
+def get_product_manifest(video_id: str, request: Request):
+    """
+    Get the product manifest of a completed video: each catalog item once,
+    with total screen time, first appearance, peak confidence and a
+    representative crop, most prominent first.
+
+    Cached like the timeline (weak ETag, 304 on If-None-Match).
+
+    Args:
+        video_id: Unique identifier of the video
+        request: Incoming request (for If-None-Match and Accept-Encoding)
+
+    Returns:
+        List[ManifestItem]: Manifest items ranked by prominence
+    """
+    try:
+        video_results = processor_manager.get_timeline(video_id)
+        payload = processor_manager.get_manifest_payload(video_id)
+        if video_results is None or payload is None:
+            return json_response(
+                request, EMPTY_LIST, headers={"Cache-Control": "no-cache"}
             )
 
-        logger.info(f"Created {len(bundles)} bundles for video {video_id} at {time}s")
-        return bundles[:3]  # Return max 3 bundles
+        headers, not_modified = cache_validators(
+            request,
+            f"{video_results.version}-m{manifest_version()}",
+            VIDEO_CONFIG.timeline_max_age_seconds,
+        )
+        if not_modified:
+            return Response(status_code=304, headers=headers)
+        return json_response(request, payload, headers=headers)
 
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"Error creating bundles: {e}")
+        logger.error(f"Error fetching product manifest: {e}")
         raise HTTPException(
-            status_code=500, detail=f"Failed to create bundles: {str(e)}"
+            status_code=500, detail=f"Failed to fetch products: {str(e)}"
+        )
+
+
+@app.get("/api/videos/{video_id}/spans", response_model=List[ProductSpan])
+def get_spans(video_id: str, request: Request):
+    """
+    Get the appearance spans of a completed video: each product once per
+    continuous appearance, with start/end times and peak confidence.
+
+    Args:
+        video_id: Unique identifier of the video
+        request: Incoming request (for Accept-Encoding)
+
+    Returns:
+        List[ProductSpan]: Spans ordered by start time
+    """
+    try:
+        payload = processor_manager.get_spans_payload(video_id)
+        if payload is None:
+            payload = EMPTY_LIST
+        return json_response(request, payload)
+
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching spans: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to fetch spans: {str(e)}"
+        )
+
+
+def format_event(event: str, data: dict) -> str:
+    """
+    Format a Server-Sent Events message.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        str: SSE message
+    """
+    payload = dumps(data, exclude_none=True).decode()
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@app.get("/api/videos/{video_id}/stream")
+async def stream_results(video_id: str):
+    """
+    Stream a video's results as Server-Sent Events while it is processed.
+
+    Timestamps processed so far are sent first, then each new timestamp as it
+    completes ("frame" events with products, bundles and progress), job
+    progress ("progress" events) and finally the job outcome ("status" event),
+    after which the stream ends. For a video that is not being processed by
+    this worker only the "status" event is sent.
+
+    Args:
+        video_id: Unique identifier of the video
+
+    Returns:
+        StreamingResponse: text/event-stream of result events
+    """
+    try:
+        queue = processor_manager.subscribe_live_results(video_id)
+        video_info = processor_manager.get_video(video_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def event_stream():
+        if queue is None:
+            yield format_event(
+                "status",
+                {
+                    "status": video_info.status,
+                    "error_message": video_info.error_message,
+                },
+            )
+            return
+
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=LIVE_RESULTS_CONFIG.keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event["event"], event["data"])
+                if event["event"] == "status":
+                    return
+        finally:
+            processor_manager.unsubscribe_live_results(video_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/products/{product_id:path}/appearances")
+def get_product_appearances(
+    product_id: str, limit: Optional[int] = None, cursor: Optional[str] = None
+):
+    """
+    Get the videos and timestamps a catalog product appears at.
+
+    Args:
+        product_id: Catalog image path of the product (e.g.
+            image_db/clothing/ (24).jpg), unique across catalogs
+        limit: Page size (default STORAGE_CONFIG.appearances_page_size)
+        cursor: next_cursor returned with the previous page
+
+    Returns:
+        dict: Appearances ordered by video and timestamp, and the next cursor
+    """
+    page_size = STORAGE_CONFIG.appearances_page_size if limit is None else limit
+    if not 0 < page_size <= STORAGE_CONFIG.max_appearances_page_size:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "limit must be between 1 and "
+                f"{STORAGE_CONFIG.max_appearances_page_size}"
+            ),
+        )
+
+    try:
+        return processor_manager.get_product_appearances(
+            product_id, page_size, cursor
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching product appearances: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to fetch appearances: {str(e)}"
+        )
+
+
+@app.get("/api/admin/similarity")
+def get_similarity_stats():
+    """
+    Similarity search metrics: query cache counters and shard health/latency.
+    Shard health checks are blocking round-trips, so this runs in the
+    threadpool rather than on the event loop.
+
+    Returns:
+        dict: Search statistics
+    """
+    try:
+        return processor_manager.get_search_stats()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to fetch search stats: {str(e)}"
+        )
+
+
+@app.get("/api/admin/runtime")
+async def get_runtime_stats():
+    """
+    Get per-model inference runtime settings and latency.
+
+    Returns:
+        dict: Threads, bf16, channels-last and latency statistics per model
+    """
+    try:
+        return processor_manager.get_runtime_stats()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to fetch runtime stats: {str(e)}"
+        )
+
+
+@app.post("/api/admin/similarity/reload")
+async def reload_similarity_indexes():
+    """
+    Load newly published similarity database versions in the background and
+    swap them in without interrupting in-flight searches.
+
+    Returns:
+        dict: Status of each loaded index
+    """
+    try:
+        return processor_manager.reload_similarity_indexes()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to reload indexes: {str(e)}"
         )
 
 
@@ -18,6 +18,19 @@ class VideoInfo(BaseModel):
     results_dir: Optional[str] = None
     error_message: Optional[str] = None
     video_url: Optional[str] = None
+    merchant_id: Optional[str] = None  # Merchant whose catalog is searched
+    created_at: Optional[float] = None  # Upload time (Unix seconds)
+
+
+class VideoSummary(BaseModel):
+    """
+    Lightweight projection of VideoInfo for video listings.
+    """
+
+    id: str
+    filename: str
+    status: str
+    created_at: Optional[float] = None
 
 
 class ProductResult(BaseModel):
@@ -31,6 +44,36 @@ class ProductResult(BaseModel):
     title: str  # Product title (dummy data)
     stock: str  # Stock status (dummy data: "In Stock" or "Out of Stock")
     direct_url: str  # Direct URL to product page (dummy data)
+    product_id: Optional[int] = None  # Catalog product ID
+    price: Optional[float] = None  # Catalog price, if known
+    person_index: Optional[int] = None  # Person region the item was detected on
+
+
+class ProductSpan(BaseModel):
+    """
+    Model representing a continuous appearance of one product in a video.
+    """
+
+    product: ProductResult
+    start: float  # Seconds
+    end: float  # Seconds
+    confidence: float  # Peak detection confidence
+    frames: int  # Sampled frames the product was matched in
+
+
+class ManifestItem(BaseModel):
+    """
+    Model representing one catalog item in a video's product manifest.
+    """
+
+    product: ProductResult
+    screen_time: float  # Seconds on screen, over all appearances
+    first_appearance: float  # Seconds
+    appearances: int  # Continuous appearances
+    frames: int  # Sampled frames the product was matched in
+    peak_confidence: float
+    crop_url: Optional[str] = None  # Crop of the most confident sighting
+    prominence: float  # Screen time weighted by peak confidence
 
 
 class VideoUploadResponse(BaseModel):
@@ -6,8 +6,9 @@ Handles model loading and object detection operations.
 import torch
 from PIL import Image
 from transformers import AutoImageProcessor, AutoModelForObjectDetection
-from typing import Dict, Any
+from typing import Dict, Any, List
 from config import MODEL_CONFIG, logger
+from inference_runtime import get_runtime
 
 
 class ClothingDetector:
@@ -24,6 +25,7 @@ class ClothingDetector:
         """
         self.checkpoint = checkpoint or MODEL_CONFIG.checkpoint
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.runtime = get_runtime("clothing", self.device)
         self.image_processor = None
         self.model = None
         self._load_model()
@@ -36,9 +38,11 @@ class ClothingDetector:
             logger.info(f"Loading model from checkpoint: {self.checkpoint}")
             self.image_processor = AutoImageProcessor.from_pretrained(self.checkpoint)
             logger.info("Image processor loaded successfully")
-            self.model = AutoModelForObjectDetection.from_pretrained(
-                self.checkpoint
-            ).to(self.device)
+            self.model = self.runtime.prepare(
+                AutoModelForObjectDetection.from_pretrained(self.checkpoint).to(
+                    self.device
+                )
+            )
             logger.info(f"Model loaded successfully from {self.checkpoint}")
         except Exception as e:
             logger.error(f"Error loading model: {e}")
@@ -54,15 +58,32 @@ class ClothingDetector:
         Returns:
             Dict: Detection results with boxes, labels, and scores
         """
-        with torch.no_grad():
-            inputs = self.image_processor(images=[image], return_tensors="pt")
-            outputs = self.model(**inputs.to(self.device))
-            target_sizes = torch.tensor([[image.size[1], image.size[0]]])
-            results = self.image_processor.post_process_object_detection(
-                outputs,
-                threshold=MODEL_CONFIG.confidence_threshold,
-                target_sizes=target_sizes,
-            )[0]
+        return self.detect_objects_batch([image])[0]
+
+    def detect_objects_batch(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """
+        Perform object detection on several images in one forward pass.
+
+        Args:
+            images (List[Image.Image]): Input PIL images (sizes may differ)
+
+        Returns:
+            List[Dict]: Detection results with boxes, labels, and scores, per image
+        """
+        inputs = self.image_processor(images=images, return_tensors="pt")
+        inputs = self.runtime.prepare_inputs(inputs.to(self.device))
+        with self.runtime.run():
+            outputs = self.model(**inputs)
+
+        # Post-process in float32 so bf16 autocast does not round the boxes
+        outputs.logits = outputs.logits.float()
+        outputs.pred_boxes = outputs.pred_boxes.float()
+        target_sizes = torch.tensor([[image.size[1], image.size[0]] for image in images])
+        results = self.image_processor.post_process_object_detection(
+            outputs,
+            threshold=MODEL_CONFIG.confidence_threshold,
+            target_sizes=target_sizes,
+        )
 
         return results
 
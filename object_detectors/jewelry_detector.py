@@ -3,10 +3,12 @@ Jewelry detection module using Roboflow API.
 Handles jewelry object detection operations.
 """
 
+import math
 from PIL import Image
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from inference_sdk import InferenceHTTPClient
 from config import JEWELRY_CONFIG, logger
+from crop_triage import non_max_suppression
 import numpy as np
 
 
@@ -55,55 +57,33 @@ class JewelryDetector:
             Dict: Detection results with boxes, labels, and scores in format compatible
                   with ClothingDetector (for consistency)
         """
+        return self.detect_objects_batch([image])[0]
+
+    def detect_objects_batch(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """
+        Perform jewelry detection on several images with one inference request.
+
+        Args:
+            images: Input PIL images
+
+        Returns:
+            List of detection results (one per image) with boxes, labels, and scores
+        """
         try:
             # Convert PIL Image to numpy array (Roboflow SDK accepts numpy arrays, not BytesIO)
-            image_np = np.array(image)
+            images_np = [np.array(image) for image in images]
 
             # Perform inference
             logger.debug(
-                f"Calling Roboflow API for jewelry detection (model: {self.model_id})"
-            )
-            result = self.client.infer(image_np, model_id=self.model_id)
-
-            # Log raw API response for debugging
-            logger.debug(f"Roboflow API response: {result}")
-
-            # Convert Roboflow format to our standard format (matching ClothingDetector)
-            predictions = result.get("predictions", [])
-            logger.info(f"Jewelry detector found {len(predictions)} raw predictions")
-
-            # Build lists of boxes, labels, and scores
-            boxes = []
-            labels = []
-            scores = []
-
-            for i, pred in enumerate(predictions):
-                # Convert center-based box to corner-based box [x1, y1, x2, y2]
-                x_center = pred["x"]
-                y_center = pred["y"]
-                width = pred["width"]
-                height = pred["height"]
-
-                x1 = x_center - width / 2
-                y1 = y_center - height / 2
-                x2 = x_center + width / 2
-                y2 = y_center + height / 2
-
-                boxes.append([x1, y1, x2, y2])
-                labels.append(pred["class"])
-                scores.append(pred["confidence"])
-
-                logger.debug(
-                    f"  Prediction {i + 1}: {pred['class']} (confidence: {pred['confidence']:.3f})"
-                )
-
-            # Log summary
-            above_threshold = sum(1 for s in scores if s >= self.confidence_threshold)
-            logger.info(
-                f"Jewelry detection: {above_threshold}/{len(predictions)} predictions above threshold {self.confidence_threshold}"
+                f"Calling Roboflow API for jewelry detection on {len(images)} "
+                f"image(s) (model: {self.model_id})"
             )
+            if len(images_np) == 1:
+                results = [self.client.infer(images_np[0], model_id=self.model_id)]
+            else:
+                results = self.client.infer(images_np, model_id=self.model_id)
 
-            return {"boxes": boxes, "labels": labels, "scores": scores}
+            return [self._parse_predictions(result) for result in results]
 
         except Exception as e:
             logger.error(f"Error during jewelry detection: {e}", exc_info=True)
@@ -113,7 +93,193 @@ class JewelryDetector:
             logger.error(
                 "This may be due to: (1) Invalid API key, (2) Network issues, (3) Roboflow service down"
             )
-            return {"boxes": [], "labels": [], "scores": []}
+            return [{"boxes": [], "labels": [], "scores": []} for _ in images]
+
+    def _parse_predictions(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a Roboflow response to boxes, labels, and scores.
+
+        Args:
+            result: Raw Roboflow API response for one image
+
+        Returns:
+            Dict: Detection results with corner-based boxes, labels, and scores
+        """
+        # Log raw API response for debugging
+        logger.debug(f"Roboflow API response: {result}")
+
+        # Convert Roboflow format to our standard format (matching ClothingDetector)
+        predictions = result.get("predictions", [])
+        logger.info(f"Jewelry detector found {len(predictions)} raw predictions")
+
+        # Build lists of boxes, labels, and scores
+        boxes = []
+        labels = []
+        scores = []
+
+        for i, pred in enumerate(predictions):
+            # Convert center-based box to corner-based box [x1, y1, x2, y2]
+            x_center = pred["x"]
+            y_center = pred["y"]
+            width = pred["width"]
+            height = pred["height"]
+
+            x1 = x_center - width / 2
+            y1 = y_center - height / 2
+            x2 = x_center + width / 2
+            y2 = y_center + height / 2
+
+            boxes.append([x1, y1, x2, y2])
+            labels.append(pred["class"])
+            scores.append(pred["confidence"])
+
+            logger.debug(
+                f"  Prediction {i + 1}: {pred['class']} (confidence: {pred['confidence']:.3f})"
+            )
+
+        # Log summary
+        above_threshold = sum(1 for s in scores if s >= self.confidence_threshold)
+        logger.info(
+            f"Jewelry detection: {above_threshold}/{len(predictions)} predictions above threshold {self.confidence_threshold}"
+        )
+
+        return {"boxes": boxes, "labels": labels, "scores": scores}
+
+    def _tile_grid(
+        self, width: int, height: int, max_tiles: int
+    ) -> List[Tuple[int, int, int, int]]:
+        """
+        Compute overlapping tiles covering an image within a tile budget.
+        Tiles start at the configured size and grow until the grid fits.
+
+        Args:
+            width: Image width in pixels
+            height: Image height in pixels
+            max_tiles: Tiles available for the image, including the full view
+
+        Returns:
+            List of (x1, y1, x2, y2) tiles
+        """
+        budget = max_tiles - int(JEWELRY_CONFIG.include_full_view)
+        if budget <= 0:
+            return []
+
+        def axis_starts(length: int, tile: int) -> List[int]:
+            if length <= tile:
+                return [0]
+            stride = max(1, int(tile * (1 - JEWELRY_CONFIG.tile_overlap)))
+            count = math.ceil((length - tile) / stride) + 1
+            return [int(round(p)) for p in np.linspace(0, length - tile, count)]
+
+        tile = JEWELRY_CONFIG.tile_size
+        while True:
+            xs = axis_starts(width, tile)
+            ys = axis_starts(height, tile)
+            if len(xs) * len(ys) <= budget:
+                break
+            tile = int(tile * 1.25)
+
+        if len(xs) == 1 and len(ys) == 1:
+            # The image fits in a single tile: the full view already covers it
+            return [] if JEWELRY_CONFIG.include_full_view else [(0, 0, width, height)]
+        return [
+            (x, y, min(x + tile, width), min(y + tile, height)) for y in ys for x in xs
+        ]
+
+    def tile_plan(
+        self, images: List[Image.Image]
+    ) -> List[List[Tuple[int, int, int, int]]]:
+        """
+        Plan the tiles of the images of one frame (e.g. its person regions).
+        The frame's max_tiles_per_frame budget is split evenly across the
+        images, each getting at least its full view.
+
+        Args:
+            images: Input PIL images
+
+        Returns:
+            List of (x1, y1, x2, y2) tiles per image, full view first
+        """
+        max_tiles = max(1, JEWELRY_CONFIG.max_tiles_per_frame // max(1, len(images)))
+        plan = []
+        for image in images:
+            width, height = image.size
+            tiles = self._tile_grid(width, height, max_tiles)
+            if JEWELRY_CONFIG.include_full_view or not tiles:
+                tiles.insert(0, (0, 0, width, height))
+            plan.append(tiles)
+        return plan
+
+    def detect_objects_tiled(
+        self,
+        images: List[Image.Image],
+        plan: Optional[List[List[Tuple[int, int, int, int]]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform jewelry detection on overlapping native-resolution tiles of
+        the images of one frame, merging each image's per-tile results with
+        NMS. The tiles of all images share one budget (see tile_plan) and are
+        sent together in batches of tile_batch_size. Boxes are returned in
+        image coordinates, in the same format as detect_objects.
+
+        Args:
+            images: Input PIL images (typically the person regions of a frame)
+            plan: Tiles per image from tile_plan (computed if not given)
+
+        Returns:
+            List of detection results (one per image) with boxes, labels, and scores
+        """
+        if plan is None:
+            plan = self.tile_plan(images)
+        jobs = [
+            (image_index, region)
+            for image_index, regions in enumerate(plan)
+            for region in regions
+        ]
+
+        boxes: List[List[List[float]]] = [[] for _ in images]
+        labels: List[List[str]] = [[] for _ in images]
+        scores: List[List[float]] = [[] for _ in images]
+        batch_size = max(1, JEWELRY_CONFIG.tile_batch_size)
+        for start in range(0, len(jobs), batch_size):
+            batch = jobs[start : start + batch_size]
+            results = self.detect_objects_batch(
+                [images[i].crop(region) for i, region in batch]
+            )
+            for (i, (x1, y1, _, _)), result in zip(batch, results):
+                for box, label, score in zip(
+                    result["boxes"], result["labels"], result["scores"]
+                ):
+                    boxes[i].append(
+                        [box[0] + x1, box[1] + y1, box[2] + x1, box[3] + y1]
+                    )
+                    labels[i].append(label)
+                    scores[i].append(score)
+
+        merged = []
+        for i in range(len(images)):
+            if not boxes[i]:
+                merged.append({"boxes": [], "labels": [], "scores": []})
+                continue
+            keep = non_max_suppression(
+                np.array(boxes[i], dtype="float32"),
+                np.array(scores[i], dtype="float32"),
+                JEWELRY_CONFIG.tile_nms_iou,
+                groups=np.array(labels[i]),
+            )
+            merged.append(
+                {
+                    "boxes": [boxes[i][k] for k in keep],
+                    "labels": [labels[i][k] for k in keep],
+                    "scores": [scores[i][k] for k in keep],
+                }
+            )
+        logger.info(
+            f"Tiled jewelry detection: {len(jobs)} tiles over {len(images)} "
+            f"image(s), {sum(len(m['boxes']) for m in merged)} predictions "
+            "after merging"
+        )
+        return merged
 
     def get_label_name(self, label: Any) -> str:
         """
@@ -9,6 +9,7 @@ from transformers import AutoImageProcessor, AutoModelForObjectDetection
 from typing import List, Tuple, Optional
 import numpy as np
 from config import PERSON_DETECTION_CONFIG, logger
+from inference_runtime import get_runtime
 
 
 class PersonDetector:
@@ -26,6 +27,7 @@ class PersonDetector:
         """
         self.checkpoint = checkpoint or PERSON_DETECTION_CONFIG.checkpoint
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.runtime = get_runtime("person", self.device)
         self.confidence_threshold = PERSON_DETECTION_CONFIG.confidence_threshold
         self.min_person_area = PERSON_DETECTION_CONFIG.min_person_area
 
@@ -43,9 +45,11 @@ class PersonDetector:
         try:
             logger.info(f"Loading person detection model from: {self.checkpoint}")
             self.image_processor = AutoImageProcessor.from_pretrained(self.checkpoint)
-            self.model = AutoModelForObjectDetection.from_pretrained(
-                self.checkpoint
-            ).to(self.device)
+            self.model = self.runtime.prepare(
+                AutoModelForObjectDetection.from_pretrained(self.checkpoint).to(
+                    self.device
+                )
+            )
             logger.info("Person detection model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading person detection model: {e}")
@@ -73,17 +77,20 @@ class PersonDetector:
 
         try:
             # Prepare image for inference
-            with torch.no_grad():
-                inputs = self.image_processor(images=image, return_tensors="pt")
-                outputs = self.model(**inputs.to(self.device))
-
-                # Post-process to get bounding boxes
-                target_sizes = torch.tensor([[image.size[1], image.size[0]]])
-                results = self.image_processor.post_process_object_detection(
-                    outputs,
-                    threshold=self.confidence_threshold,
-                    target_sizes=target_sizes,
-                )[0]
+            inputs = self.image_processor(images=image, return_tensors="pt")
+            inputs = self.runtime.prepare_inputs(inputs.to(self.device))
+            with self.runtime.run():
+                outputs = self.model(**inputs)
+
+            # Post-process to get bounding boxes (in float32, see ClothingDetector)
+            outputs.logits = outputs.logits.float()
+            outputs.pred_boxes = outputs.pred_boxes.float()
+            target_sizes = torch.tensor([[image.size[1], image.size[0]]])
+            results = self.image_processor.post_process_object_detection(
+                outputs,
+                threshold=self.confidence_threshold,
+                target_sizes=target_sizes,
+            )[0]
 
             # Filter for person class (class_id = 1 in COCO dataset used by DETR)
             person_boxes = []
@@ -158,6 +165,30 @@ class PersonDetector:
 
         return primary_box
 
+    def get_person_boxes(self, image: Image.Image) -> List[Tuple[int, int, int, int]]:
+        """
+        Get the bounding boxes of all persons above the minimum area,
+        most confident first, up to max_persons_per_frame.
+
+        Args:
+            image: PIL Image object
+
+        Returns:
+            List of (x1, y1, x2, y2) tuples (empty if no person detected)
+        """
+        has_person, boxes, confidences = self.detect_persons(image)
+
+        if not has_person or not boxes:
+            return []
+
+        order = sorted(range(len(boxes)), key=lambda i: confidences[i], reverse=True)
+        max_persons = PERSON_DETECTION_CONFIG.max_persons_per_frame
+        if max_persons > 0:
+            order = order[:max_persons]
+
+        logger.debug(f"Person boxes: {[boxes[i] for i in order]}")
+        return [boxes[i] for i in order]
+
     def crop_to_person(
         self, image: Image.Image, padding: float = 0.1
     ) -> Optional[Image.Image]:
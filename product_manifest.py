@@ -0,0 +1,150 @@
+"""
+Video-level product manifest.
+Aggregates a video's per-frame matches into one entry per catalog item, with
+total screen time, first appearance, peak confidence and a representative
+crop, ranked by prominence. Built as a processing stage and stored next to the
+detection results.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from appearance_spans import merge_sightings
+from config import APPEARANCE_SPAN_CONFIG, VIDEO_CONFIG
+from fast_responses import dumps
+from models import ProductResult
+
+
+# Bump when the manifest layout or ranking changes, so stored manifests are
+# rebuilt (see manifest_version for the settings they also depend on)
+MANIFEST_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+
+PRODUCT_FIELDS = tuple(
+    getattr(ProductResult, "model_fields", None) or ProductResult.__fields__
+)
+
+
+def manifest_version() -> str:
+    """
+    Get the version of manifests built with the current settings: the layout
+    version plus the span settings and sampling interval screen times depend on.
+
+    Returns:
+        Version string stored with manifests and used in their ETags
+    """
+    return (
+        f"{MANIFEST_VERSION}"
+        f"-g{APPEARANCE_SPAN_CONFIG.max_gap_intervals}"
+        f"-p{APPEARANCE_SPAN_CONFIG.padding_intervals}"
+        f"-i{VIDEO_CONFIG.interval_seconds}"
+    )
+
+
+def build_manifest(
+    video_id: str, frames_data: Dict[float, List[Dict]]
+) -> List[Dict]:
+    """
+    Build a video's product manifest.
+
+    Screen time is the total length of an item's appearance spans (see
+    merge_sightings), and prominence is screen time weighted by peak
+    confidence. The first appearance is the time of the item's first
+    sighting, without span padding. The representative crop is the crop of
+    the item's most confident sighting.
+
+    Args:
+        video_id: Unique identifier of the video
+        frames_data: Dictionary of frame timestamps to product results
+
+    Returns:
+        Manifest items, most prominent first
+    """
+    timestamps = sorted(frames_data)
+    appearances = merge_sightings(
+        timestamps,
+        [frames_data[t] for t in timestamps],
+        VIDEO_CONFIG.interval_seconds,
+    )
+
+    items: Dict[str, Dict] = {}
+    for appearance in appearances:
+        item = items.get(appearance["key"])
+        if item is None:
+            item = items[appearance["key"]] = {
+                "screen_time": 0.0,
+                "first_appearance": appearance["first_seen"],
+                "appearances": 0,
+                "frames": 0,
+                "peak_confidence": -1.0,
+                "best": None,
+            }
+        item["first_appearance"] = min(
+            item["first_appearance"], appearance["first_seen"]
+        )
+        item["screen_time"] += appearance["end"] - appearance["start"]
+        item["appearances"] += 1
+        item["frames"] += appearance["frames"]
+        if appearance["confidence"] > item["peak_confidence"]:
+            item["peak_confidence"] = appearance["confidence"]
+            item["best"] = appearance["product"]
+
+    manifest = []
+    for item in items.values():
+        best = item.pop("best")
+        crop_path = best.get("crop_path")
+        manifest.append(
+            {
+                "product": {k: best[k] for k in PRODUCT_FIELDS if k in best},
+                "screen_time": round(item["screen_time"], 2),
+                "first_appearance": round(item["first_appearance"], 2),
+                "appearances": item["appearances"],
+                "frames": item["frames"],
+                "peak_confidence": round(item["peak_confidence"], 4),
+                "crop_url": (
+                    f"/static_videos/{video_id}/results/{crop_path}"
+                    if crop_path
+                    else None
+                ),
+                "prominence": round(
+                    item["screen_time"] * item["peak_confidence"], 3
+                ),
+            }
+        )
+
+    manifest.sort(key=lambda m: (-m["prominence"], m["first_appearance"]))
+    return manifest
+
+
+def save_manifest(results_dir: Path, manifest: List[Dict]) -> None:
+    """
+    Save a video's product manifest next to its detection results.
+
+    Args:
+        results_dir: Directory of the video's results
+        manifest: Manifest items
+    """
+    with open(results_dir / MANIFEST_FILE, "wb") as f:
+        f.write(dumps({"version": manifest_version(), "items": manifest}))
+
+
+def load_manifest(results_dir: Path) -> Optional[List[Dict]]:
+    """
+    Load a video's stored product manifest.
+
+    Args:
+        results_dir: Directory of the video's results
+
+    Returns:
+        Manifest items, or None if the file is missing or was built with other
+        settings
+    """
+    manifest_file = results_dir / MANIFEST_FILE
+    if not manifest_file.exists():
+        return None
+    with open(manifest_file) as f:
+        manifest_json = json.load(f)
+    if manifest_json.get("version") != manifest_version():
+        return None
+    return manifest_json["items"]
@@ -0,0 +1,411 @@
+"""
+In-memory cache of parsed detection results.
+Each video's results are held as a sorted timestamp array plus prebuilt
+ProductResult lists and bundles, so timestamp lookups are a binary search
+instead of a JSON parse and linear scan.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+from appearance_spans import SpanIndex, build_spans
+from bundle_builder import BUNDLE_RULES_VERSION, create_video_bundles
+from config import VIDEO_CONFIG, logger
+from fast_responses import EncodedPayload, dumps
+from models import ProductResult, ProductSpan
+from product_manifest import build_manifest, load_manifest, save_manifest
+
+
+BUNDLES_FILE = "bundles.json"
+
+# Product fields the results version is computed over, in a fixed order, so the
+# same results hash the same whether read from JSON or from the results store
+VERSION_FIELDS = (
+    "object_type",
+    "category",
+    "image_url",
+    "title",
+    "stock",
+    "direct_url",
+    "product_id",
+    "price",
+    "confidence",
+    "person_index",
+    "crop_path",
+)
+
+
+def product_from_dict(product: Dict) -> ProductResult:
+    """
+    Build a ProductResult from a stored product dictionary.
+
+    Args:
+        product: Product dictionary as written to detection_results.json
+
+    Returns:
+        ProductResult object
+    """
+    return ProductResult(
+        object_type=product["object_type"],
+        category=product.get("category"),
+        image_url=product["image_url"],
+        title=product["title"],
+        stock=product["stock"],
+        direct_url=product["direct_url"],
+        product_id=product.get("product_id"),
+        price=product.get("price"),
+        person_index=product.get("person_index"),
+    )
+
+
+def save_bundles(results_dir: Path, bundles: Dict[float, List[dict]]) -> None:
+    """
+    Save a video's bundles next to its detection results.
+
+    Args:
+        results_dir: Directory of the video's results
+        bundles: Dictionary of frame timestamps to bundles
+    """
+    bundles_json = {
+        "rules_version": BUNDLE_RULES_VERSION,
+        "bundles": {str(timestamp): items for timestamp, items in bundles.items()},
+    }
+    with open(results_dir / BUNDLES_FILE, "w") as f:
+        json.dump(bundles_json, f)
+
+
+def load_bundles(results_dir: Path) -> Optional[Dict[float, List[dict]]]:
+    """
+    Load a video's stored bundles.
+
+    Args:
+        results_dir: Directory of the video's results
+
+    Returns:
+        Dictionary of frame timestamps to bundles, or None if the file is
+        missing or was built with other bundling rules
+    """
+    bundles_file = results_dir / BUNDLES_FILE
+    if not bundles_file.exists():
+        return None
+    with open(bundles_file) as f:
+        bundles_json = json.load(f)
+    if bundles_json.get("rules_version") != BUNDLE_RULES_VERSION:
+        return None
+    return {float(t): items for t, items in bundles_json["bundles"].items()}
+
+
+class VideoResults:
+    """
+    Parsed detection results of one video.
+    """
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        products: List[List[ProductResult]],
+        bundles: List[List[dict]],
+        size_bytes: int,
+        version: str,
+        spans: Optional[List[ProductSpan]] = None,
+        manifest: Optional[List[Dict]] = None,
+    ):
+        """
+        Initialize the parsed results.
+
+        Args:
+            timestamps: Sorted float64 array of frame timestamps (seconds)
+            products: Product results per timestamp, aligned with timestamps
+            bundles: Product bundles per timestamp, aligned with timestamps
+            size_bytes: Estimated memory footprint
+            version: Hash of the results and the bundling rules version
+                (changes on reprocessing or when the rules change)
+            spans: Product appearance spans (None if not built)
+            manifest: Product manifest items (None if not built)
+        """
+        self.timestamps = timestamps
+        self.products = products
+        self.bundles = bundles
+        self.size_bytes = size_bytes
+        self.version = version
+        self.span_index = SpanIndex(spans) if spans is not None else None
+        self.manifest = manifest
+        # Serialized API responses built from these results
+        self._payloads: Dict[Hashable, EncodedPayload] = {}
+        self._payloads_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, results_file: Path, video_id: str) -> "VideoResults":
+        """
+        Parse a detection_results.json file and the bundles and product
+        manifest stored next to it (see from_frames).
+
+        Args:
+            results_file: Path to the results file
+            video_id: Unique identifier of the video
+
+        Returns:
+            VideoResults with timestamps sorted ascending
+        """
+        with open(results_file, "rb") as f:
+            all_results = json.load(f)
+        frames_data = {float(t): products for t, products in all_results.items()}
+        return cls.from_frames(video_id, frames_data, results_file.parent)
+
+    @classmethod
+    def from_frames(
+        cls,
+        video_id: str,
+        frames_data: Dict[float, List[Dict]],
+        results_dir: Path,
+    ) -> "VideoResults":
+        """
+        Build the parsed results of a video from its per-frame product
+        dictionaries (from the results file or the results store), with the
+        bundles and product manifest stored in its results directory. Bundles
+        or manifests that are missing or were built with older rules are
+        regenerated and stored again.
+
+        Args:
+            video_id: Unique identifier of the video
+            frames_data: Dictionary of frame timestamps to product results
+            results_dir: Directory of the video's results
+
+        Returns:
+            VideoResults with timestamps sorted ascending
+        """
+        frames = sorted(frames_data.items())
+        # Canonical serialization: independent of where the results were read
+        # from and of the key order of their product dictionaries
+        content = dumps(
+            [
+                [t, [[p.get(field) for field in VERSION_FIELDS] for p in products]]
+                for t, products in frames
+            ]
+        )
+        timestamps = np.array([t for t, _ in frames], dtype="float64")
+        products = [
+            [product_from_dict(p) for p in frame_products]
+            for _, frame_products in frames
+        ]
+
+        stored_bundles = load_bundles(results_dir)
+        if stored_bundles is None or len(stored_bundles) != len(frames):
+            logger.info(f"Regenerating bundles for video {video_id}")
+            stored_bundles = create_video_bundles(
+                video_id, dict(zip(timestamps.tolist(), products))
+            )
+            try:
+                save_bundles(results_dir, stored_bundles)
+            except OSError as e:
+                logger.warning(f"Could not store bundles for video {video_id}: {e}")
+        bundles = [stored_bundles.get(t, []) for t in timestamps.tolist()]
+
+        manifest = load_manifest(results_dir)
+        if manifest is None:
+            logger.info(f"Rebuilding product manifest for video {video_id}")
+            manifest = build_manifest(video_id, dict(frames))
+            try:
+                save_manifest(results_dir, manifest)
+            except OSError as e:
+                logger.warning(f"Could not store manifest for video {video_id}: {e}")
+
+        spans = build_spans(
+            timestamps.tolist(),
+            [frame_products for _, frame_products in frames],
+            VIDEO_CONFIG.interval_seconds,
+            product_from_dict,
+        )
+
+        # The serialized size is a reasonable proxy for the parsed products' footprint;
+        # the bundles and the serialized responses take about as much again each
+        size_bytes = 3 * len(content) + timestamps.nbytes
+        digest = hashlib.sha256(content)
+        digest.update(f"bundles-v{BUNDLE_RULES_VERSION}".encode())
+        version = digest.hexdigest()[:32]
+        return cls(
+            timestamps, products, bundles, size_bytes, version, spans, manifest
+        )
+
+    def payload(
+        self, key: Hashable, build: Callable[[], Any], exclude_none: bool = False
+    ) -> EncodedPayload:
+        """
+        Get a serialized response built from these results, serializing it on
+        first use. Results never change once loaded, so neither do the payloads.
+
+        Args:
+            key: Identifies the response (e.g. ("products", index))
+            build: Returns the response content
+            exclude_none: Leave out None fields of pydantic models
+
+        Returns:
+            Cached EncodedPayload
+        """
+        with self._payloads_lock:
+            payload = self._payloads.get(key)
+        if payload is None:
+            payload = EncodedPayload.from_content(build(), exclude_none)
+            with self._payloads_lock:
+                payload = self._payloads.setdefault(key, payload)
+        return payload
+
+    def closest_index(self, time: float, interval: float) -> Optional[int]:
+        """
+        Get the index of the timestamp closest to a playback time.
+
+        The time is rounded to the processing interval, and a timestamp is only
+        returned when it is within two intervals of it.
+
+        Args:
+            time: Playback time in seconds
+            interval: Processing interval in seconds
+
+        Returns:
+            Index into timestamps, or None if no timestamp is close enough
+        """
+        if self.timestamps.size == 0:
+            return None
+
+        rounded_time = round(time / interval) * interval
+        position = int(np.searchsorted(self.timestamps, rounded_time))
+
+        # Closest of the neighbours around the insertion point (earlier wins ties)
+        candidates = [
+            i for i in (position - 1, position) if 0 <= i < self.timestamps.size
+        ]
+        closest = min(candidates, key=lambda i: abs(self.timestamps[i] - rounded_time))
+
+        if abs(self.timestamps[closest] - rounded_time) > interval * 2:
+            return None
+        return closest
+
+    def lookup(self, time: float, interval: float) -> List[ProductResult]:
+        """
+        Get the products at the timestamp closest to a playback time.
+
+        Args:
+            time: Playback time in seconds
+            interval: Processing interval in seconds
+
+        Returns:
+            List of ProductResult objects (empty if no timestamp is close enough)
+        """
+        closest = self.closest_index(time, interval)
+        return [] if closest is None else list(self.products[closest])
+
+    def lookup_bundles(self, time: float, interval: float) -> List[dict]:
+        """
+        Get the bundles at the timestamp closest to a playback time.
+
+        Args:
+            time: Playback time in seconds
+            interval: Processing interval in seconds
+
+        Returns:
+            List of bundle dictionaries (empty if no timestamp is close enough)
+        """
+        closest = self.closest_index(time, interval)
+        return [] if closest is None else list(self.bundles[closest])
+
+
+class ResultsCache:
+    """
+    LRU cache of VideoResults bounded by an estimated memory budget.
+    """
+
+    def __init__(self, memory_budget_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            memory_budget_bytes: Total estimated size above which the least
+                recently used videos are evicted
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self._entries: "OrderedDict[str, VideoResults]" = OrderedDict()
+        self._size_bytes = 0
+        # Bumped by invalidate, so loads that started before it are not cached
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, video_id: str, loader: Callable[[], VideoResults]) -> VideoResults:
+        """
+        Get a video's parsed results, loading them on a miss. A load that an
+        invalidate() overlapped is returned but not cached, since it may have
+        read the results being replaced.
+
+        Args:
+            video_id: Unique identifier of the video
+            loader: Parses the video's results
+
+        Returns:
+            The cached VideoResults
+        """
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is not None:
+                self._entries.move_to_end(video_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generations.get(video_id, 0)
+
+        entry = loader()
+
+        with self._lock:
+            if self._generations.get(video_id, 0) != generation:
+                return entry
+            previous = self._entries.pop(video_id, None)
+            if previous is not None:
+                self._size_bytes -= previous.size_bytes
+            self._entries[video_id] = entry
+            self._size_bytes += entry.size_bytes
+            # Always keep the entry just loaded, even if it alone exceeds the budget
+            while (
+                self._size_bytes > self.memory_budget_bytes and len(self._entries) > 1
+            ):
+                evicted_id, evicted = self._entries.popitem(last=False)
+                self._size_bytes -= evicted.size_bytes
+                self.evictions += 1
+                logger.debug(f"Evicted cached results for video {evicted_id}")
+        return entry
+
+    def invalidate(self, video_id: str) -> None:
+        """
+        Drop a video's cached results (e.g. when it is reprocessed).
+
+        Args:
+            video_id: Unique identifier of the video
+        """
+        with self._lock:
+            self._generations[video_id] = self._generations.get(video_id, 0) + 1
+            entry = self._entries.pop(video_id, None)
+            if entry is not None:
+                self._size_bytes -= entry.size_bytes
+
+    def stats(self) -> Dict:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with entries, size, budget, hits, misses and evictions
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,618 @@
+"""
+SQLite storage for the video registry and detection results.
+Videos, processed frames, detections and their product matches are kept in
+indexed tables of one database file in WAL mode, so every API worker sees the
+same registry and cross-video queries don't need to read each results file.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from config import logger
+from models import VideoInfo
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,
+    file_path TEXT,
+    results_dir TEXT,
+    error_message TEXT,
+    video_url TEXT,
+    merchant_id TEXT,
+    created_at REAL NOT NULL
+);
+-- Listing indexes: creation time with the ID as tie-breaker, optionally
+-- filtered by status
+CREATE INDEX IF NOT EXISTS idx_videos_created_id ON videos (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_videos_status_created_id
+    ON videos (status, created_at, id);
+
+CREATE TABLE IF NOT EXISTS frames (
+    video_id TEXT NOT NULL REFERENCES videos (id) ON DELETE CASCADE,
+    timestamp REAL NOT NULL,
+    PRIMARY KEY (video_id, timestamp)
+);
+
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    position INTEGER NOT NULL,
+    object_type TEXT NOT NULL,
+    category TEXT,
+    confidence REAL,
+    person_index INTEGER,
+    FOREIGN KEY (video_id, timestamp)
+        REFERENCES frames (video_id, timestamp) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_detections_frame
+    ON detections (video_id, timestamp, position);
+
+CREATE TABLE IF NOT EXISTS product_matches (
+    detection_id INTEGER PRIMARY KEY
+        REFERENCES detections (id) ON DELETE CASCADE,
+    product_id INTEGER,
+    title TEXT NOT NULL,
+    image_url TEXT NOT NULL,
+    stock TEXT NOT NULL,
+    direct_url TEXT NOT NULL,
+    price REAL,
+    crop_path TEXT
+);
+
+CREATE TABLE IF NOT EXISTS product_appearances (
+    product_key TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    confidence REAL,
+    PRIMARY KEY (product_key, video_id, timestamp)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_product_appearances_video
+    ON product_appearances (video_id);
+"""
+
+# Postings of a catalog item are keyed by its catalog image path, which is
+# unique across catalogs (product IDs repeat between merchant catalogs)
+PRODUCT_KEY_SQL = "m.image_url"
+
+# Stored as the database's user_version; older databases are upgraded by
+# ResultsStore._migrate
+SCHEMA_VERSION = 3
+
+
+def product_key(product: Dict) -> str:
+    """
+    Get the reverse index key of a product result.
+
+    Args:
+        product: Product result dictionary
+
+    Returns:
+        Catalog image path of the product
+    """
+    return product["image_url"]
+
+
+VIDEO_COLUMNS = (
+    "id",
+    "filename",
+    "status",
+    "file_path",
+    "results_dir",
+    "error_message",
+    "video_url",
+    "merchant_id",
+)
+
+SUMMARY_COLUMNS = ("id", "filename", "status", "created_at")
+
+
+class ResultsStore:
+    """
+    SQLite-backed registry of videos and their per-frame product results.
+
+    Connections are opened per thread. Each processed frame is written in one
+    transaction (frame row, detections and product matches together).
+    """
+
+    def __init__(self, db_path: str, busy_timeout_ms: int = 5000):
+        """
+        Open (or create) the database.
+
+        Args:
+            db_path: Path to the SQLite database file
+            busy_timeout_ms: How long a writer waits for a lock held by another
+                worker before failing
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+
+        conn = self._connection()
+        existing = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'videos'"
+        ).fetchone()
+        conn.executescript(SCHEMA)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if existing and version < SCHEMA_VERSION:
+            self._migrate(conn, version)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        logger.info(f"ResultsStore opened at {self.db_path}")
+
+    def _migrate(self, conn: sqlite3.Connection, version: int) -> None:
+        """
+        Upgrade a database created by an older schema version.
+
+        Args:
+            conn: Open connection
+            version: The database's user_version
+        """
+        logger.info(f"Migrating ResultsStore schema {version} -> {SCHEMA_VERSION}")
+        if version < 1:
+            # Single-column listing indexes superseded by the (created_at, id)
+            # ones, and postings keyed by product ID instead of image path
+            conn.execute("DROP INDEX IF EXISTS idx_videos_status")
+            conn.execute("DROP INDEX IF EXISTS idx_videos_created")
+            self.rebuild_appearances()
+        if version < 2:
+            # Unused since postings are keyed by image path
+            conn.execute("DROP INDEX IF EXISTS idx_product_matches_product")
+        if version < 3:
+            conn.execute("ALTER TABLE product_matches ADD COLUMN crop_path TEXT")
+            self._backfill_crop_paths()
+
+    def _backfill_crop_paths(self) -> None:
+        """
+        Fill in the crop paths of product matches stored before they were
+        kept, from the videos' detection_results.json files.
+        """
+        updates = []
+        for row in self._connection().execute(
+            "SELECT id, results_dir FROM videos WHERE results_dir IS NOT NULL"
+        ).fetchall():
+            results_file = Path(row["results_dir"]) / "detection_results.json"
+            if not results_file.exists():
+                continue
+            try:
+                with open(results_file) as f:
+                    all_results = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read {results_file}: {e}")
+                continue
+            for timestamp, products in all_results.items():
+                for position, product in enumerate(products):
+                    crop_path = product.get("crop_path")
+                    if crop_path:
+                        updates.append(
+                            (crop_path, row["id"], float(timestamp), position)
+                        )
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE product_matches SET crop_path = ? WHERE detection_id = "
+                "(SELECT id FROM detections "
+                "WHERE video_id = ? AND timestamp = ? AND position = ?)",
+                updates,
+            )
+        logger.info(f"Backfilled {len(updates)} crop paths")
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use.
+
+        Returns:
+            SQLite connection in WAL mode
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run statements in one write transaction, rolled back on error.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _row_to_video(row: sqlite3.Row) -> VideoInfo:
+        """Build a VideoInfo from a videos row."""
+        return VideoInfo(
+            **{column: row[column] for column in VIDEO_COLUMNS},
+            created_at=row["created_at"],
+        )
+
+    def upsert_video(
+        self, video_info: VideoInfo, created_at: Optional[float] = None
+    ) -> None:
+        """
+        Insert a video, or update it if it is already registered.
+
+        Args:
+            video_info: Video information object
+            created_at: Creation time (Unix seconds) for new rows (default:
+                video_info.created_at, or now)
+        """
+        if created_at is None:
+            created_at = video_info.created_at
+        if created_at is None:
+            created_at = time.time()
+        values = [getattr(video_info, column) for column in VIDEO_COLUMNS]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in VIDEO_COLUMNS[1:])
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT INTO videos ({', '.join(VIDEO_COLUMNS)}, created_at) "
+                f"VALUES ({', '.join('?' * (len(VIDEO_COLUMNS) + 1))}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                values + [created_at],
+            )
+
+    def update_status(
+        self, video_id: str, status: str, error_message: Optional[str] = None
+    ) -> None:
+        """
+        Update a video's processing status.
+
+        Args:
+            video_id: Unique identifier of the video
+            status: "processing", "completed" or "failed"
+            error_message: Error of a failed run (cleared otherwise)
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE videos SET status = ?, error_message = ? WHERE id = ?",
+                (status, error_message, video_id),
+            )
+
+    def get_video(self, video_id: str) -> Optional[VideoInfo]:
+        """
+        Get a video by ID.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            VideoInfo object, or None if not registered
+        """
+        row = (
+            self._connection()
+            .execute("SELECT * FROM videos WHERE id = ?", (video_id,))
+            .fetchone()
+        )
+        return self._row_to_video(row) if row is not None else None
+
+    def list_videos(self) -> List[VideoInfo]:
+        """
+        Get all registered videos, oldest first.
+
+        Returns:
+            List of VideoInfo objects
+        """
+        rows = (
+            self._connection()
+            .execute("SELECT * FROM videos ORDER BY created_at, id")
+            .fetchall()
+        )
+        return [self._row_to_video(row) for row in rows]
+
+    def list_videos_page(
+        self,
+        limit: Optional[int],
+        status: Optional[str] = None,
+        newest_first: bool = True,
+        after: Optional[Tuple[float, str]] = None,
+        summary: bool = False,
+    ) -> List:
+        """
+        Get one page of videos ordered by creation time, using the listing
+        indexes so the cost depends on the page size only.
+
+        Args:
+            limit: Maximum number of videos (None = no limit)
+            status: Only videos with this status (None = all)
+            newest_first: Sort by descending creation time
+            after: (created_at, id) of the last video of the previous page
+            summary: Return summary dictionaries instead of VideoInfo objects
+
+        Returns:
+            List of VideoInfo objects, or dictionaries with SUMMARY_COLUMNS
+        """
+        columns = ", ".join(SUMMARY_COLUMNS) if summary else "*"
+        conditions = []
+        params: list = []
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if after is not None:
+            conditions.append(f"(created_at, id) {'<' if newest_first else '>'} (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        direction = "DESC" if newest_first else "ASC"
+
+        rows = (
+            self._connection()
+            .execute(
+                f"SELECT {columns} FROM videos {where}"
+                f"ORDER BY created_at {direction}, id {direction} LIMIT ?",
+                # A negative LIMIT means no limit in SQLite
+                params + [-1 if limit is None else limit],
+            )
+            .fetchall()
+        )
+        if summary:
+            return [dict(row) for row in rows]
+        return [self._row_to_video(row) for row in rows]
+
+    def video_ids(self) -> Set[str]:
+        """
+        Get the IDs of all registered videos.
+
+        Returns:
+            Set of video IDs
+        """
+        rows = self._connection().execute("SELECT id FROM videos").fetchall()
+        return {row["id"] for row in rows}
+
+    def clear_results(self, video_id: str) -> None:
+        """
+        Delete a video's frames, detections and product matches.
+
+        Args:
+            video_id: Unique identifier of the video
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM frames WHERE video_id = ?", (video_id,))
+            conn.execute(
+                "DELETE FROM product_appearances WHERE video_id = ?", (video_id,)
+            )
+
+    def _insert_frame(
+        self,
+        conn: sqlite3.Connection,
+        video_id: str,
+        timestamp: float,
+        products: List[Dict],
+    ) -> None:
+        """Insert one frame's rows on an open transaction."""
+        conn.execute(
+            "INSERT OR REPLACE INTO frames (video_id, timestamp) VALUES (?, ?)",
+            (video_id, timestamp),
+        )
+        for position, product in enumerate(products):
+            cursor = conn.execute(
+                "INSERT INTO detections (video_id, timestamp, position, "
+                "object_type, category, confidence, person_index) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    video_id,
+                    timestamp,
+                    position,
+                    product["object_type"],
+                    product.get("category"),
+                    product.get("confidence"),
+                    product.get("person_index"),
+                ),
+            )
+            conn.execute(
+                "INSERT INTO product_matches (detection_id, product_id, title, "
+                "image_url, stock, direct_url, price, crop_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cursor.lastrowid,
+                    product.get("product_id"),
+                    product["title"],
+                    product["image_url"],
+                    product["stock"],
+                    product["direct_url"],
+                    product.get("price"),
+                    product.get("crop_path"),
+                ),
+            )
+
+    def save_frame(self, video_id: str, timestamp: float, products: List[Dict]) -> None:
+        """
+        Store one processed frame and its products in a single transaction.
+
+        Args:
+            video_id: Unique identifier of the video
+            timestamp: Frame timestamp in seconds
+            products: Product result dictionaries of the frame
+        """
+        with self._transaction() as conn:
+            self._insert_frame(conn, video_id, timestamp, products)
+
+    def replace_results(
+        self, video_id: str, frames_data: Dict[float, List[Dict]]
+    ) -> None:
+        """
+        Replace all of a video's results in a single transaction.
+
+        Args:
+            video_id: Unique identifier of the video
+            frames_data: Dictionary of frame timestamps to product results
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM frames WHERE video_id = ?", (video_id,))
+            for timestamp, products in frames_data.items():
+                self._insert_frame(conn, video_id, timestamp, products)
+
+    def load_results(self, video_id: str) -> Dict[float, List[Dict]]:
+        """
+        Load a video's results in the detection_results.json layout.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            Dictionary of frame timestamps (ascending) to product results
+        """
+        conn = self._connection()
+        frames_data: Dict[float, List[Dict]] = {
+            row["timestamp"]: []
+            for row in conn.execute(
+                "SELECT timestamp FROM frames WHERE video_id = ? ORDER BY timestamp",
+                (video_id,),
+            )
+        }
+        rows = conn.execute(
+            "SELECT d.timestamp, d.object_type, d.category, d.confidence, "
+            "d.person_index, m.product_id, m.title, m.image_url, m.stock, "
+            "m.direct_url, m.price, m.crop_path "
+            "FROM detections d JOIN product_matches m ON m.detection_id = d.id "
+            "WHERE d.video_id = ? ORDER BY d.timestamp, d.position",
+            (video_id,),
+        )
+        for row in rows:
+            frames_data[row["timestamp"]].append(
+                {
+                    "object_type": row["object_type"],
+                    "category": row["category"],
+                    "image_url": row["image_url"],
+                    "title": row["title"],
+                    "stock": row["stock"],
+                    "direct_url": row["direct_url"],
+                    "product_id": row["product_id"],
+                    "price": row["price"],
+                    "confidence": row["confidence"],
+                    "person_index": row["person_index"],
+                    "crop_path": row["crop_path"],
+                }
+            )
+        return frames_data
+
+    def migrate_json_results(self, video_id: str, results_file: Path) -> int:
+        """
+        Import a legacy detection_results.json file.
+
+        Args:
+            video_id: Unique identifier of the (registered) video
+            results_file: Path to the results file
+
+        Returns:
+            Number of imported frames
+        """
+        with open(results_file) as f:
+            all_results = json.load(f)
+        frames_data = {float(t): products for t, products in all_results.items()}
+        self.replace_results(video_id, frames_data)
+        self.index_appearances(video_id, frames_data)
+        return len(frames_data)
+
+    def index_appearances(
+        self, video_id: str, frames_data: Dict[float, List[Dict]]
+    ) -> None:
+        """
+        Replace a video's postings in the product reverse index.
+
+        Args:
+            video_id: Unique identifier of the video
+            frames_data: Dictionary of frame timestamps to product results
+        """
+        # A product matched twice in one frame keeps its highest confidence
+        postings: Dict[tuple, Optional[float]] = {}
+        for timestamp, products in frames_data.items():
+            for product in products:
+                key = (product_key(product), timestamp)
+                confidence = product.get("confidence")
+                if key not in postings or (confidence or 0) > (postings[key] or 0):
+                    postings[key] = confidence
+
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM product_appearances WHERE video_id = ?", (video_id,)
+            )
+            conn.executemany(
+                "INSERT INTO product_appearances "
+                "(product_key, video_id, timestamp, confidence) VALUES (?, ?, ?, ?)",
+                [
+                    (key, video_id, timestamp, confidence)
+                    for (key, timestamp), confidence in postings.items()
+                ],
+            )
+
+    def rebuild_appearances(self) -> None:
+        """
+        Rebuild the product reverse index from the stored product matches.
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM product_appearances")
+            conn.execute(
+                "INSERT INTO product_appearances "
+                "(product_key, video_id, timestamp, confidence) "
+                f"SELECT {PRODUCT_KEY_SQL}, d.video_id, d.timestamp, "
+                "MAX(d.confidence) "
+                "FROM detections d JOIN product_matches m ON m.detection_id = d.id "
+                f"GROUP BY {PRODUCT_KEY_SQL}, d.video_id, d.timestamp"
+            )
+
+    def product_appearances(
+        self,
+        key: str,
+        limit: int,
+        after: Optional[Tuple[str, float]] = None,
+    ) -> List[Dict]:
+        """
+        Get the videos and timestamps a catalog item appears at.
+
+        Args:
+            key: Catalog image path of the item (see product_key)
+            limit: Maximum number of postings to return
+            after: (video_id, timestamp) of the last posting of the previous page
+
+        Returns:
+            Postings ordered by video ID and timestamp, with video_id,
+            timestamp and confidence
+        """
+        query = (
+            "SELECT video_id, timestamp, confidence FROM product_appearances "
+            "WHERE product_key = ?"
+        )
+        params: list = [key]
+        if after is not None:
+            query += " AND (video_id, timestamp) > (?, ?)"
+            params.extend(after)
+        query += " ORDER BY video_id, timestamp LIMIT ?"
+        params.append(limit)
+
+        rows = self._connection().execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict:
+        """
+        Get row counts of the store.
+
+        Returns:
+            Dictionary with the number of videos, frames, detections and
+            product postings
+        """
+        conn = self._connection()
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("videos", "frames", "detections", "product_appearances")
+        }
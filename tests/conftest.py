@@ -0,0 +1,35 @@
+"""
+Shared test fixtures. The application modules live at the repository root and
+are imported as top-level modules, as main.py does.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def make_product():
+    """Build a product result dictionary as written by the video processor."""
+
+    def make(image_url: str = "image_db/clothing/ (24).jpg", **fields):
+        product = {
+            "object_type": "shirt",
+            "category": "clothing",
+            "image_url": image_url,
+            "title": "Shirt",
+            "stock": "In Stock",
+            "direct_url": "https://example.com/product/1",
+            "product_id": None,
+            "price": None,
+            "confidence": 0.9,
+            "person_index": 0,
+            "crop_path": None,
+        }
+        product.update(fields)
+        return product
+
+    return make
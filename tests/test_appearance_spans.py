@@ -0,0 +1,79 @@
+"""
+Tests for merging per-frame matches into appearance spans and the span index.
+"""
+
+import random
+
+import pytest
+
+from appearance_spans import SpanIndex, merge_sightings
+from config import APPEARANCE_SPAN_CONFIG
+from models import ProductResult, ProductSpan
+
+
+@pytest.fixture(autouse=True)
+def span_settings(monkeypatch):
+    monkeypatch.setattr(APPEARANCE_SPAN_CONFIG, "max_gap_intervals", 2.0)
+    monkeypatch.setattr(APPEARANCE_SPAN_CONFIG, "padding_intervals", 0.5)
+
+
+def test_merge_sightings_merges_within_gap_and_pads(make_product):
+    frames = {
+        10.0: [make_product("a.jpg", confidence=0.5)],
+        15.0: [make_product("a.jpg", confidence=0.8)],
+        25.0: [make_product("a.jpg", confidence=0.6)],
+        40.0: [make_product("a.jpg", confidence=0.7)],
+    }
+    timestamps = sorted(frames)
+    spans = merge_sightings(timestamps, [frames[t] for t in timestamps], 5.0)
+
+    # 25s is exactly max_gap (10s) after 15s; 40s starts a new appearance
+    assert [(s["start"], s["end"]) for s in spans] == [(7.5, 27.5), (37.5, 42.5)]
+    assert [s["first_seen"] for s in spans] == [10.0, 40.0]
+    assert spans[0]["frames"] == 3
+    assert spans[0]["confidence"] == 0.8
+    assert spans[0]["product"]["confidence"] == 0.8
+
+
+def test_merge_sightings_keys_on_image_path(make_product):
+    # Same catalog product ID in two catalogs: distinct items
+    frames = [
+        [make_product("a.jpg", product_id=1), make_product("b.jpg", product_id=1)]
+    ]
+    spans = merge_sightings([0.0], frames, 5.0)
+
+    assert sorted(s["key"] for s in spans) == ["a.jpg", "b.jpg"]
+    assert all(s["start"] == 0.0 for s in spans)
+
+
+def _span(start: float, end: float) -> ProductSpan:
+    product = ProductResult(
+        object_type="shirt",
+        image_url=f"{start}-{end}.jpg",
+        title="Shirt",
+        stock="In Stock",
+        direct_url="https://example.com",
+    )
+    return ProductSpan(product=product, start=start, end=end, confidence=1.0, frames=1)
+
+
+def test_span_index_matches_linear_scan():
+    rng = random.Random(0)
+    spans = []
+    for _ in range(200):
+        start = rng.uniform(0, 100)
+        spans.append(_span(start, start + rng.uniform(0, 20)))
+    index = SpanIndex(spans)
+
+    for time in [rng.uniform(-5, 125) for _ in range(500)] + [spans[0].start]:
+        expected = sorted(
+            i for i, span in enumerate(spans) if span.start <= time <= span.end
+        )
+        assert list(index.active_ids(time)) == expected
+        assert {id(s) for s in index.at(time)} == {id(spans[i]) for i in expected}
+
+
+def test_span_index_empty():
+    index = SpanIndex([])
+    assert index.at(1.0) == []
+    assert index.active_ids(1.0) == ()
@@ -0,0 +1,98 @@
+"""
+Tests for the packed catalog metadata table.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")  # image_similarity_search loads the CLIP stack
+
+from image_similarity_search.catalog_metadata import CatalogMetadata
+
+RECORDS = [
+    {
+        "path": "catalog/clothing/shirt/1.jpg",
+        "category": "clothing",
+        "label": "shirt",
+        "merchant": "default",
+        "product_id": 11,
+        "title": "Oxford shirt",
+        "url": "https://example.com/11",
+        "price": 30.0,
+        "stock": 4,
+    },
+    {
+        "path": "catalog/jewelry/ring/é.jpg",
+        "category": "jewelry",
+        "label": "ring",
+        "merchant": "acme",
+    },
+    {
+        "path": "catalog/clothing/pants/3.jpg",
+        "category": "clothing",
+        "label": "pants",
+        "merchant": "acme",
+        "product_id": 13,
+        "title": "",
+        "stock": 0,
+    },
+    {
+        "path": "catalog/clothing/shirt/4.jpg",
+        "category": "clothing",
+        "label": "shirt",
+        "merchant": "default",
+        "product_id": 14,
+        "title": "Linen shirt",
+        "price": 45.5,
+    },
+]
+
+
+@pytest.fixture
+def metadata():
+    return CatalogMetadata.from_records(RECORDS)
+
+
+def test_record_round_trip(metadata):
+    first = metadata.record(0)
+    assert first["product_id"] == 11
+    assert first["price"] == 30.0
+    assert first["stock"] == 4
+    assert first["title"] == "Oxford shirt"
+
+    # Unknown numeric fields come back as None
+    unknown = metadata.record(1)
+    assert unknown["product_id"] is None
+    assert unknown["price"] is None
+    assert unknown["stock"] is None
+    assert unknown["path"] == "catalog/jewelry/ring/é.jpg"
+
+
+def test_save_and_load(metadata, tmp_path):
+    path = tmp_path / "metadata.npz"
+    metadata.save(path)
+    loaded = CatalogMetadata.load(path)
+    assert [loaded.record(i) for i in range(len(loaded))] == [
+        metadata.record(i) for i in range(len(metadata))
+    ]
+
+
+def test_ids_where(metadata):
+    assert metadata.ids_where("category", "clothing").tolist() == [0, 2, 3]
+    assert metadata.ids_where("merchant", "acme").tolist() == [1, 2]
+    assert metadata.ids_where("label", "ring").tolist() == [1]
+    assert metadata.ids_where("category", "shoes") is None
+
+
+@pytest.mark.parametrize("ids", [[3, 1], [0, 1, 2, 3], [2], []])
+def test_subset(metadata, ids):
+    subset = metadata.subset(np.array(ids, dtype="int64"))
+
+    assert len(subset) == len(ids)
+    assert [subset.record(i) for i in range(len(ids))] == [
+        metadata.record(i) for i in ids
+    ]
+    # Vocabularies are kept whole: absent values match no rows
+    assert subset.vocab("category") == metadata.vocab("category")
+    if 1 not in ids:
+        assert subset.ids_where("category", "jewelry").tolist() == []
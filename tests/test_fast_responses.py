@@ -0,0 +1,105 @@
+"""
+Tests for response encoding negotiation, compression and cache validators.
+"""
+
+import gzip
+
+import brotli
+import pytest
+from fastapi import Request
+
+from config import RESPONSE_CONFIG
+from fast_responses import (
+    EncodedPayload,
+    cache_validators,
+    json_response,
+    negotiate_encoding,
+)
+
+
+def _request(**headers) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": b"",
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("br;q=0.5, gzip;q=1.0", "br"),
+        ("GZIP", "gzip"),
+        ("*", "br"),
+        ("*, br;q=0", "gzip"),
+        ("br;q=bogus", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.fixture
+def compression(monkeypatch):
+    monkeypatch.setattr(RESPONSE_CONFIG, "enable_compression", True)
+    monkeypatch.setattr(RESPONSE_CONFIG, "compression_min_bytes", 64)
+
+
+def test_json_response_compresses_large_bodies(compression):
+    payload = EncodedPayload.from_content([{"title": "Shirt"}] * 20)
+
+    br = json_response(_request(accept_encoding="br"), payload)
+    assert br.headers["content-encoding"] == "br"
+    assert br.headers["vary"] == "Accept-Encoding"
+    assert brotli.decompress(br.body) == payload.body
+
+    gz = json_response(_request(accept_encoding="gzip"), payload)
+    assert gzip.decompress(gz.body) == payload.body
+
+    plain = json_response(_request(), payload)
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert plain.body == payload.body
+
+
+def test_json_response_skips_small_bodies(compression):
+    response = json_response(_request(accept_encoding="br"), EncodedPayload(b"[]"))
+    assert "content-encoding" not in response.headers
+    assert response.body == b"[]"
+
+
+def test_cache_validators_weak_etag_and_vary(compression):
+    headers, not_modified = cache_validators(_request(), "abc", 60)
+
+    assert headers["ETag"] == 'W/"abc"'
+    assert headers["Cache-Control"] == "public, max-age=60"
+    assert headers["Vary"] == "Accept-Encoding"
+    assert not not_modified
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('"other", W/"abc"', True),
+        ("*", True),
+        ('W/"abd"', False),
+        ("abc", False),
+    ],
+)
+def test_cache_validators_if_none_match(compression, if_none_match, expected):
+    _, not_modified = cache_validators(_request(if_none_match=if_none_match), "abc", 60)
+    assert not_modified is expected
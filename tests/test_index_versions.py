@@ -0,0 +1,128 @@
+"""
+Tests for versioned database directories and hot-swapping.
+"""
+
+import pytest
+
+pytest.importorskip("torch")  # image_similarity_search loads the CLIP stack
+
+from image_similarity_search.index_versions import (
+    HotSwapIndex,
+    RetiredIndexError,
+    current_version,
+    new_version_path,
+    publish_version,
+    resolve_db_path,
+)
+
+
+class FakeSearch:
+    """Stands in for ImageSimilaritySearch: records loads, shares and closes."""
+
+    model_name = "fake-model"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.model = None
+        self.processor = None
+        self.closed = False
+
+    def _load_database(self):
+        if not (self.db_path / "index").exists():
+            raise FileNotFoundError(self.db_path)
+
+    def share_model(self, other):
+        self.model, self.processor = other.model, other.processor
+
+    def use_model(self, model, processor):
+        self.model, self.processor = model, processor
+
+    def _load_model(self):
+        if self.model is None:
+            self.model, self.processor = object(), object()
+
+    def close(self):
+        self.closed = True
+
+
+def _publish(root):
+    path = new_version_path(root)
+    (path / "index").write_text("built")
+    publish_version(path)
+    return path
+
+
+def _index(root, **kwargs):
+    return HotSwapIndex(
+        root, FakeSearch, database_exists=lambda p: (p / "index").exists(), **kwargs
+    )
+
+
+def test_unversioned_and_published_paths(tmp_path):
+    assert current_version(tmp_path) is None
+    assert resolve_db_path(tmp_path) == tmp_path
+
+    path = _publish(tmp_path)
+    assert current_version(tmp_path) == path.name
+    assert resolve_db_path(tmp_path) == path
+
+
+def test_is_built_checks_files_only(tmp_path):
+    index = _index(tmp_path)
+    assert not index.is_built()
+    _publish(tmp_path)
+    assert index.is_built()
+    assert index.search is None  # nothing was loaded
+
+
+def test_reload_swaps_and_releases_after_in_flight_searches(tmp_path):
+    first = _publish(tmp_path)
+    index = _index(tmp_path)
+
+    with index.acquire() as old:
+        assert old.db_path == first
+        second = _publish(tmp_path)
+        assert index.reload()
+        # The previous version stays open until its search finishes
+        assert not old.closed
+        with index.acquire() as new:
+            assert new.db_path == second
+            assert new.model is old.model  # the model is shared, not reloaded
+    assert old.closed
+    assert not index.reload()  # already on the published version
+
+
+def test_failed_reload_keeps_current_version(tmp_path):
+    _publish(tmp_path)
+    index = _index(tmp_path)
+    with index.acquire() as loaded:
+        pass
+
+    broken = new_version_path(tmp_path)
+    publish_version(broken)  # no index file
+    assert not index.reload()
+    assert index.last_reload_error
+    with index.acquire() as search:
+        assert search is loaded
+
+
+def test_retire_releases_after_searches_and_refuses_new_ones(tmp_path):
+    _publish(tmp_path)
+    index = _index(tmp_path)
+
+    with index.acquire() as search:
+        index.retire()
+        assert not search.closed
+    assert search.closed
+
+    with pytest.raises(RetiredIndexError), index.acquire():
+        pass
+    assert not index.reload()
+
+
+def test_model_source_used_on_first_load(tmp_path):
+    _publish(tmp_path)
+    shared = (object(), object())
+    index = _index(tmp_path, model_source=lambda name: shared)
+    with index.acquire() as search:
+        assert (search.model, search.processor) == shared
@@ -0,0 +1,57 @@
+"""
+Tests for the query embedding/results cache.
+"""
+
+import pytest
+
+pytest.importorskip("torch")  # image_similarity_search loads the CLIP stack
+
+from image_similarity_search import query_cache
+from image_similarity_search.query_cache import QueryCache
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_cache.time, "time", lambda: now[0])
+    cache = QueryCache(ttl_seconds=10)
+    cache.put("a", 1)
+
+    now[0] += 10
+    assert cache.get("a") == 1
+    now[0] += 1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_stats():
+    cache = QueryCache()
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_persistence(tmp_path):
+    path = tmp_path / "cache.pkl"
+    cache = QueryCache(max_entries=2, persist_path=path)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.upper())
+    cache.save()
+
+    restored = QueryCache(max_entries=2, persist_path=path)
+    assert restored.get("a") is None
+    assert restored.get("c") == "C"
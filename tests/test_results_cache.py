@@ -0,0 +1,74 @@
+"""
+Tests for the parsed results cache.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from results_cache import ResultsCache, VideoResults
+
+
+@pytest.fixture
+def frames(make_product):
+    return {
+        0.0: [make_product(), make_product("image_db/jewelry/ (3).jpg")],
+        2.0: [make_product(confidence=0.75)],
+    }
+
+
+def _results(size_bytes: int = 10) -> VideoResults:
+    return VideoResults(np.array([0.0]), [[]], [[]], size_bytes, "v")
+
+
+def test_version_matches_across_sources(frames, tmp_path):
+    results_file = tmp_path / "detection_results.json"
+    # Key order of the stored dictionaries must not affect the version
+    results_file.write_text(
+        json.dumps(
+            {
+                str(t): [dict(reversed(list(p.items()))) for p in products]
+                for t, products in frames.items()
+            }
+        )
+    )
+
+    from_file = VideoResults.load(results_file, "video")
+    from_store = VideoResults.from_frames("video", frames, tmp_path)
+    assert from_file.version == from_store.version
+    assert from_file.timestamps.tolist() == [0.0, 2.0]
+
+
+def test_version_changes_with_results(frames, tmp_path, make_product):
+    before = VideoResults.from_frames("video", frames, tmp_path).version
+    frames[2.0] = [make_product(confidence=0.5)]
+    assert VideoResults.from_frames("video", frames, tmp_path).version != before
+
+
+def test_lru_within_memory_budget():
+    cache = ResultsCache(memory_budget_bytes=25)
+    cache.get("a", _results)
+    cache.get("b", _results)
+    cache.get("a", _results)  # "b" is now least recently used
+    cache.get("c", _results)
+
+    assert cache.evictions == 1
+    assert (cache.hits, cache.misses) == (1, 3)
+    loaded = []
+    cache.get("b", lambda: loaded.append("b") or _results())
+    assert loaded == ["b"]
+
+
+def test_invalidate_during_load_is_not_cached():
+    cache = ResultsCache(memory_budget_bytes=100)
+    stale = _results()
+
+    def load_while_reprocessed():
+        cache.invalidate("a")
+        return stale
+
+    assert cache.get("a", load_while_reprocessed) is stale
+    fresh = _results()
+    assert cache.get("a", lambda: fresh) is fresh
+    assert cache.get("a", _results) is fresh
@@ -0,0 +1,146 @@
+"""
+Tests for the SQLite results store.
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from models import VideoInfo
+from results_store import SCHEMA_VERSION, ResultsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / "videos.db"))
+
+
+def _add_video(store, video_id, created_at=0.0, status="completed", results_dir=None):
+    store.upsert_video(
+        VideoInfo(
+            id=video_id,
+            filename=f"{video_id}.mp4",
+            status=status,
+            results_dir=results_dir,
+        ),
+        created_at=created_at,
+    )
+
+
+def test_results_round_trip(store, make_product):
+    _add_video(store, "v1")
+    first = make_product("a.jpg", product_id=7, price=19.5, crop_path="frames/0.jpg")
+    second = make_product("b.jpg", confidence=0.4, person_index=None)
+    store.save_frame("v1", 5.0, [first, second])
+    store.save_frame("v1", 0.0, [make_product("c.jpg")])
+
+    results = store.load_results("v1")
+
+    assert list(results) == [0.0, 5.0]
+    assert results[5.0] == [first, second]
+    assert results[5.0][0]["crop_path"] == "frames/0.jpg"
+
+
+def test_replace_and_clear_results(store, make_product):
+    _add_video(store, "v1")
+    store.save_frame("v1", 5.0, [make_product("a.jpg")])
+    store.replace_results("v1", {10.0: [make_product("b.jpg")]})
+    assert list(store.load_results("v1")) == [10.0]
+
+    store.clear_results("v1")
+    assert store.load_results("v1") == {}
+
+
+def test_product_appearances_keyed_by_image_path(store, make_product):
+    _add_video(store, "v1")
+    _add_video(store, "v2")
+    frames = {
+        0.0: [
+            make_product("image_db/clothing/ (24).jpg", product_id=1, confidence=0.5)
+        ],
+        5.0: [make_product("merchant/x.jpg", product_id=1)],
+    }
+    for timestamp, products in frames.items():
+        store.save_frame("v1", timestamp, products)
+    store.index_appearances("v1", frames)
+    store.index_appearances(
+        "v2", {3.0: [make_product("image_db/clothing/ (24).jpg", confidence=0.7)]}
+    )
+
+    postings = store.product_appearances("image_db/clothing/ (24).jpg", limit=10)
+    assert postings == [
+        {"video_id": "v1", "timestamp": 0.0, "confidence": 0.5},
+        {"video_id": "v2", "timestamp": 3.0, "confidence": 0.7},
+    ]
+
+    page = store.product_appearances(
+        "image_db/clothing/ (24).jpg", limit=10, after=("v1", 0.0)
+    )
+    assert [p["video_id"] for p in page] == ["v2"]
+
+    # The rebuilt index matches the incrementally maintained one (v2 has no
+    # stored frames, so only v1's postings come back)
+    store.rebuild_appearances()
+    assert store.product_appearances("merchant/x.jpg", limit=10) == [
+        {"video_id": "v1", "timestamp": 5.0, "confidence": 0.9}
+    ]
+
+
+@pytest.mark.parametrize("newest_first", [True, False])
+def test_list_videos_page_cursor(store, newest_first):
+    # Ties on created_at are broken by ID
+    for i, created_at in enumerate([1.0, 2.0, 2.0, 3.0, 4.0]):
+        _add_video(store, f"v{i}", created_at=created_at)
+    _add_video(store, "failed", created_at=2.5, status="failed")
+
+    expected = store.list_videos_page(None, "completed", newest_first)
+    assert len(expected) == 5
+
+    seen, after = [], None
+    while True:
+        page = store.list_videos_page(2, "completed", newest_first, after)
+        seen.extend(page)
+        if len(page) < 2:
+            break
+        after = (page[-1].created_at, page[-1].id)
+
+    assert [v.id for v in seen] == [v.id for v in expected]
+    ordered = [(v.created_at, v.id) for v in seen]
+    assert ordered == sorted(ordered, reverse=newest_first)
+
+
+def test_list_videos_page_summary(store):
+    _add_video(store, "v1", created_at=1.0)
+    (row,) = store.list_videos_page(10, summary=True)
+    assert row == {
+        "id": "v1",
+        "filename": "v1.mp4",
+        "status": "completed",
+        "created_at": 1.0,
+    }
+
+
+def test_migration_adds_and_backfills_crop_paths(tmp_path, make_product):
+    db_path = str(tmp_path / "videos.db")
+    results_dir = tmp_path / "v1"
+    results_dir.mkdir()
+    product = make_product("a.jpg", crop_path="frames/5.jpg")
+
+    store = ResultsStore(db_path)
+    _add_video(store, "v1", results_dir=str(results_dir))
+    store.save_frame("v1", 5.0, [product])
+    (results_dir / "detection_results.json").write_text(json.dumps({"5.0": [product]}))
+
+    # Downgrade to a schema 2 database, which had no crop_path column
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE product_matches DROP COLUMN crop_path")
+    conn.execute("PRAGMA user_version = 2")
+    conn.commit()
+    conn.close()
+
+    migrated = ResultsStore(db_path)
+
+    assert migrated.load_results("v1")[5.0][0]["crop_path"] == "frames/5.jpg"
+    version = migrated._connection().execute("PRAGMA user_version").fetchone()[0]
+    assert version == SCHEMA_VERSION
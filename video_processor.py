@@ -2,24 +2,59 @@
 Video processing manager for handling video uploads, processing, and result retrieval.
 """
 
+import asyncio
+import base64
 import json
+import time
 import uuid
+from collections import Counter
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import cv2
+import numpy as np
 from PIL import Image
 
 from config import (
     VIDEO_CONFIG,
+    JEWELRY_CONFIG,
+    JEWELRY_GATE_CONFIG,
     SIMILARITY_SEARCH_CONFIG,
     FRAME_QUALITY_CONFIG,
     PERSON_DETECTION_CONFIG,
+    QUERY_CACHE_CONFIG,
+    SHARDED_SEARCH_CONFIG,
+    MERCHANT_CATALOG_CONFIG,
+    RESULTS_CACHE_CONFIG,
+    STORAGE_CONFIG,
+    LIVE_RESULTS_CONFIG,
+    APPEARANCE_SPAN_CONFIG,
     logger,
 )
 from object_detectors import ClothingDetector, JewelryDetector, PersonDetector
 from frame_quality_assessor import FrameQualityAssessor
-from image_similarity_search import ImageSimilaritySearch
-from models import VideoInfo, ProductResult
+from crop_triage import CropTriage
+from jewelry_gate import JewelryGate
+from inference_runtime import get_runtime, runtime_stats
+from results_cache import (
+    ResultsCache,
+    VideoResults,
+    product_from_dict,
+    save_bundles,
+)
+from results_store import ResultsStore
+from live_results import LiveResultsBroker
+from fast_responses import EMPTY_LIST, EncodedPayload
+from bundle_builder import create_bundles
+from product_manifest import build_manifest, save_manifest
+from image_similarity_search import (
+    HotSwapIndex,
+    ImageSimilaritySearch,
+    MerchantCatalogManager,
+    QueryCache,
+    ShardedSimilaritySearch,
+)
+from models import VideoInfo, VideoSummary, ProductResult, ProductSpan
 
 
 class VideoProcessorManager:
@@ -28,17 +63,53 @@ class VideoProcessorManager:
     object detection, and product similarity search.
     """
 
+    # Stores the merchant selected at upload time next to the video file
+    MERCHANT_FILE = "merchant.txt"
+
     def __init__(self):
         """Initialize the video processor manager."""
+        # In-process registry, used when the SQLite store is disabled
         self.videos: Dict[str, VideoInfo] = {}
+        self.store: Optional[ResultsStore] = None
+        if STORAGE_CONFIG.enable_sqlite_store:
+            self.store = ResultsStore(
+                STORAGE_CONFIG.db_path, STORAGE_CONFIG.busy_timeout_ms
+            )
         self.detector: Optional[ClothingDetector] = None
         self.jewelry_detector: Optional[JewelryDetector] = None
         self.person_detector: Optional[PersonDetector] = None
         self.quality_assessor: Optional[FrameQualityAssessor] = None
+        self.crop_triage: Optional[CropTriage] = None
+        self.jewelry_gate_stats: Optional[Dict] = None  # Last processed video
+
+        # Unified catalog search, with per-category fallbacks for legacy databases.
+        # Each is a hot-swappable handle over a versioned database directory.
+        self.catalog_similarity_search: Optional[HotSwapIndex] = None
+        self.clothing_similarity_search: Optional[HotSwapIndex] = None
+        self.jewelry_similarity_search: Optional[HotSwapIndex] = None
+        self._shard_generation = 0
+        self.merchant_catalogs: Optional[MerchantCatalogManager] = None
+
+        # Parsed detection results of recently requested videos
+        self.results_cache: Optional[ResultsCache] = None
+        if RESULTS_CACHE_CONFIG.enable_results_cache:
+            self.results_cache = ResultsCache(
+                int(RESULTS_CACHE_CONFIG.memory_budget_mb * 1024 * 1024)
+            )
 
-        # Separate similarity search instances for clothing and jewelry
-        self.clothing_similarity_search: Optional[ImageSimilaritySearch] = None
-        self.jewelry_similarity_search: Optional[ImageSimilaritySearch] = None
+        # Per-interval results of videos being processed by this worker
+        self.live_results: Optional[LiveResultsBroker] = None
+        if LIVE_RESULTS_CONFIG.enable_live_results:
+            self.live_results = LiveResultsBroker()
+
+        # Crop query cache shared by all similarity search instances
+        self.query_cache: Optional[QueryCache] = None
+        if QUERY_CACHE_CONFIG.enable_query_cache:
+            self.query_cache = QueryCache(
+                max_entries=QUERY_CACHE_CONFIG.max_entries,
+                ttl_seconds=QUERY_CACHE_CONFIG.ttl_seconds,
+                persist_path=QUERY_CACHE_CONFIG.persist_path,
+            )
 
         logger.info(
             "VideoProcessorManager initialized with intelligent frame selection "
@@ -77,27 +148,296 @@ class VideoProcessorManager:
             self.quality_assessor = FrameQualityAssessor()
         return self.quality_assessor
 
-    def _get_clothing_similarity_search(self) -> ImageSimilaritySearch:
+    def _get_crop_triage(self) -> CropTriage:
+        """Lazy load the crop triage stage."""
+        if self.crop_triage is None:
+            self.crop_triage = CropTriage()
+        return self.crop_triage
+
+    def _create_similarity_search(
+        self, db_path: Path, model_name: Optional[str]
+    ) -> ImageSimilaritySearch:
+        """
+        Create a similarity search instance for one database version.
+
+        Args:
+            db_path: Directory holding the database files
+            model_name: Embedding model (None = the one in the database manifest)
+
+        Returns:
+            ImageSimilaritySearch configured from SIMILARITY_SEARCH_CONFIG
+        """
+        return ImageSimilaritySearch(
+            db_path=db_path,
+            model_name=model_name,
+            query_cache=self.query_cache,
+            hash_size=QUERY_CACHE_CONFIG.hash_size,
+            rerank_factor=SIMILARITY_SEARCH_CONFIG.rerank_factor,
+            coarse_candidates=SIMILARITY_SEARCH_CONFIG.coarse_candidates,
+            inference_context=get_runtime("clip").run,
+        )
+
+    def _create_sharded_similarity_search(
+        self, db_path: Path
+    ) -> ShardedSimilaritySearch:
+        """
+        Create a sharded similarity search instance for one shard set version.
+        Locally spawned shard workers alternate between two port ranges so a
+        new version can start while the previous one is still serving.
+
+        Args:
+            db_path: Directory holding the shard databases
+
+        Returns:
+            ShardedSimilaritySearch configured from SHARDED_SEARCH_CONFIG
+        """
+        port_block = self._shard_generation % 2
+        self._shard_generation += 1
+        return ShardedSimilaritySearch(
+            db_path=db_path,
+            model_name=SIMILARITY_SEARCH_CONFIG.catalog_model_name,
+            query_cache=self.query_cache,
+            hash_size=QUERY_CACHE_CONFIG.hash_size,
+            shard_addresses=SHARDED_SEARCH_CONFIG.shard_addresses,
+            base_port=SHARDED_SEARCH_CONFIG.base_port
+            + port_block * SHARDED_SEARCH_CONFIG.num_shards,
+            authkey=SHARDED_SEARCH_CONFIG.authkey.encode(),
+            timeout_seconds=SHARDED_SEARCH_CONFIG.timeout_seconds,
+            rerank_factor=SIMILARITY_SEARCH_CONFIG.rerank_factor,
+            coarse_candidates=SIMILARITY_SEARCH_CONFIG.coarse_candidates,
+            inference_context=get_runtime("clip").run,
+        )
+
+    def _create_hot_swap_index(
+        self, root: str, factory: Callable[[Path], ImageSimilaritySearch]
+    ) -> HotSwapIndex:
+        """
+        Wrap a versioned database root in a hot-swappable index handle.
+
+        Args:
+            root: Database root directory
+            factory: Creates a search instance for a database version directory
+
+        Returns:
+            HotSwapIndex watching the root's CURRENT pointer
+        """
+        index = HotSwapIndex(
+            root, factory, poll_seconds=SIMILARITY_SEARCH_CONFIG.reload_poll_seconds
+        )
+        index.start_watcher()
+        return index
+
+    def _get_clothing_similarity_search(self) -> HotSwapIndex:
         """Lazy load the clothing similarity search engine."""
         if self.clothing_similarity_search is None:
             logger.info("Loading clothing similarity search engine...")
-            self.clothing_similarity_search = ImageSimilaritySearch(
-                db_path=SIMILARITY_SEARCH_CONFIG.clothing_db_path
+            self.clothing_similarity_search = self._create_hot_swap_index(
+                SIMILARITY_SEARCH_CONFIG.clothing_db_path,
+                lambda path: self._create_similarity_search(
+                    path, SIMILARITY_SEARCH_CONFIG.clothing_model_name
+                ),
             )
         return self.clothing_similarity_search
 
-    def _get_jewelry_similarity_search(self) -> ImageSimilaritySearch:
+    def _get_jewelry_similarity_search(self) -> HotSwapIndex:
         """Lazy load the jewelry similarity search engine."""
         if self.jewelry_similarity_search is None:
             logger.info("Loading jewelry similarity search engine...")
-            self.jewelry_similarity_search = ImageSimilaritySearch(
-                db_path=SIMILARITY_SEARCH_CONFIG.jewelry_db_path
+            self.jewelry_similarity_search = self._create_hot_swap_index(
+                SIMILARITY_SEARCH_CONFIG.jewelry_db_path,
+                lambda path: self._create_similarity_search(
+                    path, SIMILARITY_SEARCH_CONFIG.jewelry_model_name
+                ),
             )
         return self.jewelry_similarity_search
 
+    def _get_catalog_similarity_search(self) -> Optional[HotSwapIndex]:
+        """
+        Lazy load the unified catalog similarity search engine.
+
+        Returns:
+            HotSwapIndex for the catalog, or None if the unified catalog is
+            disabled or has not been built yet
+        """
+        if not SIMILARITY_SEARCH_CONFIG.use_unified_catalog:
+            return None
+        if self.catalog_similarity_search is None:
+            if SHARDED_SEARCH_CONFIG.enable_sharding:
+                catalog_index = HotSwapIndex(
+                    SHARDED_SEARCH_CONFIG.shards_path,
+                    self._create_sharded_similarity_search,
+                    poll_seconds=SIMILARITY_SEARCH_CONFIG.reload_poll_seconds,
+                    database_exists=ShardedSimilaritySearch.database_exists,
+                )
+            else:
+                catalog_index = HotSwapIndex(
+                    SIMILARITY_SEARCH_CONFIG.catalog_db_path,
+                    lambda path: self._create_similarity_search(
+                        path, SIMILARITY_SEARCH_CONFIG.catalog_model_name
+                    ),
+                    poll_seconds=SIMILARITY_SEARCH_CONFIG.reload_poll_seconds,
+                )
+            # Runs for every detection until a build exists, so this only
+            # checks files (creating a search instance creates its directory)
+            if not catalog_index.is_built():
+                return None
+            logger.info("Loading unified catalog similarity search engine...")
+            catalog_index.start_watcher()
+            self.catalog_similarity_search = catalog_index
+        return self.catalog_similarity_search
+
+    def _get_merchant_catalogs(self) -> Optional[MerchantCatalogManager]:
+        """
+        Lazy create the per-merchant catalog manager.
+
+        Returns:
+            MerchantCatalogManager, or None if merchant catalogs are disabled
+        """
+        if not MERCHANT_CATALOG_CONFIG.enable_merchant_catalogs:
+            return None
+        if self.merchant_catalogs is None:
+            self.merchant_catalogs = MerchantCatalogManager(
+                MERCHANT_CATALOG_CONFIG.merchants_path,
+                lambda path: self._create_similarity_search(
+                    path, MERCHANT_CATALOG_CONFIG.model_name
+                ),
+                memory_budget_bytes=int(
+                    MERCHANT_CATALOG_CONFIG.memory_budget_mb * 1024 * 1024
+                ),
+                max_resident=MERCHANT_CATALOG_CONFIG.max_resident,
+            )
+        return self.merchant_catalogs
+
+    def has_merchant_catalog(self, merchant_id: str) -> bool:
+        """
+        Check whether a merchant has a catalog that uploads can be matched against.
+
+        Args:
+            merchant_id: Merchant identifier
+
+        Returns:
+            True if merchant catalogs are enabled and the merchant's catalog is built
+
+        Raises:
+            ValueError: If the merchant ID is not a valid identifier
+        """
+        merchant_catalogs = self._get_merchant_catalogs()
+        if merchant_catalogs is None:
+            return False
+        return merchant_catalogs.has_catalog(merchant_id)
+
+    def _loaded_indexes(self) -> Dict[str, HotSwapIndex]:
+        """Get the similarity indexes that have been created, keyed by name."""
+        indexes = {
+            "catalog": self.catalog_similarity_search,
+            "clothing": self.clothing_similarity_search,
+            "jewelry": self.jewelry_similarity_search,
+        }
+        return {name: index for name, index in indexes.items() if index is not None}
+
+    def reload_similarity_indexes(self) -> Dict:
+        """
+        Reload every loaded similarity index whose published version changed.
+        New versions load in the background and are swapped in atomically;
+        in-flight searches finish on the previous version.
+
+        Returns:
+            Dictionary of index statuses at the time of the request
+        """
+        for index in self._loaded_indexes().values():
+            index.reload(background=True)
+        if self.merchant_catalogs is not None:
+            self.merchant_catalogs.reload(background=True)
+        return {name: index.status() for name, index in self._loaded_indexes().items()}
+
+    def get_search_stats(self) -> Dict:
+        """
+        Get similarity search metrics: query cache counters, loaded index
+        versions, merchant catalog residency and, when the catalog is sharded,
+        per-shard health and latency.
+
+        Returns:
+            Dictionary of search statistics
+        """
+        stats: Dict = {
+            "query_cache": self.query_cache.stats() if self.query_cache else None,
+            "indexes": {
+                name: index.status() for name, index in self._loaded_indexes().items()
+            },
+            "shards": None,
+            "crop_triage": self.crop_triage.stats() if self.crop_triage else None,
+            "jewelry_gate": self.jewelry_gate_stats,
+            "results_cache": self.results_cache.stats() if self.results_cache else None,
+            "merchants": (
+                self.merchant_catalogs.stats() if self.merchant_catalogs else None
+            ),
+        }
+        if self.catalog_similarity_search is not None:
+            catalog_search = self.catalog_similarity_search.search
+            if isinstance(catalog_search, ShardedSimilaritySearch):
+                stats["shards"] = catalog_search.check_health()
+        return stats
+
+    def get_runtime_stats(self) -> Dict:
+        """
+        Get per-model inference settings and recent latency (mean, p50, p95).
+
+        Returns:
+            Dictionary of runtime statistics keyed by model name
+        """
+        return runtime_stats()
+
+    def _search_similar(
+        self, crop_path: Path, detection: Dict, merchant_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Search the catalog for products similar to a detection crop.
+        Uses the merchant's own catalog when the video has a merchant, otherwise
+        the unified catalog, restricted to the detection's category (and label,
+        when indexed), falling back to the per-category databases.
+
+        Args:
+            crop_path: Path to the saved detection crop
+            detection: Detection dictionary with "category" and "label"
+            merchant_id: Merchant whose catalog to search (None = shared catalog)
+
+        Returns:
+            List of matching catalog records (best match first)
+        """
+        category = detection.get("category", "unknown")
+        label = detection["label"] if SIMILARITY_SEARCH_CONFIG.filter_by_label else None
+
+        merchant_catalogs = self._get_merchant_catalogs()
+        if merchant_id is not None and merchant_catalogs is not None:
+            with merchant_catalogs.acquire(merchant_id) as merchant_search:
+                return merchant_search.search_products(
+                    str(crop_path), top_k=1, category=category, label=label
+                )
+
+        catalog_index = self._get_catalog_similarity_search()
+        if catalog_index is not None:
+            with catalog_index.acquire() as catalog_search:
+                return catalog_search.search_products(
+                    str(crop_path), top_k=1, category=category, label=label
+                )
+
+        if category == "clothing":
+            category_index = self._get_clothing_similarity_search()
+        elif category == "jewelry":
+            category_index = self._get_jewelry_similarity_search()
+        else:
+            raise ValueError(f"Unknown category '{category}'")
+        with category_index.acquire() as category_search:
+            return category_search.search_products(str(crop_path), top_k=1)
+
     def _load_existing_videos(self) -> None:
         """
-        Scan the data/uploads directory and load existing videos into the registry.
+        Load the video registry.
+
+        With the SQLite store, registered videos are read on demand, and only
+        video folders missing from the store (e.g. uploaded before the store
+        existed) are imported, together with their detection_results.json.
+        Without it, data/uploads is scanned into the in-process registry.
         """
         uploads_dir = Path("data/uploads")
 
@@ -106,6 +446,11 @@ class VideoProcessorManager:
             uploads_dir.mkdir(parents=True, exist_ok=True)
             return
 
+        if self.store is not None:
+            if STORAGE_CONFIG.migrate_json_results:
+                self._migrate_uploads(uploads_dir)
+            return
+
         logger.info(f"Scanning {uploads_dir} for existing videos...")
         video_count = 0
 
@@ -114,66 +459,124 @@ class VideoProcessorManager:
             if not video_dir.is_dir():
                 continue
 
-            try:
-                video_id = video_dir.name
-
-                # Find video file in the directory
-                video_files = (
-                    list(video_dir.glob("*.mp4"))
-                    + list(video_dir.glob("*.avi"))
-                    + list(video_dir.glob("*.mov"))
-                    + list(video_dir.glob("*.mkv"))
-                    + list(video_dir.glob("*.webm"))
-                    + list(video_dir.glob("*.m4v"))
-                )
+            video_info = self._load_video_dir(video_dir)
+            if video_info is not None:
+                self.videos[video_info.id] = video_info
+                video_count += 1
 
-                if not video_files:
-                    logger.warning(f"No video file found in {video_dir}")
-                    continue
+        logger.info(f"Loaded {video_count} existing videos from {uploads_dir}")
 
-                video_file = video_files[0]
-                filename = video_file.name
-                file_path = str(video_file)
-                results_dir = str(video_dir / "results")
+    def _migrate_uploads(self, uploads_dir: Path) -> None:
+        """
+        Import video folders that are not in the SQLite store yet.
 
-                # Check if results exist to determine status
-                results_file = video_dir / "results" / "detection_results.json"
-                if results_file.exists():
-                    status = "completed"
-                    logger.debug(f"Found completed video: {video_id}")
-                else:
-                    # Check if results directory exists but is empty
-                    if Path(results_dir).exists():
-                        status = "failed"
-                        logger.debug(f"Found failed video: {video_id}")
-                    else:
-                        status = "processing"
-                        logger.debug(f"Found unprocessed video: {video_id}")
-
-                # Create VideoInfo object
-                video_info = VideoInfo(
-                    id=video_id,
-                    filename=filename,
-                    status=status,
-                    file_path=file_path,
-                    results_dir=results_dir,
-                )
+        Args:
+            uploads_dir: Directory with one subdirectory per video ID
+        """
+        known_ids = self.store.video_ids()
+        video_count = 0
+        frame_count = 0
 
-                # Add to registry
-                self.videos[video_id] = video_info
-                video_count += 1
+        for video_dir in uploads_dir.iterdir():
+            if not video_dir.is_dir() or video_dir.name in known_ids:
+                continue
 
-                # Generate thumbnail if it doesn't exist
-                thumbnail_path = video_dir / "thumbnail.jpg"
-                if not thumbnail_path.exists():
-                    logger.info(f"Generating missing thumbnail for video: {video_id}")
-                    self._generate_thumbnail(file_path, video_id)
+            video_info = self._load_video_dir(video_dir)
+            if video_info is None:
+                continue
 
+            try:
+                self.store.upsert_video(video_info)
+                results_file = Path(video_info.results_dir) / "detection_results.json"
+                if results_file.exists():
+                    frame_count += self.store.migrate_json_results(
+                        video_info.id, results_file
+                    )
+                video_count += 1
             except Exception as e:
-                logger.error(f"Error loading video from {video_dir}: {e}")
-                continue
+                logger.error(f"Error migrating video from {video_dir}: {e}")
 
-        logger.info(f"Loaded {video_count} existing videos from {uploads_dir}")
+        if video_count:
+            logger.info(
+                f"Migrated {video_count} videos ({frame_count} frames) "
+                f"from {uploads_dir} into the results store"
+            )
+        logger.info(f"Results store: {self.store.stats()}")
+
+    def _load_video_dir(self, video_dir: Path) -> Optional[VideoInfo]:
+        """
+        Build the registry entry of one video folder in data/uploads.
+
+        Args:
+            video_dir: Video folder (named after the video ID)
+
+        Returns:
+            VideoInfo object, or None if the folder has no video file
+        """
+        try:
+            video_id = video_dir.name
+
+            # Find video file in the directory
+            video_files = (
+                list(video_dir.glob("*.mp4"))
+                + list(video_dir.glob("*.avi"))
+                + list(video_dir.glob("*.mov"))
+                + list(video_dir.glob("*.mkv"))
+                + list(video_dir.glob("*.webm"))
+                + list(video_dir.glob("*.m4v"))
+            )
+
+            if not video_files:
+                logger.warning(f"No video file found in {video_dir}")
+                return None
+
+            video_file = video_files[0]
+            filename = video_file.name
+            file_path = str(video_file)
+            results_dir = str(video_dir / "results")
+
+            # Check if results exist to determine status
+            results_file = video_dir / "results" / "detection_results.json"
+            if results_file.exists():
+                status = "completed"
+                logger.debug(f"Found completed video: {video_id}")
+            else:
+                # Check if results directory exists but is empty
+                if Path(results_dir).exists():
+                    status = "failed"
+                    logger.debug(f"Found failed video: {video_id}")
+                else:
+                    status = "processing"
+                    logger.debug(f"Found unprocessed video: {video_id}")
+
+            # Merchant selected at upload time, if any
+            merchant_file = video_dir / self.MERCHANT_FILE
+            merchant_id = None
+            if merchant_file.exists():
+                merchant_id = merchant_file.read_text().strip()
+
+            # Create VideoInfo object
+            video_info = VideoInfo(
+                id=video_id,
+                filename=filename,
+                status=status,
+                file_path=file_path,
+                results_dir=results_dir,
+                merchant_id=merchant_id or None,
+                created_at=video_file.stat().st_mtime,
+            )
+
+            # Generate thumbnail if it doesn't exist
+            thumbnail_path = video_dir / "thumbnail.jpg"
+            if not thumbnail_path.exists():
+                logger.info(f"Generating missing thumbnail for video: {video_id}")
+                self._generate_thumbnail(file_path, video_id)
+
+            return video_info
+
+        except Exception as e:
+            logger.error(f"Error loading video from {video_dir}: {e}")
+            return None
 
     def add_video(self, video_info: VideoInfo) -> None:
         """
@@ -182,7 +585,15 @@ class VideoProcessorManager:
         Args:
             video_info: Video information object
         """
-        self.videos[video_info.id] = video_info
+        if video_info.created_at is None:
+            video_info.created_at = time.time()
+        if self.store is not None:
+            self.store.upsert_video(video_info)
+        else:
+            self.videos[video_info.id] = video_info
+        if video_info.merchant_id and video_info.file_path:
+            merchant_file = Path(video_info.file_path).parent / self.MERCHANT_FILE
+            merchant_file.write_text(video_info.merchant_id)
         logger.info(f"Added video to registry: {video_info.id} - {video_info.filename}")
 
     def get_video(self, video_id: str) -> Optional[VideoInfo]:
@@ -195,7 +606,10 @@ class VideoProcessorManager:
         Returns:
             VideoInfo object or None if not found
         """
-        video = self.videos.get(video_id)
+        if self.store is not None:
+            video = self.store.get_video(video_id)
+        else:
+            video = self.videos.get(video_id)
         if video is None:
             raise ValueError(f"Video not found: {video_id}")
         return video
@@ -207,8 +621,119 @@ class VideoProcessorManager:
         Returns:
             List of VideoInfo objects
         """
+        if self.store is not None:
+            return self.store.list_videos()
         return list(self.videos.values())
 
+    def list_videos(
+        self,
+        limit: Optional[int],
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        newest_first: bool = True,
+        summary: bool = False,
+    ) -> Tuple[List, Optional[str]]:
+        """
+        Get one page of videos sorted by creation time.
+
+        With the SQLite store the page is read through an index, so its cost
+        depends on the page size only; the in-process registry is sorted on
+        every call.
+
+        Args:
+            limit: Page size (None = every video after the cursor)
+            cursor: next_cursor returned with the previous page
+            status: Only videos with this status (None = all)
+            newest_first: Sort by descending creation time
+            summary: Return VideoSummary projections instead of VideoInfo
+
+        Returns:
+            Tuple of the page (VideoInfo or VideoSummary objects) and the
+            cursor of the next page (None on the last page)
+        """
+        after = self._decode_cursor(cursor) if cursor else None
+
+        # One extra video tells whether there is a next page
+        fetch = None if limit is None else limit + 1
+        if self.store is not None:
+            page = self.store.list_videos_page(
+                fetch, status, newest_first, after, summary
+            )
+            if summary:
+                page = [VideoSummary(**row) for row in page]
+        else:
+            def position(video: VideoInfo) -> Tuple[float, str]:
+                return (video.created_at or 0.0, video.id)
+
+            videos = sorted(
+                (
+                    v
+                    for v in self.videos.values()
+                    if status is None or v.status == status
+                ),
+                key=position,
+                reverse=newest_first,
+            )
+            if after is not None:
+                videos = [
+                    v
+                    for v in videos
+                    if (position(v) < after if newest_first else position(v) > after)
+                ]
+            page = videos[:fetch]
+            if summary:
+                page = [
+                    VideoSummary(
+                        id=v.id,
+                        filename=v.filename,
+                        status=v.status,
+                        created_at=v.created_at,
+                    )
+                    for v in page
+                ]
+
+        next_cursor = None
+        if limit is not None and len(page) > limit:
+            page = page[:limit]
+            next_cursor = self._encode_cursor(page[-1].created_at or 0.0, page[-1].id)
+        return page, next_cursor
+
+    @staticmethod
+    def _encode_cursor(created_at: float, video_id: str) -> str:
+        """Encode a listing position as an opaque cursor."""
+        raw = json.dumps([created_at, video_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[float, str]:
+        """Decode a cursor created by _encode_cursor."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            created_at, video_id = json.loads(raw)
+            return float(created_at), str(video_id)
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    def _set_status(
+        self,
+        video_info: VideoInfo,
+        status: str,
+        error_message: Optional[str] = None,
+    ) -> None:
+        """
+        Update a video's status, in the store when enabled so every worker
+        sees it.
+
+        Args:
+            video_info: Video information object
+            status: "processing", "completed" or "failed"
+            error_message: Error of a failed run
+        """
+        video_info.status = status
+        video_info.error_message = error_message
+        if self.store is not None:
+            self.store.update_status(video_info.id, status, error_message)
+
     def process_video(self, video_id: str) -> None:
         """
         Process a video: extract frames, detect objects, find similar products.
@@ -221,34 +746,81 @@ class VideoProcessorManager:
             video_info = self.get_video(video_id)
             logger.info(f"Starting processing for video: {video_id}")
 
-            # Update status to processing
-            video_info.status = "processing"
+            # Update status to processing and drop results cached from a previous run
+            self._set_status(video_info, "processing")
+            if self.results_cache is not None:
+                self.results_cache.invalidate(video_id)
+            if self.store is not None:
+                self.store.clear_results(video_id)
+            if self.live_results is not None:
+                self.live_results.start(video_id)
 
             # Create results directory
             results_dir = Path(video_info.results_dir)
             results_dir.mkdir(exist_ok=True, parents=True)
 
             # Extract frames and process
+            # As each timestamp is processed, group its products into bundles,
+            # write it to the store and publish it to live subscribers
+            bundles_data: Dict[float, List[Dict]] = {}
+
+            def on_frame(timestamp: float, products: List[Dict]) -> None:
+                product_results = [product_from_dict(p) for p in products]
+                bundles = create_bundles(video_id, timestamp, product_results)
+                bundles_data[timestamp] = bundles
+                if self.store is not None:
+                    self.store.save_frame(video_id, timestamp, products)
+                if self.live_results is not None:
+                    self.live_results.publish_frame(
+                        video_id, timestamp, product_results, bundles
+                    )
+
+            on_progress = (
+                partial(self.live_results.publish_progress, video_id)
+                if self.live_results is not None
+                else None
+            )
+
             frames_data = self._extract_and_process_frames(
-                video_info.file_path, results_dir
+                video_info.file_path,
+                results_dir,
+                video_info.merchant_id,
+                on_frame,
+                on_progress,
             )
 
             # Generate thumbnail
             self._generate_thumbnail(video_info.file_path, video_info.id)
 
+            # Aggregate the whole video into a ranked product manifest
+            manifest = build_manifest(video_id, frames_data)
+
             # Save results
-            self._save_results(results_dir, frames_data)
+            self._save_results(
+                video_id, results_dir, frames_data, bundles_data, manifest
+            )
+            if self.results_cache is not None:
+                self.results_cache.invalidate(video_id)
+
+            # Persist the query cache so later jobs reuse this video's crops
+            if self.query_cache is not None:
+                logger.info(f"Query cache stats: {self.query_cache.stats()}")
+                self.query_cache.save()
 
             # Update status to completed
-            video_info.status = "completed"
+            self._set_status(video_info, "completed")
+            if self.live_results is not None:
+                self.live_results.finish(video_id, "completed")
             logger.info(f"Successfully processed video: {video_id}")
 
         except Exception as e:
             logger.error(f"Error processing video {video_id}: {str(e)}", exc_info=True)
-            video_info = self.videos.get(video_id)
-            if video_info:
-                video_info.status = "failed"
-                video_info.error_message = str(e)
+            try:
+                self._set_status(self.get_video(video_id), "failed", str(e))
+            except ValueError:
+                pass
+            if self.live_results is not None:
+                self.live_results.finish(video_id, "failed", str(e))
 
     def _select_best_frame_in_range(
         self,
@@ -322,7 +894,12 @@ class VideoProcessorManager:
         return None
 
     def _extract_and_process_frames(
-        self, video_path: str, results_dir: Path
+        self,
+        video_path: str,
+        results_dir: Path,
+        merchant_id: Optional[str] = None,
+        on_frame: Optional[Callable[[float, List[Dict]], None]] = None,
+        on_progress: Optional[Callable[[float], None]] = None,
     ) -> Dict[float, List[Dict]]:
         """
         Extract frames at intervals and process each frame with intelligent selection.
@@ -331,6 +908,10 @@ class VideoProcessorManager:
         Args:
             video_path: Path to the video file
             results_dir: Directory to save frame images
+            merchant_id: Merchant whose catalog to search (None = shared catalog)
+            on_frame: Called with each processed timestamp and its products
+            on_progress: Called with the processed fraction of the video at
+                each interval
 
         Returns:
             Dictionary mapping timestamps to detection results
@@ -366,10 +947,16 @@ class VideoProcessorManager:
         jewelry_detector = self._get_jewelry_detector()
         person_detector = self._get_person_detector()
         quality_assessor = self._get_quality_assessor()
+        crop_triage = self._get_crop_triage()
+        dropped_before = Counter(crop_triage.dropped)
+        jewelry_gate = JewelryGate(quality_assessor)
 
         try:
             # Process at intervals
             for interval_idx in range(0, total_frames, frame_interval):
+                if on_progress is not None:
+                    on_progress(interval_idx / total_frames)
+
                 # Select best frame around this interval
                 frame_result = self._select_best_frame_in_range(
                     cap,
@@ -405,27 +992,41 @@ class VideoProcessorManager:
                     skipped_person += 1
                     continue
 
-                # Get person bounding box for focused detection
-                person_box = person_detector.get_primary_person_box(pil_image)
+                # Get person bounding box(es) for focused detection
+                if PERSON_DETECTION_CONFIG.detect_all_persons:
+                    person_boxes = person_detector.get_person_boxes(pil_image)
+                else:
+                    person_box = person_detector.get_primary_person_box(pil_image)
+                    person_boxes = [person_box] if person_box is not None else []
 
                 # Save frame image
                 frame_path = frames_dir / f"frame_{timestamp:.1f}s.jpg"
                 cv2.imwrite(str(frame_path), frame)
 
                 # Detect objects (both clothing and jewelry)
-                # If person box available, focus detection on person region
+                # If person boxes available, focus detection on person regions
                 detections = self._detect_objects_in_frame(
-                    pil_image, detector, jewelry_detector, person_box
+                    pil_image,
+                    detector,
+                    jewelry_detector,
+                    person_boxes,
+                    jewelry_gate,
+                    frame,
                 )
 
+                # Drop overlapping, tiny and blurry crops before embedding
+                detections = crop_triage.filter_detections(detections, frame)
+
                 # Find similar products for each detection
                 products = self._find_similar_products(
-                    detections, pil_image, frames_dir, timestamp
+                    detections, pil_image, frames_dir, timestamp, merchant_id
                 )
 
                 if products:
                     frames_data[timestamp] = products
                     processed_count += 1
+                    if on_frame is not None:
+                        on_frame(timestamp, products)
 
         finally:
             cap.release()
@@ -435,6 +1036,17 @@ class VideoProcessorManager:
             f"Skipped (quality): {skipped_quality}, "
             f"Skipped (no person): {skipped_person}"
         )
+        if JEWELRY_GATE_CONFIG.enable_gating:
+            self.jewelry_gate_stats = jewelry_gate.stats()
+            logger.info(f"Jewelry detector gating: {self.jewelry_gate_stats}")
+
+        dropped_crops = crop_triage.dropped - dropped_before
+        logger.info(
+            "Crops dropped before search - "
+            + ", ".join(
+                f"{reason}: {dropped_crops[reason]}" for reason in CropTriage.REASONS
+            )
+        )
         return frames_data
 
     def _detect_objects_in_frame(
@@ -442,25 +1054,32 @@ class VideoProcessorManager:
         image: Image.Image,
         detector: ClothingDetector,
         jewelry_detector: JewelryDetector,
-        person_box: Optional[tuple] = None,
+        person_boxes: Optional[List[tuple]] = None,
+        jewelry_gate: Optional[JewelryGate] = None,
+        frame: Optional[np.ndarray] = None,
     ) -> List[Dict]:
         """
         Detect objects in a single frame using both clothing and jewelry detectors.
-        Optionally focuses detection on person region for improved accuracy.
+        Optionally focuses detection on person regions for improved accuracy;
+        all person regions of the frame go through each detector in one batch.
 
         Args:
             image: PIL Image object
             detector: ClothingDetector instance for clothing
             jewelry_detector: JewelryDetector instance for jewelry
-            person_box: Optional (x1, y1, x2, y2) tuple for person bounding box
+            person_boxes: Optional list of (x1, y1, x2, y2) person bounding boxes
+            jewelry_gate: Optional gate deciding whether to call the jewelry detector
+            frame: OpenCV frame (BGR format), required with jewelry_gate
 
         Returns:
-            List of detection dictionaries from both detectors
+            List of detection dictionaries from both detectors, each tagged with
+            the index of the person region it was found in (None for full frame)
         """
         detections = []
 
-        # If person box provided, crop to person region for detection
-        if person_box is not None:
+        # Crop to each person region (with small padding), or use the full image
+        regions = []
+        for person_index, person_box in enumerate(person_boxes or []):
             x1, y1, x2, y2 = person_box
             # Add small padding around person box
             padding = 0.05
@@ -476,31 +1095,40 @@ class VideoProcessorManager:
             crop_y2 = min(image.size[1], y2 + pad_y)
 
             # Crop to person region
-            detection_image = image.crop((crop_x1, crop_y1, crop_x2, crop_y2))
-            offset_x, offset_y = crop_x1, crop_y1
+            regions.append(
+                (
+                    image.crop((crop_x1, crop_y1, crop_x2, crop_y2)),
+                    (crop_x1, crop_y1),
+                    person_index,
+                )
+            )
 
             logger.debug(
-                f"Detecting in person region: ({crop_x1},{crop_y1},{crop_x2},{crop_y2})"
+                f"Detecting in person {person_index} region: "
+                f"({crop_x1},{crop_y1},{crop_x2},{crop_y2})"
             )
-        else:
+        if not regions:
             # Use full image
-            detection_image = image
-            offset_x, offset_y = 0, 0
+            regions.append((image, (0, 0), None))
+
+        region_images = [region_image for region_image, _, _ in regions]
 
         # Detect clothing items
-        clothing_results = detector.detect_objects(detection_image)
-        for score, label, box in zip(
-            clothing_results["scores"],
-            clothing_results["labels"],
-            clothing_results["boxes"],
+        clothing_batch = detector.detect_objects_batch(region_images)
+        for (_, (offset_x, offset_y), person_index), clothing_results in zip(
+            regions, clothing_batch
         ):
-            label_name = detector.get_label_name(label.item())
-            confidence = score.item()
-
-            if confidence >= detector.confidence_threshold:
-                # Map coordinates back to original image if cropped
-                box_coords = box.tolist()
-                if person_box is not None:
+            for score, label, box in zip(
+                clothing_results["scores"],
+                clothing_results["labels"],
+                clothing_results["boxes"],
+            ):
+                label_name = detector.get_label_name(label.item())
+                confidence = score.item()
+
+                if confidence >= detector.confidence_threshold:
+                    # Map coordinates back to original image
+                    box_coords = box.tolist()
                     box_coords = [
                         box_coords[0] + offset_x,
                         box_coords[1] + offset_y,
@@ -508,52 +1136,77 @@ class VideoProcessorManager:
                         box_coords[3] + offset_y,
                     ]
 
-                detection = {
-                    "label": label_name,
-                    "confidence": confidence,
-                    "box": box_coords,
-                    "category": "clothing",
-                }
-                detections.append(detection)
-                logger.debug(
-                    f"Detected clothing: {label_name} with confidence {confidence:.2f}"
-                )
+                    detection = {
+                        "label": label_name,
+                        "confidence": confidence,
+                        "box": box_coords,
+                        "category": "clothing",
+                        "person_index": person_index,
+                    }
+                    detections.append(detection)
+                    logger.debug(
+                        f"Detected clothing: {label_name} with confidence {confidence:.2f}"
+                    )
 
-        # Detect jewelry items
-        jewelry_results = jewelry_detector.detect_objects(detection_image)
-        for score, label, box in zip(
-            jewelry_results["scores"],
-            jewelry_results["labels"],
-            jewelry_results["boxes"],
+        # Detect jewelry items, unless the gate decides the call is not worth it.
+        # Each region image or tile sent is one detector request.
+        tile_plan = None
+        jewelry_requests = len(region_images)
+        if JEWELRY_CONFIG.enable_tiling:
+            # All person regions share the frame's tile budget
+            tile_plan = jewelry_detector.tile_plan(region_images)
+            jewelry_requests = sum(len(tiles) for tiles in tile_plan)
+        if jewelry_gate is not None and not jewelry_gate.should_call(
+            frame, person_boxes or [], detections, jewelry_requests
         ):
-            label_name = jewelry_detector.get_label_name(label)
-            confidence = score
-
-            if confidence >= jewelry_detector.confidence_threshold:
-                # Map coordinates back to original image if cropped
-                box_coords = box if isinstance(box, list) else box
-                if person_box is not None and isinstance(box_coords, list):
+            jewelry_batch = []
+        elif tile_plan is not None:
+            jewelry_batch = jewelry_detector.detect_objects_tiled(
+                region_images, tile_plan
+            )
+        else:
+            jewelry_batch = jewelry_detector.detect_objects_batch(region_images)
+        for (_, (offset_x, offset_y), person_index), jewelry_results in zip(
+            regions, jewelry_batch
+        ):
+            for score, label, box in zip(
+                jewelry_results["scores"],
+                jewelry_results["labels"],
+                jewelry_results["boxes"],
+            ):
+                label_name = jewelry_detector.get_label_name(label)
+                confidence = score
+
+                if confidence >= jewelry_detector.confidence_threshold:
+                    # Map coordinates back to original image
                     box_coords = [
-                        box_coords[0] + offset_x,
-                        box_coords[1] + offset_y,
-                        box_coords[2] + offset_x,
-                        box_coords[3] + offset_y,
+                        box[0] + offset_x,
+                        box[1] + offset_y,
+                        box[2] + offset_x,
+                        box[3] + offset_y,
                     ]
 
-                detection = {
-                    "label": label_name,
-                    "confidence": confidence,
-                    "box": box_coords,
-                    "category": "jewelry",
-                }
-                detections.append(detection)
-                logger.debug(
-                    f"Detected jewelry: {label_name} with confidence {confidence:.2f}"
-                )
+                    detection = {
+                        "label": label_name,
+                        "confidence": confidence,
+                        "box": box_coords,
+                        "category": "jewelry",
+                        "person_index": person_index,
+                    }
+                    detections.append(detection)
+                    logger.debug(
+                        f"Detected jewelry: {label_name} with confidence {confidence:.2f}"
+                    )
+
+        if jewelry_gate is not None and jewelry_batch:
+            jewelry_gate.record(
+                any(d["category"] == "jewelry" for d in detections), jewelry_requests
+            )
 
+        where = f"in {len(person_boxes)} person region(s)" if person_boxes else ""
         logger.info(
             f"Total detections: {len(detections)} (clothing + jewelry) "
-            f"{'in person region' if person_box else 'in full frame'}"
+            f"{where or 'in full frame'}"
         )
         return detections
 
@@ -563,10 +1216,11 @@ class VideoProcessorManager:
         image: Image.Image,
         frames_dir: Path,
         timestamp: float,
+        merchant_id: Optional[str] = None,
     ) -> List[Dict]:
         """
         Find similar products for detected objects.
-        Routes searches to appropriate database based on detection category.
+        Routes searches to the catalog partition matching the detection category.
         Returns only unique products (deduplicated by image_url),
         keeping the most confident match for each unique product.
 
@@ -575,14 +1229,11 @@ class VideoProcessorManager:
             image: Original frame image
             frames_dir: Directory to save cropped images
             timestamp: Frame timestamp
+            merchant_id: Merchant whose catalog to search (None = shared catalog)
 
         Returns:
             List of unique product results
         """
-        # Get both similarity search instances
-        clothing_search = self._get_clothing_similarity_search()
-        jewelry_search = self._get_jewelry_similarity_search()
-
         # Create crops directory
         crops_dir = frames_dir / "crops"
         crops_dir.mkdir(exist_ok=True)
@@ -603,50 +1254,29 @@ class VideoProcessorManager:
                 crop_path = crops_dir / f"crop_{category}_{timestamp:.1f}s_{idx}.jpg"
                 cropped.save(crop_path)
 
-                # Route to appropriate similarity search based on category
-                if category == "clothing":
-                    similar_images = clothing_search.search(str(crop_path), top_k=1)
-                    logger.debug(f"Searching clothing database for detection {idx}")
-                elif category == "jewelry":
-                    similar_images = jewelry_search.search(str(crop_path), top_k=1)
-                    logger.debug(f"Searching jewelry database for detection {idx}")
-                else:
-                    logger.warning(
-                        f"Unknown category '{category}' for detection {idx}, skipping"
-                    )
-                    continue
+                # Route to the catalog partition for this detection's category
+                similar_products = self._search_similar(
+                    crop_path, detection, merchant_id
+                )
+                logger.debug(f"Searching {category} catalog for detection {idx}")
 
                 # Create product result for the most similar match
-                if similar_images:
-                    image_path = similar_images[0]
-
-                    # Check if we already have this product
-                    if image_path in unique_products:
-                        # Keep the one with higher confidence
-                        if (
-                            detection["confidence"]
-                            > unique_products[image_path]["confidence"]
-                        ):
-                            unique_products[image_path] = {
-                                "object_type": detection["label"],
-                                "category": detection.get("category", "unknown"),
-                                "image_url": image_path,
-                                "title": f"{detection['label'].title()}",
-                                "stock": "In Stock",
-                                "direct_url": f"https://example.com/product/{uuid.uuid4()}",
-                                "confidence": detection["confidence"],
-                            }
-                    else:
-                        # Add new unique product
-                        unique_products[image_path] = {
-                            "object_type": detection["label"],
-                            "category": detection.get("category", "unknown"),
-                            "image_url": image_path,
-                            "title": f"{detection['label'].title()}",
-                            "stock": "In Stock",
-                            "direct_url": f"https://example.com/product/{uuid.uuid4()}",
-                            "confidence": detection["confidence"],
-                        }
+                if similar_products:
+                    match = similar_products[0]
+                    image_path = match["path"]
+                    product = self._build_product(detection, match)
+                    # Crop relative to the results directory, for the manifest
+                    product["crop_path"] = str(
+                        crop_path.relative_to(frames_dir.parent)
+                    )
+
+                    # Keep the most confident detection of each unique product
+                    if (
+                        image_path not in unique_products
+                        or detection["confidence"]
+                        > unique_products[image_path]["confidence"]
+                    ):
+                        unique_products[image_path] = product
 
             except Exception as e:
                 logger.error(f"Error finding similar products for detection {idx}: {e}")
@@ -663,16 +1293,63 @@ class VideoProcessorManager:
         )
         return products
 
+    def _build_product(self, detection: Dict, match: Dict) -> Dict:
+        """
+        Build a product result from a detection and its best catalog match.
+        Catalog fields are used when present, with label-based fallbacks for
+        catalogs built without product details.
+
+        Args:
+            detection: Object detection dictionary
+            match: Catalog record returned by the similarity search
+
+        Returns:
+            Product result dictionary
+        """
+        stock = match.get("stock")
+        product_id = match.get("product_id")
+        if product_id is None:
+            # No catalog ID: derive a stable one from the catalog image path
+            product_id_text = str(uuid.uuid5(uuid.NAMESPACE_URL, match["path"]))
+        else:
+            product_id_text = str(product_id)
+        return {
+            "object_type": detection["label"],
+            "category": detection.get("category", "unknown"),
+            "image_url": match["path"],
+            "title": match.get("title") or detection["label"].title(),
+            "stock": "Out of Stock" if stock == 0 else "In Stock",
+            "direct_url": match.get("url")
+            or f"https://example.com/product/{product_id_text}",
+            "product_id": product_id,
+            "price": match.get("price"),
+            "confidence": detection["confidence"],
+            "person_index": detection.get("person_index"),
+        }
+
     def _save_results(
-        self, results_dir: Path, frames_data: Dict[float, List[Dict]]
+        self,
+        video_id: str,
+        results_dir: Path,
+        frames_data: Dict[float, List[Dict]],
+        bundles_data: Dict[float, List[Dict]],
+        manifest: List[Dict],
     ) -> None:
         """
-        Save detection results to JSON file.
+        Save detection results, bundles and the product manifest to JSON
+        files, and update the product reverse index.
 
         Args:
+            video_id: Unique identifier of the video
             results_dir: Directory to save results
             frames_data: Dictionary of frame timestamps to product results
+            bundles_data: Dictionary of frame timestamps to product bundles
+            manifest: Product manifest items
         """
+        # Bundles and manifest first, so results never appear without them
+        save_bundles(results_dir, bundles_data)
+        save_manifest(results_dir, manifest)
+
         results_file = results_dir / "detection_results.json"
 
         # Convert float keys to strings for JSON serialization
@@ -685,6 +1362,9 @@ class VideoProcessorManager:
 
         logger.info(f"Saved results to {results_file}")
 
+        if self.store is not None:
+            self.store.index_appearances(video_id, frames_data)
+
     def _generate_thumbnail(self, video_path: str, video_id: str) -> None:
         """
         Generate a thumbnail from the video.
@@ -717,6 +1397,149 @@ class VideoProcessorManager:
         except Exception as e:
             logger.error(f"Error generating thumbnail: {e}")
 
+    def _get_video_results(self, video_info: VideoInfo) -> Optional[VideoResults]:
+        """
+        Get a completed video's parsed results, from the results cache when enabled.
+        With the SQLite store they are read from its results tables, falling
+        back to detection_results.json for videos whose results were not
+        imported.
+
+        Args:
+            video_info: Video information object
+
+        Returns:
+            VideoResults, or None if the results file does not exist (store
+            disabled)
+        """
+        results_dir = Path(video_info.results_dir)
+        results_file = results_dir / "detection_results.json"
+
+        if self.store is None and not results_file.exists():
+            logger.warning(f"Results file not found: {results_file}")
+            return None
+
+        def load() -> VideoResults:
+            if self.store is not None:
+                frames_data = self.store.load_results(video_info.id)
+                if frames_data or not results_file.exists():
+                    return VideoResults.from_frames(
+                        video_info.id, frames_data, results_dir
+                    )
+            return VideoResults.load(results_file, video_info.id)
+
+        if self.results_cache is None:
+            return load()
+        return self.results_cache.get(video_info.id, load)
+
+    def _get_current_results(self, video_info: VideoInfo) -> Optional[VideoResults]:
+        """
+        Get a completed video's results, or the partial results of a video
+        this worker is still processing.
+
+        Args:
+            video_info: Video information object
+
+        Returns:
+            VideoResults, or None if no results are available yet
+        """
+        if video_info.status == "completed":
+            return self._get_video_results(video_info)
+
+        if self.live_results is not None:
+            partial = self.live_results.partial_results(video_info.id)
+            if partial is not None:
+                return partial
+
+        logger.warning(
+            f"Video {video_info.id} is not completed yet. Status: {video_info.status}"
+        )
+        return None
+
+    def subscribe_live_results(self, video_id: str) -> Optional[asyncio.Queue]:
+        """
+        Subscribe to the per-interval results of a video being processed.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            Queue of live events (see LiveResultsBroker), or None if the video
+            is not being processed by this worker
+        """
+        self.get_video(video_id)
+        if self.live_results is None:
+            return None
+        return self.live_results.subscribe(video_id)
+
+    def unsubscribe_live_results(self, video_id: str, queue: asyncio.Queue) -> None:
+        """
+        Stop a live results subscription.
+
+        Args:
+            video_id: Unique identifier of the video
+            queue: Queue returned by subscribe_live_results()
+        """
+        if self.live_results is not None:
+            self.live_results.unsubscribe(video_id, queue)
+
+    def get_timeline(self, video_id: str) -> Optional[VideoResults]:
+        """
+        Get all timestamps and products of a completed video.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            VideoResults with every processed timestamp, or None if the video
+            is not completed or has no results file
+        """
+        video_info = self.get_video(video_id)
+
+        if video_info.status != "completed":
+            return None
+        return self._get_video_results(video_info)
+
+    def get_product_appearances(
+        self, product_id: str, limit: int, cursor: Optional[str] = None
+    ) -> Dict:
+        """
+        Get the videos and timestamps a catalog item appears at.
+
+        Args:
+            product_id: Catalog image path of the item (unique across
+                catalogs, unlike catalog product IDs)
+            limit: Page size
+            cursor: next_cursor of the previous page
+
+        Returns:
+            Dictionary with the appearances (video_id, timestamp, confidence)
+            and the cursor of the next page (None on the last page)
+        """
+        if self.store is None:
+            raise RuntimeError("Product appearances require the SQLite store")
+
+        after = None
+        if cursor:
+            video_id, _, timestamp = cursor.rpartition(":")
+            try:
+                after = (video_id, float(timestamp))
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor}")
+
+        # One extra posting tells whether there is a next page
+        appearances = self.store.product_appearances(product_id, limit + 1, after)
+        next_cursor = None
+        if len(appearances) > limit:
+            appearances = appearances[:limit]
+            last = appearances[-1]
+            next_cursor = f"{last['video_id']}:{last['timestamp']}"
+
+        return {
+            "product_id": product_id,
+            "appearances": appearances,
+            "next_cursor": next_cursor,
+        }
+
     def get_results(self, video_id: str, time: float) -> List[ProductResult]:
         """
         Get detection results for a video at a specific timestamp.
@@ -730,59 +1553,202 @@ class VideoProcessorManager:
         """
         video_info = self.get_video(video_id)
 
-        if video_info.status != "completed":
-            logger.warning(
-                f"Video {video_id} is not completed yet. Status: {video_info.status}"
+        try:
+            video_results = self._get_current_results(video_info)
+            if video_results is None:
+                return []
+
+            if self._use_spans(video_results):
+                # Products whose appearance span contains the requested time
+                products = [
+                    span.product for span in video_results.span_index.at(time)
+                ]
+            else:
+                # Closest processed timestamp to the requested time (rounded to
+                # the interval), only within a reasonable range (2x interval)
+                products = video_results.lookup(time, VIDEO_CONFIG.interval_seconds)
+            if not products:
+                logger.debug(f"No results found near timestamp {time}s")
+                return []
+
+            logger.info(
+                f"Found {len(products)} products for video {video_id} at {time}s"
             )
+            return products
+
+        except Exception as e:
+            logger.error(f"Error loading results: {e}")
             return []
 
-        results_file = Path(video_info.results_dir) / "detection_results.json"
+    def get_bundles(self, video_id: str, time: float) -> List[Dict]:
+        """
+        Get the product bundles for a video at a specific timestamp: bundles
+        of the span-active products when spans are enabled (so they match
+        get_results), otherwise the precomputed bundles of the closest frame.
 
-        if not results_file.exists():
-            logger.warning(f"Results file not found: {results_file}")
-            return []
+        Args:
+            video_id: Unique identifier of the video
+            time: Timestamp in seconds
 
-        try:
-            with open(results_file, "r") as f:
-                all_results = json.load(f)
+        Returns:
+            List of bundle dictionaries
+        """
+        video_info = self.get_video(video_id)
 
-            # Find the closest timestamp
-            timestamps = [float(t) for t in all_results.keys()]
-            if not timestamps:
+        try:
+            video_results = self._get_current_results(video_info)
+            if video_results is None:
                 return []
+            if self._use_spans(video_results):
+                return self._span_bundles(
+                    video_id,
+                    video_results.span_index.spans,
+                    video_results.span_index.active_ids(time),
+                )
+            return video_results.lookup_bundles(time, VIDEO_CONFIG.interval_seconds)
 
-            # Round the requested time to match our interval
-            interval = VIDEO_CONFIG.interval_seconds
-            rounded_time = round(time / interval) * interval
+        except Exception as e:
+            logger.error(f"Error loading bundles: {e}")
+            return []
 
-            # Find exact match or closest
-            closest_time = min(timestamps, key=lambda t: abs(t - rounded_time))
+    def get_results_payload(self, video_id: str, time: float) -> EncodedPayload:
+        """
+        Get the serialized get_results() response, cached with the video's
+        parsed results.
 
-            # Only return results if within reasonable range (2x interval)
-            if abs(closest_time - rounded_time) > interval * 2:
-                logger.debug(f"No results found near timestamp {time}s")
-                return []
+        Args:
+            video_id: Unique identifier of the video
+            time: Timestamp in seconds
+
+        Returns:
+            EncodedPayload of the product list
+        """
+        return self._lookup_payload(video_id, time, "products")
+
+    def get_bundles_payload(self, video_id: str, time: float) -> EncodedPayload:
+        """
+        Get the serialized get_bundles() response, cached with the video's
+        parsed results.
+
+        Args:
+            video_id: Unique identifier of the video
+            time: Timestamp in seconds
+
+        Returns:
+            EncodedPayload of the bundle list
+        """
+        return self._lookup_payload(video_id, time, "bundles")
 
-            products_data = all_results[str(closest_time)]
-
-            # Convert to ProductResult objects
-            products = [
-                ProductResult(
-                    object_type=p["object_type"],
-                    category=p.get("category"),
-                    image_url=p["image_url"],
-                    title=p["title"],
-                    stock=p["stock"],
-                    direct_url=p["direct_url"],
+    def _lookup_payload(self, video_id: str, time: float, field: str) -> EncodedPayload:
+        """
+        Get the serialized products or bundles at a playback time: those of
+        the active appearance spans when spans are enabled, otherwise those of
+        the closest processed timestamp. Both fields use the same lookup, so
+        bundles only ever contain products listed at that time.
+
+        Args:
+            video_id: Unique identifier of the video
+            time: Timestamp in seconds
+            field: "products" or "bundles"
+
+        Returns:
+            EncodedPayload of the list (empty if nothing is close enough)
+        """
+        video_info = self.get_video(video_id)
+
+        try:
+            video_results = self._get_current_results(video_info)
+            if video_results is None:
+                return EMPTY_LIST
+
+            if self._use_spans(video_results):
+                # The products and bundles only change at span boundaries, so
+                # they are cached per set of active spans
+                active = video_results.span_index.active_ids(time)
+                if not active:
+                    return EMPTY_LIST
+                spans = video_results.span_index.spans
+                if field == "bundles":
+                    return video_results.payload(
+                        ("span_bundles", active),
+                        lambda: self._span_bundles(video_id, spans, active),
+                    )
+                return video_results.payload(
+                    ("spans", active), lambda: [spans[i].product for i in active]
                 )
-                for p in products_data
-            ]
 
-            logger.info(
-                f"Found {len(products)} products for video {video_id} at {time}s"
-            )
-            return products
+            index = video_results.closest_index(time, VIDEO_CONFIG.interval_seconds)
+            if index is None:
+                logger.debug(f"No results found near timestamp {time}s")
+                return EMPTY_LIST
+
+            items = getattr(video_results, field)[index]
+            return video_results.payload((field, index), lambda: items)
 
         except Exception as e:
-            logger.error(f"Error loading results: {e}")
+            logger.error(f"Error loading {field}: {e}")
+            return EMPTY_LIST
+
+    @staticmethod
+    def _span_bundles(
+        video_id: str, spans: List[ProductSpan], active: Tuple[int, ...]
+    ) -> List[Dict]:
+        """
+        Bundle the products of a set of active appearance spans.
+
+        Args:
+            video_id: Unique identifier of the video
+            spans: All appearance spans of the video
+            active: Indices of the active spans
+
+        Returns:
+            List of bundle dictionaries (empty if no span is active)
+        """
+        if not active:
             return []
+        # The active set last changed when its latest span started
+        since = max(spans[i].start for i in active)
+        return create_bundles(video_id, since, [spans[i].product for i in active])
+
+    @staticmethod
+    def _use_spans(video_results: VideoResults) -> bool:
+        """Check whether time lookups should use the appearance spans."""
+        return (
+            APPEARANCE_SPAN_CONFIG.enable_spans
+            and video_results.span_index is not None
+        )
+
+    def get_spans_payload(self, video_id: str) -> Optional[EncodedPayload]:
+        """
+        Get the serialized appearance spans of a completed video, with each
+        product listed once per continuous appearance.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            EncodedPayload of the spans (ordered by start time), or None if the
+            video is not completed or has no results
+        """
+        video_results = self.get_timeline(video_id)
+        if video_results is None or video_results.span_index is None:
+            return None
+        spans = video_results.span_index.spans
+        return video_results.payload("spans", lambda: spans, exclude_none=True)
+
+    def get_manifest_payload(self, video_id: str) -> Optional[EncodedPayload]:
+        """
+        Get the serialized product manifest of a completed video.
+
+        Args:
+            video_id: Unique identifier of the video
+
+        Returns:
+            EncodedPayload of the manifest items (most prominent first), or None
+            if the video is not completed or has no results
+        """
+        video_results = self.get_timeline(video_id)
+        if video_results is None or video_results.manifest is None:
+            return None
+        manifest = video_results.manifest
+        return video_results.payload("manifest", lambda: manifest, exclude_none=True)